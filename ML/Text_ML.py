@@ -1,130 +1,481 @@
 
+# 의도 분류 모델 학습 / 평가 / int8 내보내기
+#
+#   cd ML
+#   python Text_ML.py --epochs 10 --batch-size 8
+#   python Text_ML.py --epochs 3 --skip-quantize --timing-out after.json
+#
+#   - 토큰화 결과는 --cache-dir 에 저장해 두고, 데이터·토크나이저·버전이 같으면 다시 토큰화하지 않음
+#   - 학습은 배치마다 가장 긴 문장까지만 패딩(dynamic padding) + 길이가 비슷한 문장끼리 묶어 배치(length bucketing)
+#   - 평가는 검증셋을 길이순으로 정렬해 배치 단위로 추론
+#   - --pad-to-max-length / --legacy-eval 은 이전 방식(max_length 고정 패딩, 문장 단위 추론)으로
+#     실행해 걸린 시간을 비교하기 위한 옵션
+#
+# 지식 증류 (학습이 끝난 BERT 를 교사로 가벼운 학생 모델 학습)
+#   python Text_ML.py --distill
+#   - 학생: 문자 n-gram TF-IDF + 로지스틱 회귀 → trained_intent_model_student/ (백엔드 INTENT_BACKEND=student)
+#   - 정답 라벨과 교사의 확률 분포(--distill-temperature 로 완화)를 --distill-alpha 비율로 섞어 학습
+#   - 검증셋에서 학생의 온도(temperature scaling)를 맞춰 확률을 보정 → 백엔드 캐스케이드의 신뢰도 기준
+#   - 교사 / 학생의 정확도, 문장당 CPU 지연, 메모리를 distill_report.json 으로 저장
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import time
+
+import joblib
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from datasets import Dataset, DatasetDict
+import datasets
+import transformers
+from datasets import Dataset, DatasetDict, load_from_disk
 from transformers import (
     BertTokenizer,
     BertForSequenceClassification,
+    DataCollatorWithPadding,
     Trainer,
     TrainingArguments,
     pipeline
 )
 from sklearn.model_selection import train_test_split
 from transformers.trainer_callback import TrainerCallback
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.pipeline import Pipeline
 import seaborn as sns
 import torch
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 
 plt.rcParams['font.family'] = 'Malgun Gothic'
 
+# 토큰화 캐시 형식이 바뀌면 올려서 이전 캐시를 무효화
+CACHE_FORMAT_VERSION = 1
+QUANTIZED_DIR = "./trained_intent_model_int8"
+STUDENT_FILE = "student.joblib"
 
-# ▶ CSV 불러오기
-data_path = "intent_dataset_varied_1000.csv"
-df = pd.read_csv(data_path)
-
-# ▶ 라벨 매핑
-label_list = sorted(df["label"].unique().tolist())
-label_map = {label: i for i, label in enumerate(label_list)}
-inv_label_map = {i: label for label, i in label_map.items()}
-df["labels"] = df["label"].map(label_map)
-
-# ▶ 훈련/검증 나누기
-train_df, val_df = train_test_split(df, test_size=0.2, stratify=df["labels"], random_state=42)
-ds = DatasetDict({
-    "train": Dataset.from_pandas(train_df[["sentence", "labels"]]),
-    "validation": Dataset.from_pandas(val_df[["sentence", "labels"]])
-})
-
-# ▶ 토크나이저 및 모델
-tokenizer = BertTokenizer.from_pretrained("bert-base-multilingual-cased")
-model = BertForSequenceClassification.from_pretrained(
-    "bert-base-multilingual-cased",
-    num_labels=len(label_list)
-)
 
-# ▶ 전처리
-def preprocess(example):
-    return tokenizer(example["sentence"], truncation=True, padding="max_length", max_length=64)
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="intent_dataset_varied_1000.csv")
+    parser.add_argument("--model-name", default="bert-base-multilingual-cased")
+    parser.add_argument("--output-dir", default="./trained_intent_model")
+    parser.add_argument("--epochs", type=float, default=10)
+    parser.add_argument("--batch-size", type=int, default=8, help="학습 배치 크기")
+    parser.add_argument("--eval-batch-size", type=int, default=64, help="평가 / 추론 배치 크기")
+    parser.add_argument("--learning-rate", type=float, default=2e-5)
+    parser.add_argument("--max-length", type=int, default=64, help="토큰 수 상한 (넘으면 자름)")
+    parser.add_argument("--eval-steps", type=int, default=100)
+    parser.add_argument("--cache-dir", default="./tokenized_cache", help="토큰화 결과 캐시 위치")
+    parser.add_argument("--no-cache", action="store_true", help="캐시를 쓰지 않고 매번 토큰화")
+    parser.add_argument("--pad-to-max-length", action="store_true",
+                        help="이전 방식: 모든 문장을 max_length 까지 패딩, 길이 묶음 없이 학습")
+    parser.add_argument("--legacy-eval", action="store_true",
+                        help="배치 평가와 함께 이전 방식(문장 하나씩 pipeline 호출)도 실행해 시간 비교")
+    parser.add_argument("--skip-quantize", action="store_true", help="int8 모델 내보내기 생략")
+    parser.add_argument("--timing-out", default="text_ml_timing.json", help="단계별 걸린 시간 JSON")
+    parser.add_argument("--distill", action="store_true",
+                        help="--output-dir 의 학습된 모델을 교사로 학생 모델만 학습 (BERT 학습 생략)")
+    parser.add_argument("--student-dir", default="./trained_intent_model_student")
+    parser.add_argument("--distill-alpha", type=float, default=0.5, help="정답 라벨 비중 (나머지는 교사 확률)")
+    parser.add_argument("--distill-temperature", type=float, default=2.0, help="교사 확률 완화 온도")
+    parser.add_argument("--student-c", type=float, default=10.0, help="로지스틱 회귀 규제 역수")
+    parser.add_argument("--report-out", default="distill_report.json")
+    return parser.parse_args()
 
-ds = ds.map(preprocess, batched=True)
 
-# ▶ 손실 기록용 콜백
-train_losses = []
-eval_losses = []
+# ▶ CSV 불러오기 + 라벨 매핑 + 훈련/검증 나누기
+def load_splits(data_path: str):
+    df = pd.read_csv(data_path)
+    label_list = sorted(df["label"].unique().tolist())
+    label_map = {label: i for i, label in enumerate(label_list)}
+    df["labels"] = df["label"].map(label_map)
+    train_df, val_df = train_test_split(df, test_size=0.2, stratify=df["labels"], random_state=42)
+    return label_list, train_df, val_df
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ▶ 토큰화 캐시 키: 데이터 내용 + 토크나이저 + 라이브러리 버전 + 전처리 설정이 모두 같을 때만 재사용
+def cache_key(args, tokenizer) -> str:
+    spec = {
+        "format": CACHE_FORMAT_VERSION,
+        "data": file_sha256(args.data),
+        "tokenizer": args.model_name,
+        "tokenizer_class": type(tokenizer).__name__,
+        "vocab_size": tokenizer.vocab_size,
+        "transformers": transformers.__version__,
+        "datasets": datasets.__version__,
+        "max_length": args.max_length,
+        "pad_to_max_length": args.pad_to_max_length,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
 
+# ▶ 전처리 (잘라내기만 하고 패딩은 배치를 만들 때)
+def tokenize_splits(train_df, val_df, tokenizer, args) -> DatasetDict:
+    ds = DatasetDict({
+        "train": Dataset.from_pandas(train_df[["sentence", "labels"]], preserve_index=False),
+        "validation": Dataset.from_pandas(val_df[["sentence", "labels"]], preserve_index=False)
+    })
+
+    def preprocess(batch):
+        if args.pad_to_max_length:
+            enc = tokenizer(batch["sentence"], truncation=True, padding="max_length", max_length=args.max_length)
+        else:
+            enc = tokenizer(batch["sentence"], truncation=True, max_length=args.max_length)
+        enc["length"] = [len(ids) for ids in enc["input_ids"]]
+        return enc
+
+    return ds.map(preprocess, batched=True, remove_columns=["sentence"])
+
+
+def load_tokenized(train_df, val_df, tokenizer, args) -> DatasetDict:
+    if args.no_cache:
+        return tokenize_splits(train_df, val_df, tokenizer, args)
+    path = os.path.join(args.cache_dir, cache_key(args, tokenizer))
+    if os.path.isdir(path):
+        print(f"📦 토큰화 캐시 사용: {path}")
+        return load_from_disk(path)
+    ds = tokenize_splits(train_df, val_df, tokenizer, args)
+    ds.save_to_disk(path)
+    print(f"📦 토큰화 캐시 저장: {path}")
+    return ds
+
+
+# ▶ 손실 기록용 콜백
 class LossCallback(TrainerCallback):
+    def __init__(self):
+        self.train_losses = []
+        self.eval_losses = []
+
     def on_log(self, args, state, control, logs=None, **kwargs):
         if "loss" in logs:
-            train_losses.append(logs["loss"])
+            self.train_losses.append(logs["loss"])
         if "eval_loss" in logs:
-            eval_losses.append(logs["eval_loss"])
-
-# ▶ 하이퍼파라미터 수정 + GPU 자동 사용
-training_args = TrainingArguments(
-    output_dir="./trained_intent_model",
-    per_device_train_batch_size=8,
-    num_train_epochs=10,
-    learning_rate=2e-5,
-    logging_steps=10,
-    save_strategy="steps",
-    evaluation_strategy="steps",
-    eval_steps=100,
-    load_best_model_at_end=True,
-    metric_for_best_model="eval_loss"
-)
+            self.eval_losses.append(logs["eval_loss"])
+
+
+# ▶ 배치 추론: 길이순으로 정렬해 배치마다 가장 긴 문장까지만 패딩 → 원래 순서로 되돌림
+def predict_logits(model, tokenizer, texts: list[str], batch_size: int, max_length: int) -> torch.Tensor:
+    model.eval()
+    encodings = tokenizer(texts, truncation=True, max_length=max_length)
+    features = [{k: encodings[k][i] for k in encodings} for i in range(len(texts))]
+    order = sorted(range(len(texts)), key=lambda i: len(features[i]["input_ids"]))
+    collator = DataCollatorWithPadding(tokenizer)
+    logits = torch.empty(len(texts), model.config.num_labels)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = collator([features[i] for i in idx]).to(model.device)
+            logits[idx] = model(**batch).logits.float().cpu()
+    return logits
+
+
+def predict(model, tokenizer, texts: list[str], batch_size: int, max_length: int) -> list[int]:
+    return predict_logits(model, tokenizer, texts, batch_size, max_length).argmax(-1).tolist()
+
+
+# ▶ 이전 방식: 문장 하나씩 pipeline 호출 (시간 비교용)
+def predict_legacy(model_dir: str, texts: list[str]) -> list[int]:
+    clf = pipeline("text-classification", model=model_dir, tokenizer=model_dir, top_k=1,
+                   device=0 if torch.cuda.is_available() else -1)
+    pred_labels = []
+    for text in texts:
+        pred = clf(text)
+        pred_labels.append(int(pred[0][0]["label"].split("_")[-1]))
+    return pred_labels
+
+
+def plot_losses(loss_callback: LossCallback):
+    plt.figure()
+    plt.plot(loss_callback.train_losses, label="Train Loss")
+    plt.plot(loss_callback.eval_losses, label="Validation Loss")
+    plt.xlabel("Logging Steps")
+    plt.ylabel("Loss")
+    plt.legend()
+    plt.title("Training & Validation Loss")
+    plt.grid()
+    plt.tight_layout()
+    plt.savefig("training_loss_plot_updated.png")
+
+
+def plot_confusion_matrix(true_labels, pred_labels, label_list):
+    cm = confusion_matrix(true_labels, pred_labels)
+    plt.figure(figsize=(6, 5))
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=label_list, yticklabels=label_list)
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+    plt.title("Confusion Matrix")
+    plt.tight_layout()
+    plt.savefig("confusion_matrix_updated.png")
+
+
+# ▶ int8 동적 양자화 모델 내보내기 (CPU 서빙용)
+#   trained_intent_model_int8/ 에 config + 토크나이저 + quantized_model.pt(state_dict) 저장
+#   → 백엔드에서 INTENT_BACKEND=int8 로 불러옴
+def export_int8(model_dir: str, tokenizer, val_texts, true_labels, pred_labels, args):
+    fp32_model = BertForSequenceClassification.from_pretrained(model_dir).eval()
+    quantized_model = torch.quantization.quantize_dynamic(fp32_model, {torch.nn.Linear}, dtype=torch.qint8)
+    os.makedirs(QUANTIZED_DIR, exist_ok=True)
+    quantized_model.config.save_pretrained(QUANTIZED_DIR)
+    tokenizer.save_pretrained(QUANTIZED_DIR)
+    torch.save(quantized_model.state_dict(), os.path.join(QUANTIZED_DIR, "quantized_model.pt"))
+
+    # ▶ 검증셋 정확도 비교 (fp32 vs int8)
+    q_pred_labels = predict(quantized_model, tokenizer, val_texts, args.eval_batch_size, args.max_length)
+    fp32_acc = accuracy_score(true_labels, pred_labels)
+    int8_acc = accuracy_score(true_labels, q_pred_labels)
+    agreement = accuracy_score(pred_labels, q_pred_labels)
+    print("\n📦 int8 양자화 모델 검증:")
+    print(f"  fp32 정확도: {fp32_acc:.4f}")
+    print(f"  int8 정확도: {int8_acc:.4f}")
+    print(f"  예측 일치율: {agreement:.4f}")
+    if fp32_acc - int8_acc > 0.01:
+        print("⚠️ int8 모델 정확도가 1%p 이상 떨어졌습니다. 서빙 전에 확인하세요.")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def dir_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / (1024 * 1024)
+
+
+def latency_ms(predict_one, texts: list[str]) -> dict:
+    predict_one(texts[0])  # 워밍업
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        predict_one(text)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+    }
+
+
+# ▶ 학생 모델 학습
+#   LogisticRegression 은 확률 분포를 라벨로 받지 못하므로, 문장마다 클래스 수만큼 행을 만들고
+#   alpha * 정답(one-hot) + (1 - alpha) * 교사 확률 을 sample_weight 로 줌 (soft label 교차 엔트로피와 같은 목적 함수)
+def fit_student(texts: list[str], labels: list[int], teacher_probs: np.ndarray, args) -> Pipeline:
+    vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(1, 4), sublinear_tf=True)
+    features = vectorizer.fit_transform(texts)
+
+    num_labels = teacher_probs.shape[1]
+    one_hot = np.eye(num_labels)[labels]
+    weights = args.distill_alpha * one_hot + (1 - args.distill_alpha) * teacher_probs
+    rows, classes = np.nonzero(weights > 1e-4)
+    classifier = LogisticRegression(C=args.student_c, max_iter=2000)
+    classifier.fit(features[rows], classes, sample_weight=weights[rows, classes])
+    return Pipeline([("tfidf", vectorizer), ("clf", classifier)])
+
+
+# ▶ 학생 확률 보정: 검증셋 음의 로그우도가 가장 작은 온도 T (softmax(decision / T))
+def fit_temperature(decision: np.ndarray, labels: list[int]) -> tuple[float, float, float]:
+    def nll(t):
+        z = decision / t
+        z = z - z.max(axis=1, keepdims=True)
+        log_probs = z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+        return float(-log_probs[np.arange(len(labels)), labels].mean())
+
+    temperatures = np.exp(np.linspace(np.log(0.05), np.log(20), 200))
+    best = min(temperatures, key=nll)
+    return float(best), nll(1.0), nll(best)
+
+
+def distill(args):
+    label_list, train_df, val_df = load_splits(args.data)
+    train_texts, val_texts = train_df["sentence"].tolist(), val_df["sentence"].tolist()
+    train_labels, true_labels = train_df["labels"].tolist(), val_df["labels"].tolist()
+
+    # ▶ 교사 (학습된 BERT) 확률
+    rss_before = rss_mb()
+    tokenizer = BertTokenizer.from_pretrained(args.output_dir)
+    teacher = BertForSequenceClassification.from_pretrained(args.output_dir).eval()
+    teacher_rss = rss_mb() - rss_before
+    start = time.perf_counter()
+    teacher_logits = predict_logits(teacher, tokenizer, train_texts, args.eval_batch_size, args.max_length)
+    teacher_probs = torch.softmax(teacher_logits / args.distill_temperature, dim=-1).numpy()
+    teacher_label_s = time.perf_counter() - start
+
+    # ▶ 학생 학습 + 저장
+    start = time.perf_counter()
+    student = fit_student(train_texts, train_labels, teacher_probs, args)
+    student_train_s = time.perf_counter() - start
+    temperature, nll_before, nll_after = fit_temperature(student.decision_function(val_texts), true_labels)
+    print(f"🌡 학생 확률 보정: T={temperature:.3f}, 검증 NLL {nll_before:.4f} → {nll_after:.4f}")
+    os.makedirs(args.student_dir, exist_ok=True)
+    joblib.dump({"model": student, "labels": label_list, "teacher": args.output_dir, "temperature": temperature},
+                os.path.join(args.student_dir, STUDENT_FILE))
+
+    # ▶ 검증셋 비교 (학생은 저장한 파일을 다시 읽어 서빙과 같은 조건으로)
+    teacher_preds = predict(teacher, tokenizer, val_texts, args.eval_batch_size, args.max_length)
+    rss_before = rss_mb()
+    student = joblib.load(os.path.join(args.student_dir, STUDENT_FILE))["model"]
+    student_rss = rss_mb() - rss_before
+    student_preds = student.predict(val_texts).tolist()
+
+    print("\n📊 Student Classification Report:")
+    print(classification_report(true_labels, student_preds, target_names=label_list))
+
+    # 서빙과 같이 문장 하나씩 추론 (CPU)
+    teacher_clf = pipeline("text-classification", model=teacher, tokenizer=tokenizer, top_k=1, device=-1)
+    rows = [
+        {
+            "model": "teacher (bert fp32)",
+            "accuracy": round(accuracy_score(true_labels, teacher_preds), 4),
+            "teacher_agreement": 1.0,
+            **latency_ms(lambda t: teacher_clf(t), val_texts),
+            "parameters": sum(p.numel() for p in teacher.parameters()),
+            "disk_mb": round(dir_size_mb(args.output_dir), 1),
+            "load_rss_mb": round(teacher_rss, 1),
+        },
+        {
+            "model": "student (char n-gram tf-idf + logreg)",
+            "accuracy": round(accuracy_score(true_labels, student_preds), 4),
+            "teacher_agreement": round(accuracy_score(teacher_preds, student_preds), 4),
+            **latency_ms(lambda t: student.predict_proba([t]), val_texts),
+            "parameters": int(student.named_steps["clf"].coef_.size + student.named_steps["clf"].intercept_.size),
+            "disk_mb": round(dir_size_mb(args.student_dir), 1),
+            "load_rss_mb": round(student_rss, 1),
+        },
+    ]
+
+    print("\n📦 서빙 모델 비교 (검증셋, CPU, 문장 단위):")
+    for row in rows:
+        print("  " + ", ".join(f"{k}: {v}" for k, v in row.items()))
+    with open(args.report_out, "w", encoding="utf-8") as f:
+        json.dump({
+            "results": rows,
+            "teacher_label_s": round(teacher_label_s, 3),
+            "student_train_s": round(student_train_s, 3),
+            "student_temperature": round(temperature, 4),
+            "args": vars(args),
+            "torch_threads": torch.get_num_threads(),
+            "platform": platform.platform(),
+        }, f, ensure_ascii=False, indent=2)
+    print(f"📝 리포트 저장: {args.report_out}")
+
+
+def main():
+    args = parse_args()
+    if args.distill:
+        distill(args)
+        return
+    timings = {}
+
+    label_list, train_df, val_df = load_splits(args.data)
+
+    # ▶ 토크나이저 및 모델
+    tokenizer = BertTokenizer.from_pretrained(args.model_name)
+    model = BertForSequenceClassification.from_pretrained(args.model_name, num_labels=len(label_list))
+
+    start = time.perf_counter()
+    ds = load_tokenized(train_df, val_df, tokenizer, args)
+    timings["tokenize_s"] = time.perf_counter() - start
+
+    # ▶ 하이퍼파라미터 + GPU 자동 사용
+    #   group_by_length: 비슷한 길이끼리 배치 → 배치 안 패딩 최소화 (length 열을 미리 계산해 둠)
+    loss_callback = LossCallback()
+    training_args = TrainingArguments(
+        output_dir=args.output_dir,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.eval_batch_size,
+        num_train_epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        logging_steps=10,
+        save_strategy="steps",
+        eval_strategy="steps",
+        eval_steps=args.eval_steps,
+        save_steps=args.eval_steps,
+        load_best_model_at_end=True,
+        metric_for_best_model="eval_loss",
+        group_by_length=not args.pad_to_max_length,
+        length_column_name="length",
+    )
+
+    # ▶ Trainer 설정 (배치마다 가장 긴 문장까지만 패딩)
+    trainer = Trainer(
+        model=model,
+        args=training_args,
+        train_dataset=ds["train"],
+        eval_dataset=ds["validation"],
+        data_collator=DataCollatorWithPadding(tokenizer),
+        callbacks=[loss_callback],
+    )
+
+    # ▶ 학습 시작
+    start = time.perf_counter()
+    trainer.train()
+    timings["train_s"] = time.perf_counter() - start
+
+    # ▶ 모델 저장 (load_best_model_at_end → 검증 손실이 가장 낮았던 체크포인트)
+    trainer.model.save_pretrained(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+
+    # ▶ 손실 시각화
+    plot_losses(loss_callback)
+
+    # ▶ 전체 검증셋에 대해 배치 예측
+    val_texts = val_df["sentence"].tolist()
+    true_labels = val_df["labels"].tolist()
+    start = time.perf_counter()
+    pred_labels = predict(trainer.model, tokenizer, val_texts, args.eval_batch_size, args.max_length)
+    timings["eval_s"] = time.perf_counter() - start
+
+    if args.legacy_eval:
+        start = time.perf_counter()
+        legacy_labels = predict_legacy(args.output_dir, val_texts)
+        timings["eval_legacy_s"] = time.perf_counter() - start
+        print(f"\n⏱ 평가 시간: 문장 단위 {timings['eval_legacy_s']:.2f}s → 배치 {timings['eval_s']:.2f}s "
+              f"(x{timings['eval_legacy_s'] / timings['eval_s']:.1f}), "
+              f"예측 일치율 {accuracy_score(legacy_labels, pred_labels):.4f}")
+
+    # ▶ 분류 리포트 출력
+    print("\n📊 Classification Report:")
+    print(classification_report(true_labels, pred_labels, target_names=label_list))
+
+    # ▶ 혼동 행렬 시각화
+    plot_confusion_matrix(true_labels, pred_labels, label_list)
+
+    if not args.skip_quantize:
+        export_int8(args.output_dir, tokenizer, val_texts, true_labels, pred_labels, args)
+
+    # ▶ 걸린 시간 기록 (--pad-to-max-length 로 한 번, 기본 설정으로 한 번 실행해 비교)
+    print("\n⏱ " + ", ".join(f"{k}: {v:.2f}" for k, v in timings.items()))
+    with open(args.timing_out, "w", encoding="utf-8") as f:
+        json.dump({
+            "timings": {k: round(v, 3) for k, v in timings.items()},
+            "args": vars(args),
+            "device": "cuda" if torch.cuda.is_available() else "cpu",
+            "torch_threads": torch.get_num_threads(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "platform": platform.platform(),
+        }, f, ensure_ascii=False, indent=2)
+    print(f"📝 시간 기록 저장: {args.timing_out}")
 
-# ▶ Trainer 설정
-trainer = Trainer(
-    model=model,
-    args=training_args,
-    train_dataset=ds["train"],
-    eval_dataset=ds["validation"],
-    callbacks=[LossCallback()],
-)
 
-# ▶ 학습 시작
-trainer.train()
-
-# ▶ 모델 저장
-model.save_pretrained("./trained_intent_model")
-tokenizer.save_pretrained("./trained_intent_model")
-
-# ▶ 손실 시각화
-plt.plot(train_losses, label="Train Loss")
-plt.plot(eval_losses, label="Validation Loss")
-plt.xlabel("Logging Steps")
-plt.ylabel("Loss")
-plt.legend()
-plt.title("Training & Validation Loss")
-plt.grid()
-plt.tight_layout()
-plt.savefig("training_loss_plot_updated.png")
-
-# ▶ 분류기 생성 및 전체 예측
-clf = pipeline("text-classification", model="./trained_intent_model", tokenizer="./trained_intent_model", top_k=1, device=0 if torch.cuda.is_available() else -1)
-
-# ▶ 전체 검증셋에 대해 예측
-val_texts = val_df["sentence"].tolist()
-true_labels = val_df["labels"].tolist()
-pred_labels = []
-
-for text in val_texts:
-    pred = clf(text)
-    label_num = int(pred[0][0]["label"].split("_")[-1])
-    pred_labels.append(label_num)
-
-# ▶ 분류 리포트 출력
-print("\n📊 Classification Report:")
-print(classification_report(true_labels, pred_labels, target_names=label_list))
-
-# ▶ 혼동 행렬 시각화
-cm = confusion_matrix(true_labels, pred_labels)
-plt.figure(figsize=(6, 5))
-sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=label_list, yticklabels=label_list)
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-plt.title("Confusion Matrix")
-plt.tight_layout()
-plt.savefig("confusion_matrix_updated.png")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# /chat 부하 벤치마크: 가짜 OpenAI 서버 + SQLite 로 워커 1개가 동시에 몇 개의 요청을 붙잡는지 측정
+#
+#   cd backend
+#   python -m bench.bench_chat_async --app main:app --concurrency 50 200 --requests 1000
+#
+import argparse
+import asyncio
+import os
+import tempfile
+
+import httpx
+
+from bench.common import run_load, sqlite_env, start_server, wait_ready
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=int, default=800)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="앱 서버에 넘길 추가 환경 변수 (예: DB_WRITE_BEHIND=0)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bench.db")
+    fake = start_server("bench.fake_openai:app", args.fake_port,
+                        {"FAKE_OPENAI_LATENCY_MS": str(args.latency_ms)}, workdir)
+    app = start_server(args.app, args.app_port, {
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        **sqlite_env(db_path),
+        **dict(kv.split("=", 1) for kv in args.env),
+    }, workdir)
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    payload = {"user_input": "안녕?", "system_prompt": "너는 나의 친구야."}
+    try:
+        await wait_ready(fake, f"{fake_url}/stats")
+        await wait_ready(app, f"{app_url}/docs")
+        async with httpx.AsyncClient() as c:
+            for concurrency in args.concurrency:
+                await c.post(f"{fake_url}/stats/reset")
+                result = await run_load(
+                    lambda client, i: client.post(f"{app_url}/chat", json=payload), concurrency, args.requests,
+                )
+                result["peak_in_flight"] = (await c.get(f"{fake_url}/stats")).json()["peak_in_flight"]
+                print(result)
+    finally:
+        app.terminate()
+        fake.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
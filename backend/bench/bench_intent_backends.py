@@ -0,0 +1,85 @@
+# 의도 분류 추론 백엔드(eager fp32 / int8 / student) 비교: 로드 시간, RSS, 문장당 지연
+# 백엔드마다 별도 프로세스에서 측정해서 RSS 가 서로 섞이지 않도록 함
+#
+#   cd backend
+#   python -m bench.bench_intent_backends --backends eager int8 student --samples 200
+#
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "ML", "intent_dataset_varied_1000.csv")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def measure(backend: str, samples: int) -> dict:
+    os.environ["INTENT_BACKEND"] = backend
+    os.environ["INTENT_BATCHING"] = "0"
+    os.environ["INTENT_CACHE_SIZE"] = "0"
+    if backend != "student" and importlib.util.find_spec("torch") is not None:
+        # torch import 비용은 로드 시간에서 제외 (미리 import 만 해 둠)
+        importlib.import_module("torch")
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    from text_embed_9 import TEXT_Embed
+    embedder = TEXT_Embed()
+    load_s = time.perf_counter() - start
+    if embedder.clf is None:
+        return {"backend": backend, "error": "load failed"}
+
+    texts = pd.read_csv(DATA_PATH)["sentence"].tolist()[:samples]
+    embedder.classify_intent(texts[0])  # warm-up
+    latencies = []
+    for text in texts:
+        t = time.perf_counter()
+        embedder.classify_intent(text)
+        latencies.append(time.perf_counter() - t)
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "model_rss_mb": round(rss_mb() - rss_before, 1),
+        "total_rss_mb": round(rss_mb(), 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["eager", "int8", "student"])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.samples)))
+        return
+
+    for backend in args.backends:
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.bench_intent_backends",
+             "--worker", backend, "--samples", str(args.samples)],
+            capture_output=True, text=True,
+        )
+        lines = out.stdout.strip().splitlines()
+        print(lines[-1] if lines else {"backend": backend, "error": out.stderr.strip()[-300:]})
+
+
+if __name__ == "__main__":
+    main()
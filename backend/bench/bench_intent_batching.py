@@ -0,0 +1,69 @@
+# 의도 분류기 처리량 vs p99 지연 비교: 요청별 추론(batch=1) vs 마이크로 배칭
+#
+#   cd backend
+#   python -m bench.bench_intent_batching --concurrency 1 8 32 --max-wait-ms 2 5 10 --max-batch 16
+#
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+os.environ.setdefault("INTENT_BATCHING", "0")
+os.environ.setdefault("INTENT_CACHE_SIZE", "0")  # 같은 문장 반복이 캐시 적중으로 빠지지 않게
+
+from intent_batcher import Intent_Batcher
+from text_embed_9 import TEXT_Embed
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "ML", "intent_dataset_varied_1000.csv")
+
+
+def run(call, texts: list[str], concurrency: int) -> dict:
+    latencies = []
+
+    def one(text):
+        start = time.perf_counter()
+        call(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, texts))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "throughput": round(len(texts) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[2, 5, 10])
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[16])
+    parser.add_argument("--samples", type=int, default=400)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(DATA_PATH)["sentence"].tolist()[: args.samples]
+    embedder = TEXT_Embed()
+    if embedder.clf is None:
+        raise SystemExit("❌ ./trained_intent_model 을 불러오지 못했습니다.")
+
+    for concurrency in args.concurrency:
+        print("per-call", run(embedder.classify_intent, texts, concurrency))
+        for max_batch in args.max_batch:
+            for max_wait in args.max_wait_ms:
+                batcher = Intent_Batcher(embedder.predict_batch, max_batch, max_wait)
+                result = run(lambda t: batcher.submit(t).result(), texts, concurrency)
+                batcher.close()
+                print(f"batched(max_batch={max_batch}, max_wait_ms={max_wait})", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# 의도 분류 캐스케이드 기준값 조정: 라벨이 있는 CSV 로 기준값별 1단계 적중률, 단계별 정확도, 예상 평균 지연 계산
+#
+#   cd backend
+#   python -m bench.bench_intent_cascade --slow-backend int8 --thresholds 0.5 0.7 0.8 0.9 0.95 0.99
+#
+#   --split val (기본) : ML/Text_ML.py 와 같은 방식으로 나눈 검증셋 (학생 / BERT 가 학습하지 않은 문장)
+#   --split all        : CSV 전체
+#   문장마다 두 단계를 모두 한 번씩 돌려 두고, 기준값별로 "1단계 확률 >= 기준값 이면 1단계 답" 을 적용해 집계
+#   예상 평균 지연 = 1단계 평균 + 넘긴 비율 × 2단계 평균 (문장 하나씩 추론)
+#
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from bench.common import save_results
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "ML", "intent_dataset_varied_1000.csv")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slow-backend", default="eager", help="2단계 INTENT_BACKEND (eager / int8 / remote)")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99])
+    parser.add_argument("--split", choices=["val", "all"], default="val")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본 bench_results/)")
+    return parser.parse_args()
+
+
+def load_sentences(split: str) -> tuple[list[str], list[int]]:
+    df = pd.read_csv(DATA_PATH)
+    label_list = sorted(df["label"].unique().tolist())
+    df["labels"] = df["label"].map({label: i for i, label in enumerate(label_list)})
+    if split == "val":
+        from sklearn.model_selection import train_test_split
+
+        _, df = train_test_split(df, test_size=0.2, stratify=df["labels"], random_state=42)
+    return df["sentence"].tolist(), df["labels"].tolist()
+
+
+def run_stage(clf, texts: list[str]) -> tuple[list[int], list[float], float]:
+    """문장 하나씩 추론 → (예측 라벨 번호, 확률, 평균 지연 ms)."""
+    clf(texts[0])  # 워밍업
+    labels, scores = [], []
+    start = time.perf_counter()
+    for text in texts:
+        out = clf(text)[0][0]
+        labels.append(int(out["label"].split("_")[-1]))
+        scores.append(out.get("score", 1.0))
+    return labels, scores, (time.perf_counter() - start) / len(texts) * 1000
+
+
+def accuracy(pairs) -> float | None:
+    pairs = list(pairs)
+    return round(sum(p == t for p, t in pairs) / len(pairs), 4) if pairs else None
+
+
+def main():
+    args = parse_args()
+    os.environ["INTENT_CASCADE"] = "0"
+    from text_embed_9 import INTENT_BACKENDS, load_student_pipeline
+
+    texts, truth = load_sentences(args.split)
+    fast_labels, fast_scores, fast_ms = run_stage(load_student_pipeline(), texts)
+
+    try:
+        slow_labels, _, slow_ms = run_stage(INTENT_BACKENDS[args.slow_backend](), texts)
+    except Exception as e:
+        print(f"⚠️ 2단계 모델을 불러오지 못해 1단계만 집계합니다: {e}")
+        slow_labels, slow_ms = None, None
+
+    print(f"1단계(student) 평균 {fast_ms:.3f}ms, 정확도 {accuracy(zip(fast_labels, truth))}")
+    if slow_labels is not None:
+        print(f"2단계({args.slow_backend}) 평균 {slow_ms:.3f}ms, 정확도 {accuracy(zip(slow_labels, truth))}")
+
+    results = []
+    for threshold in args.thresholds:
+        hits = [i for i, score in enumerate(fast_scores) if score >= threshold]
+        hit_rate = len(hits) / len(texts)
+        row = {
+            "threshold": threshold,
+            "fast_hit_rate": round(hit_rate, 4),
+            "fast_accuracy": accuracy((fast_labels[i], truth[i]) for i in hits),
+        }
+        if slow_labels is not None:
+            hit_set = set(hits)
+            escalated = [i for i in range(len(texts)) if i not in hit_set]
+            cascade = [fast_labels[i] if i in hit_set else slow_labels[i] for i in range(len(texts))]
+            row.update({
+                "slow_accuracy": accuracy((slow_labels[i], truth[i]) for i in escalated),
+                "cascade_accuracy": accuracy(zip(cascade, truth)),
+                "est_mean_ms": round(fast_ms + (1 - hit_rate) * slow_ms, 3),
+            })
+        print(row)
+        results.append(row)
+    save_results("intent_cascade", args, results, args.out)
+
+
+if __name__ == "__main__":
+    main()
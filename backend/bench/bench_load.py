@@ -0,0 +1,98 @@
+# 부하 드라이버: 가짜 OpenAI 서버 + SQLite 로 /chat, /history 의 RPS 와 p50/p95/p99 를 측정하고 JSON 으로 저장
+#
+#   cd backend
+#   python -m bench.bench_load --app main:app --concurrency 10 50 --requests 500 --out before.json
+#   (코드 변경 후) python -m bench.bench_load --app main:app --concurrency 10 50 --requests 500 --out after.json
+#   python -m bench.compare before.json after.json
+#
+#   --unique-inputs (기본) 는 요청마다 다른 입력을 보내 응답 캐시 / 중복 요청 합치기를 피함.
+#   --no-unique-inputs 로 같은 입력을 반복하면 캐시 적중 시의 처리량을 잼.
+#   --seed-rows 는 /history 측정 전에 채워 둘 메시지 수
+#
+import argparse
+import asyncio
+import os
+import tempfile
+
+import httpx
+
+from bench.common import run_load, save_results, sqlite_env, start_server, use_sqlite, wait_ready
+
+
+def seed_history(db_path: str, rows: int):
+    """앱을 띄우기 전에 SQLite 파일에 메시지를 채움 (스키마 생성 포함)."""
+    use_sqlite(db_path)
+    from sqlalchemy import insert
+
+    import text_sql_9
+    from text_sql_9 import ChatMessage, Text_SQL
+
+    text_sql_9.engine.echo = False
+    Text_SQL().init()
+    with text_sql_9.SessionLocal() as session:
+        for start in range(0, rows, 10000):
+            session.execute(insert(ChatMessage), [
+                {"speaker": "user" if i % 2 == 0 else "assistant", "content": f"시드 메시지 {i}"}
+                for i in range(start, min(rows, start + 10000))
+            ])
+        session.commit()
+    text_sql_9.engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--endpoints", nargs="+", choices=["chat", "history"], default=["chat", "history"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=int, default=800, help="가짜 OpenAI 응답 지연")
+    parser.add_argument("--unique-inputs", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--history-limit", type=int, default=100)
+    parser.add_argument("--seed-rows", type=int, default=10000)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="앱 서버에 넘길 추가 환경 변수 (예: DB_WRITE_BEHIND=0)")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본 bench_results/)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bench.db")
+    if args.seed_rows:
+        seed_history(db_path, args.seed_rows)
+
+    fake = start_server("bench.fake_openai:app", args.fake_port,
+                        {"FAKE_OPENAI_LATENCY_MS": str(args.latency_ms)}, workdir)
+    app = start_server(args.app, args.app_port, {
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        **sqlite_env(db_path),
+        **dict(kv.split("=", 1) for kv in args.env),
+    }, workdir)
+    app_url = f"http://127.0.0.1:{args.app_port}"
+
+    def send_chat(client: httpx.AsyncClient, i: int):
+        user_input = f"안녕? 오늘 {i}번째 질문이야." if args.unique_inputs else "안녕?"
+        return client.post(f"{app_url}/chat", json={"user_input": user_input, "system_prompt": "너는 나의 친구야."})
+
+    def send_history(client: httpx.AsyncClient, i: int):
+        return client.get(f"{app_url}/history", params={"limit": args.history_limit, "order": "desc"})
+
+    senders = {"chat": send_chat, "history": send_history}
+    results = []
+    try:
+        await wait_ready(fake, f"http://127.0.0.1:{args.fake_port}/stats")
+        await wait_ready(app, f"{app_url}/docs")
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                result = {"endpoint": endpoint, **await run_load(senders[endpoint], concurrency, args.requests)}
+                print(result)
+                results.append(result)
+    finally:
+        app.terminate()
+        fake.terminate()
+    save_results("load", args, results, args.out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
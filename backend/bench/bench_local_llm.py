@@ -0,0 +1,88 @@
+# 로컬 gpt4all 엔진의 지연·처리량: CPU 한 대가 대체 경로로 얼마나 받아낼 수 있는지 측정
+#
+#   cd backend
+#   python -m bench.bench_local_llm --concurrency 1 2 4 --requests 8 --max-tokens 128
+#
+#   LOCAL_LLM_MODEL / LOCAL_LLM_MODEL_DIR / LOCAL_LLM_THREADS 로 모델과 스레드 수를 지정
+#   (--engine-concurrency 는 동시에 생성하는 요청 수, 나머지는 대기열에서 기다림)
+#
+import argparse
+import asyncio
+import statistics
+import time
+
+from llm_engine import GPT4All_Engine
+
+PROMPTS = [
+    "안녕하세요! 오늘 기분이 좀 우울해요.",
+    "점심 메뉴 좀 추천해줘.",
+    "고마워, 덕분에 많이 도움이 됐어.",
+    "내일 시험인데 너무 긴장돼.",
+    "잘 자, 내일 또 얘기하자.",
+]
+SYSTEM_PROMPT = "너는 친절한 한국어 대화 상대야. 두세 문장으로 짧게 답해줘."
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def one(engine: GPT4All_Engine, prompt: str, max_tokens: int) -> dict:
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    async for _ in engine.stream(messages, temperature=0.7, max_tokens=max_tokens):
+        if first is None:
+            first = time.perf_counter() - start
+        tokens += 1
+    return {"latency": time.perf_counter() - start, "ttft": first or 0.0, "tokens": tokens}
+
+
+async def run(engine: GPT4All_Engine, concurrency: int, requests: int, max_tokens: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            return await one(engine, PROMPTS[i % len(PROMPTS)], max_tokens)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limited(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [r["latency"] for r in results]
+    ttfts = [r["ttft"] for r in results]
+    tokens = sum(r["tokens"] for r in results)
+    return {
+        "concurrency": concurrency,
+        "req_per_s": round(requests / elapsed, 3),
+        "tokens_per_s": round(tokens / elapsed, 1),
+        "ttft_p50_ms": round(statistics.median(ttfts) * 1000, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+    }
+
+
+async def main_async(args):
+    start = time.perf_counter()
+    engine = GPT4All_Engine(concurrency=args.engine_concurrency)
+    print(f"모델 로드: {time.perf_counter() - start:.1f}s")
+
+    await one(engine, PROMPTS[0], 8)  # 워밍업
+    for concurrency in args.concurrency:
+        print(await run(engine, concurrency, args.requests, args.max_tokens))
+    engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--engine-concurrency", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# /verify 로그인 처리량 벤치마크: 비밀번호 확인(해시 계산) vs 발급받은 토큰 확인
+#
+#   cd backend
+#   python -m bench.bench_login --concurrency 1 8 32 --requests 300 --env BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=4
+#
+#   해시 계산 중에도 이벤트 루프가 막히지 않는지 보려고, 부하와 동시에 /healthz 를 계속 호출해 지연(healthz_p99_ms)을 같이 기록
+#
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from bench.common import latency_summary, run_load, save_results, sqlite_env, start_server, wait_ready
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="앱 서버에 넘길 추가 환경 변수 (예: PASSWORD_HASHER=argon2)")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본 bench_results/)")
+    return parser.parse_args()
+
+
+async def probe_healthz(url: str, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    async with httpx.AsyncClient() as c:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await c.get(url)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+    return latencies
+
+
+async def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    app = start_server(args.app, args.app_port, {
+        "OPENAI_API_KEY": "sk-bench",
+        **sqlite_env(os.path.join(workdir, "bench.db")),
+        **dict(kv.split("=", 1) for kv in args.env),
+    }, workdir)
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    users = [(f"user{i}", f"password-{i}") for i in range(args.users)]
+    results = []
+    try:
+        await wait_ready(app, f"{app_url}/healthz")
+        async with httpx.AsyncClient(timeout=300) as c:
+            for username, password in users:
+                r = await c.post(f"{app_url}/register", json={"username": username, "password": password})
+                r.raise_for_status()
+            tokens = []
+            for username, password in users:
+                r = await c.post(f"{app_url}/verify", json={"username": username, "password": password})
+                tokens.append(r.json()["token"])
+
+        def by_password(client, i):
+            username, password = users[i % len(users)]
+            return client.post(f"{app_url}/verify", json={"username": username, "password": password})
+
+        def by_token(client, i):
+            username, _ = users[i % len(users)]
+            return client.post(f"{app_url}/verify", json={"username": username, "token": tokens[i % len(users)]})
+
+        for mode, send in (("password", by_password), ("token", by_token)):
+            for concurrency in args.concurrency:
+                stop = asyncio.Event()
+                probe = asyncio.create_task(probe_healthz(f"{app_url}/healthz", stop))
+                result = await run_load(send, concurrency, args.requests)
+                stop.set()
+                healthz = latency_summary(await probe)
+                result = {"mode": mode, **result, "healthz_p99_ms": healthz["p99_ms"]}
+                print(result)
+                results.append(result)
+    finally:
+        app.terminate()
+    save_results("login", args, results, args.out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+# 마이크로 벤치마크: TEXT_Embed.classify_intent, Text_SQL / Async_Text_SQL 의 save_message, get_all_messages
+#
+#   cd backend
+#   python -m bench.bench_micro --ops 1000 --history-rows 1000 10000
+#   python -m bench.bench_micro --db file --skip-classify --out before.json
+#
+#   --db memory : SQLite 인메모리 (기본, 디스크 I/O 제외한 ORM/드라이버 비용)
+#   --db file   : 임시 디렉토리의 SQLite 파일 (커밋마다 fsync 포함)
+#   MySQL 로 재려면 DATABASE_URL / ASYNC_DATABASE_URL 을 직접 지정 (지정된 URL 이 우선)
+#
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from bench.common import latency_summary, save_results, use_sqlite
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "ML", "intent_dataset_varied_1000.csv")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=1000, help="save_message / classify_intent 호출 횟수")
+    parser.add_argument("--history-rows", type=int, nargs="+", default=[1000, 10000],
+                        help="get_all_messages 를 잴 때의 테이블 행 수")
+    parser.add_argument("--history-repeat", type=int, default=20)
+    parser.add_argument("--db", choices=["memory", "file"], default="memory")
+    parser.add_argument("--skip-classify", action="store_true")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본 bench_results/)")
+    return parser.parse_args()
+
+
+def result(name: str, latencies: list[float], **extra) -> dict:
+    total = sum(latencies)
+    return {
+        "name": name,
+        **extra,
+        "ops": len(latencies),
+        "ops_per_s": round(len(latencies) / total, 1) if total else None,
+        **latency_summary(latencies, digits=3),
+    }
+
+
+def measure(call, n: int) -> list[float]:
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def ameasure(call, n: int) -> list[float]:
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        await call(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_classify(ops: int) -> list[dict]:
+    import pandas as pd
+
+    os.environ.setdefault("INTENT_CACHE_SIZE", "0")  # 모델 추론 시간을 재도록 의도 캐시는 끔
+    from text_embed_9 import TEXT_Embed
+
+    embedder = TEXT_Embed()
+    if embedder.clf is None:
+        return [{"name": "classify_intent", "skipped": "의도 분류 모델을 불러오지 못함"}]
+    texts = pd.read_csv(DATA_PATH)["sentence"].tolist()
+    embedder.classify_intent(texts[0])  # 워밍업
+    latencies = measure(lambda i: embedder.classify_intent(texts[i % len(texts)]), ops)
+    embedder.close()
+    return [result("classify_intent", latencies)]
+
+
+def fill_rows(target: int, current: int) -> list[dict]:
+    return [
+        {"speaker": "user" if i % 2 == 0 else "assistant", "content": f"벤치마크 메시지 {i}"}
+        for i in range(current, target)
+    ]
+
+
+def bench_sync_db(ops: int, history_rows: list[int], repeat: int) -> list[dict]:
+    from sqlalchemy import func, insert, select
+
+    import text_sql_9
+    from text_sql_9 import ChatMessage, Text_SQL
+
+    text_sql_9.engine.echo = False  # SQL 로그 출력 시간이 결과에 섞이지 않게
+    db = Text_SQL()
+    db.init()
+    results = [result("Text_SQL.save_message", measure(lambda i: db.save_message("user", f"안녕 {i}"), ops))]
+
+    for rows in history_rows:
+        with db.SessionLocal() as session:
+            current = session.scalar(select(func.count()).select_from(ChatMessage))
+            if rows > current:
+                session.execute(insert(ChatMessage), fill_rows(rows, current))
+                session.commit()
+        latencies = measure(lambda i: db.get_all_messages(), repeat)
+        results.append(result("Text_SQL.get_all_messages", latencies, rows=max(rows, current)))
+    return results
+
+
+async def bench_async_db(ops: int, history_rows: list[int], repeat: int) -> list[dict]:
+    from sqlalchemy import func, insert, select
+
+    from text_sql_9 import Async_Text_SQL, ChatMessage
+
+    results = []
+    for write_behind in (False, True):
+        adb = Async_Text_SQL(write_behind=write_behind)
+        await adb.init()
+        latencies = await ameasure(lambda i: adb.save_message("user", f"안녕 {i}"), ops)
+        results.append(result("Async_Text_SQL.save_message", latencies, write_behind=write_behind))
+        if write_behind:
+            await adb.writer.close()  # 남은 행을 모두 저장한 뒤 조회 측정
+
+    for rows in history_rows:
+        async with adb.SessionLocal() as session:
+            current = await session.scalar(select(func.count()).select_from(ChatMessage))
+            if rows > current:
+                await session.execute(insert(ChatMessage), fill_rows(rows, current))
+                await session.commit()
+        latencies = await ameasure(lambda i: adb.get_all_messages(), repeat)
+        results.append(result("Async_Text_SQL.get_all_messages", latencies, rows=max(rows, current)))
+    await adb.engine.dispose()
+    return results
+
+
+def main():
+    args = parse_args()
+    use_sqlite(None if args.db == "memory" else os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+    results = []
+    if not args.skip_classify:
+        results += bench_classify(args.ops)
+    results += bench_sync_db(args.ops, args.history_rows, args.history_repeat)
+    results += asyncio.run(bench_async_db(args.ops, args.history_rows, args.history_repeat))
+    for row in results:
+        print(row)
+    save_results("micro", args, results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# /history/search 전문 검색 벤치마크: 합성 대화 수백만 건에서 색인 검색 vs LIKE 전체 탐색
+#
+#   cd backend
+#   python -m bench.bench_search --rows 2000000 --db /tmp/search_bench.db
+#
+#   --db 의 파일이 이미 --rows 만큼 차 있으면 다시 만들지 않고 검색만 측정 (두 번째 실행부터 빠름)
+#   DATABASE_URL / ASYNC_DATABASE_URL 을 지정하면 MySQL(FULLTEXT ngram) 로도 측정 가능, 기본은 SQLite FTS5
+#
+#   build  : save_message 와 같은 INSERT 경로(multi-row INSERT + 트리거/FULLTEXT 갱신)로 채운 행/초
+#   search : 검색어 종류별 search_messages 지연 (관련도 순 rank / 최신 순 recent)
+#   like   : 색인 없이 content LIKE '%단어%' 로 최신 순 limit 만큼 찾는 기존 방식의 지연 (--like-repeat 회)
+#            흔한 단어는 앞에서 금방 limit 을 채우고, 드문 단어일수록 전체를 훑게 됨
+#
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bench.common import latency_summary, save_results, use_sqlite
+
+SUBJECTS = ["오늘", "내일", "주말", "아침", "점심", "저녁", "회사", "학교", "친구", "가족", "강아지", "고양이"]
+TOPICS = ["날씨", "영화", "음악", "운동", "여행", "공부", "게임", "요리", "커피", "드라마", "책", "쇼핑"]
+ENDINGS = ["어때?", "좋아요", "별로예요", "추천해줘", "궁금해", "재밌었어", "힘들어요", "기대돼요", "하고 싶어", "싫어"]
+REPLIES = ["반가워요!", "좋은 생각이에요.", "그랬군요, 힘내세요!", "저도 궁금해요.", "추천해 드릴게요:", "다음에 또 이야기해요."]
+INTENTS = ["인사", "질문", "감정", "작별", "칭찬"]
+RARE = "무지개"  # 약 1/10000 행에만 넣는 드문 단어
+
+QUERIES = {
+    "common": {"q": "날씨"},
+    "two_terms": {"q": "주말 여행"},
+    "rare": {"q": RARE},
+    "filtered": {"q": "커피", "speaker": "user", "intent": "질문"},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--db", default=None, help="SQLite 파일 (기본 임시 파일)")
+    parser.add_argument("--repeat", type=int, default=50, help="검색어마다 반복 횟수")
+    parser.add_argument("--like-repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본 bench_results/)")
+    return parser.parse_args()
+
+
+def synthetic_rows(rng: random.Random, start: int, count: int, base: datetime) -> list[dict]:
+    rows = []
+    for i in range(start, start + count):
+        if i % 2 == 0:
+            content = f"{rng.choice(SUBJECTS)} {rng.choice(TOPICS)} {rng.choice(ENDINGS)}"
+            if rng.random() < 0.0001:
+                content += f" {RARE}"
+            speaker = "user"
+        else:
+            content = f"{rng.choice(REPLIES)} {rng.choice(TOPICS)} 이야기 {rng.choice(ENDINGS)}"
+            speaker = "assistant"
+        rows.append({
+            "speaker": speaker,
+            "content": content,
+            "created_at": base + timedelta(seconds=i * 5),
+            "user_id": f"user{i % 1000}",
+            "conversation_id": f"{i // 20:032x}",
+            "intent": rng.choice(INTENTS),
+        })
+    return rows
+
+
+async def main():
+    args = parse_args()
+    use_sqlite(args.db or os.path.join(tempfile.mkdtemp(), "search_bench.db"))
+    from sqlalchemy import func, select
+
+    from text_sql_9 import Async_Text_SQL, ChatMessage
+
+    adb = Async_Text_SQL(write_behind=False)
+    await adb.init()
+    results = []
+
+    async with adb.SessionLocal() as session:
+        existing = (await session.execute(select(func.count()).select_from(ChatMessage))).scalar()
+    if existing < args.rows:
+        rng = random.Random(42)
+        base = datetime(2024, 1, 1)
+        start = time.perf_counter()
+        for offset in range(existing, args.rows, args.batch):
+            await adb.insert_rows(synthetic_rows(rng, offset, min(args.batch, args.rows - offset), base))
+            done = offset + args.batch - existing
+            if done % (args.batch * 10) == 0:
+                print(f"  {offset + args.batch:,} 행")
+        elapsed = time.perf_counter() - start
+        added = args.rows - existing
+        build = {"phase": "build", "rows": added, "rows_per_s": round(added / elapsed, 1)}
+        print(build)
+        results.append(build)
+
+    for name, params in QUERIES.items():
+        filters = {k: v for k, v in params.items() if k != "q"}
+        for order in ("rank", "recent"):
+            latencies = []
+            page = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                page = await adb.search_messages(params["q"], args.limit, order=order, **filters)
+                latencies.append(time.perf_counter() - start)
+            row = {"phase": "search", "query": name, "order": order, "hits_on_page": len(page["items"]),
+                   **latency_summary(latencies, digits=2)}
+            print(row)
+            results.append(row)
+
+        like_latencies = []
+        for _ in range(args.like_repeat):
+            stmt = select(ChatMessage.id).where(*(ChatMessage.content.contains(t) for t in params["q"].split()))
+            for key, value in filters.items():
+                stmt = stmt.where(getattr(ChatMessage, key) == value)
+            stmt = stmt.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(args.limit)
+            start = time.perf_counter()
+            async with adb.SessionLocal() as session:
+                (await session.execute(stmt)).all()
+            like_latencies.append(time.perf_counter() - start)
+        row = {"phase": "like", "query": name, **latency_summary(like_latencies, digits=2)}
+        print(row)
+        results.append(row)
+
+    await adb.close()
+    save_results("search", args, results, args.out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+# 감정분석 백엔드 지연 비교 (Google 은 로컬 대역 서버 bench.fake_google_language 로 측정)
+#
+#   cd backend
+#   python -m bench.bench_sentiment --texts 200 --latency-ms 80 --handshake-ms 150
+#
+#   google_new_client : 요청마다 클라이언트를 새로 만듦 (이전 k.py 방식, 매번 새 연결 + 핸드셰이크)
+#   google_shared     : 공유 클라이언트로 한 문장씩
+#   google_batch      : analyze_batch (공유 클라이언트로 SENTIMENT_BATCH_CONCURRENCY 개씩 동시에)
+#   local / local_batch : transformers 감정 모델 (SENTIMENT_LOCAL_MODEL) 한 문장씩 / 배치
+#   --modes 로 일부만 실행. 문장당 p50/p95 와 전체 처리량(texts/s) 을 JSON 으로 저장
+#
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from bench.common import latency_summary, save_results, start_server, wait_ready
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "ML", "intent_dataset_varied_1000.csv")
+MODES = ["google_new_client", "google_shared", "google_batch", "local", "local_batch"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=80, help="가짜 Google 응답 지연")
+    parser.add_argument("--handshake-ms", type=int, default=150, help="가짜 Google 새 연결 비용")
+    parser.add_argument("--fake-port", type=int, default=9200)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본 bench_results/)")
+    return parser.parse_args()
+
+
+def per_call(analyze, texts: list[str]) -> tuple[list[float], float]:
+    latencies = []
+    start = time.perf_counter()
+    for text in texts:
+        t = time.perf_counter()
+        analyze(text)
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - start
+
+
+def result(mode: str, texts: list[str], elapsed: float, latencies: list[float] | None = None) -> dict:
+    row = {"mode": mode, "texts": len(texts), "texts_per_s": round(len(texts) / elapsed, 1)}
+    if latencies is not None:
+        row.update(latency_summary(latencies, digits=2))
+    else:
+        row["mean_ms_per_text"] = round(elapsed / len(texts) * 1000, 2)
+    return row
+
+
+def bench_google(modes: list[str], texts: list[str], endpoint: str) -> list[dict]:
+    from sentiment import Google_Sentiment_Backend
+
+    results = []
+    if "google_new_client" in modes:
+        def analyze_new_client(text):
+            backend = Google_Sentiment_Backend(endpoint)
+            try:
+                return backend.analyze(text)
+            finally:
+                backend.close()
+
+        latencies, elapsed = per_call(analyze_new_client, texts)
+        results.append(result("google_new_client", texts, elapsed, latencies))
+
+    backend = Google_Sentiment_Backend(endpoint)
+    backend.analyze(texts[0])  # 연결 맺기 (공유 클라이언트는 이후 재사용)
+    if "google_shared" in modes:
+        latencies, elapsed = per_call(backend.analyze, texts)
+        results.append(result("google_shared", texts, elapsed, latencies))
+    if "google_batch" in modes:
+        start = time.perf_counter()
+        backend.analyze_batch(texts)
+        results.append(result("google_batch", texts, time.perf_counter() - start))
+    backend.close()
+    return results
+
+
+def bench_local(modes: list[str], texts: list[str]) -> list[dict]:
+    from sentiment import Local_Sentiment_Backend
+
+    backend = Local_Sentiment_Backend()
+    backend.analyze(texts[0])  # 워밍업
+    results = []
+    if "local" in modes:
+        latencies, elapsed = per_call(backend.analyze, texts)
+        results.append(result("local", texts, elapsed, latencies))
+    if "local_batch" in modes:
+        start = time.perf_counter()
+        backend.analyze_batch(texts)
+        results.append(result("local_batch", texts, time.perf_counter() - start))
+    return results
+
+
+async def main():
+    args = parse_args()
+    texts = pd.read_csv(DATA_PATH)["sentence"].tolist()[:args.texts]
+    results = []
+
+    if any(m.startswith("google") for m in args.modes):
+        fake = start_server("bench.fake_google_language:app", args.fake_port, {
+            "FAKE_GOOGLE_LATENCY_MS": str(args.latency_ms),
+            "FAKE_GOOGLE_HANDSHAKE_MS": str(args.handshake_ms),
+        }, tempfile.mkdtemp())
+        try:
+            await wait_ready(fake, f"http://127.0.0.1:{args.fake_port}/stats")
+            results += await asyncio.to_thread(bench_google, args.modes, texts, f"127.0.0.1:{args.fake_port}")
+        except ImportError as e:
+            print(f"⚠️ google-cloud-language 가 없어 Google 측정을 건너뜁니다: {e}")
+        finally:
+            fake.terminate()
+
+    if any(m.startswith("local") for m in args.modes):
+        try:
+            results += bench_local(args.modes, texts)
+        except ImportError as e:
+            print(f"⚠️ transformers 가 없어 로컬 모델 측정을 건너뜁니다: {e}")
+
+    for row in results:
+        print(row)
+    save_results("sentiment", args, results, args.out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+# 시작 시간 측정: 모듈 import 시간, /healthz·/readyz 응답까지 시간, 첫 /chat 응답까지 시간
+# 변경 전후 비교는 각 리비전에서 이 스크립트를 실행해서 비교
+#
+#   cd backend
+#   python -m bench.bench_startup --app main:app
+#
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.common import BACKEND_DIR, sqlite_env, start_server, wait_ready
+
+
+def measure_import(module: str, env: dict, workdir: str) -> float:
+    code = (
+        "import sys, time; sys.path.insert(0, %r); t = time.perf_counter(); "
+        "import %s; print(time.perf_counter() - t)" % (BACKEND_DIR, module)
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, capture_output=True,
+                         text=True, env={**os.environ, **env})
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+async def wait_status(c: httpx.AsyncClient, url: str, start: float, timeout: float) -> float | None:
+    while time.perf_counter() - start < timeout:
+        try:
+            if (await c.get(url)).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    return None
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bench.db")
+    env = {
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        **sqlite_env(db_path),
+    }
+    module = args.app.split(":")[0]
+    result = {"import_s": round(measure_import(module, env, workdir), 3)}
+
+    fake = start_server("bench.fake_openai:app", args.fake_port, {"FAKE_OPENAI_LATENCY_MS": "50"}, workdir)
+    await wait_ready(fake, f"http://127.0.0.1:{args.fake_port}/stats")
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    start = time.perf_counter()
+    app = start_server(args.app, args.app_port, env, workdir)
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout) as c:
+            for name, path in (("healthz_s", "/healthz"), ("readyz_s", "/readyz")):
+                elapsed = await wait_status(c, app_url + path, start, args.timeout)
+                result[name] = round(elapsed, 3) if elapsed is not None else None
+            r = await c.post(f"{app_url}/chat",
+                             json={"user_input": "안녕?", "system_prompt": "너는 나의 친구야."})
+            result["first_chat_s"] = round(time.perf_counter() - start, 3)
+            result["first_chat_status"] = r.status_code
+        print(result)
+    finally:
+        app.terminate()
+        fake.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
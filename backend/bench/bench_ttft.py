@@ -0,0 +1,86 @@
+# 첫 토큰까지의 시간(TTFT) 비교: /chat vs /chat/stream
+#
+#   cd backend
+#   python -m bench.bench_ttft --requests 50 --concurrency 10
+#
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from bench.common import latency_summary, sqlite_env, start_server, wait_ready
+
+
+async def measure_chat(c: httpx.AsyncClient, url: str, payload: dict) -> tuple[float, float]:
+    start = time.perf_counter()
+    r = await c.post(url, json=payload)
+    r.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def measure_stream(c: httpx.AsyncClient, url: str, payload: dict) -> tuple[float, float]:
+    start = time.perf_counter()
+    ttft = None
+    async with c.stream("POST", url, json=payload) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if ttft is None and line == "event: token":
+                ttft = time.perf_counter() - start
+    return ttft if ttft is not None else time.perf_counter() - start, time.perf_counter() - start
+
+
+async def run(measure, url: str, payload: dict, concurrency: int, total: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=300) as c:
+        async def one():
+            async with sem:
+                return await measure(c, url, payload)
+        results = await asyncio.gather(*(one() for _ in range(total)))
+    return {
+        "ttft": latency_summary([r[0] for r in results]),
+        "total": latency_summary([r[1] for r in results]),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=1500)
+    parser.add_argument("--ttft-ms", type=int, default=150)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bench.db")
+    fake = start_server("bench.fake_openai:app", args.fake_port, {
+        "FAKE_OPENAI_LATENCY_MS": str(args.latency_ms),
+        "FAKE_OPENAI_TTFT_MS": str(args.ttft_ms),
+    }, workdir)
+    app = start_server(args.app, args.app_port, {
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        **sqlite_env(db_path),
+    }, workdir)
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    payload = {"user_input": "안녕?", "system_prompt": "너는 나의 친구야."}
+    try:
+        await wait_ready(fake, f"http://127.0.0.1:{args.fake_port}/stats")
+        await wait_ready(app, f"{app_url}/docs")
+        print("/chat       ", await run(measure_chat, f"{app_url}/chat", payload,
+                                        args.concurrency, args.requests))
+        print("/chat/stream", await run(measure_stream, f"{app_url}/chat/stream", payload,
+                                        args.concurrency, args.requests))
+    finally:
+        app.terminate()
+        fake.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+# 워커별 RSS / 콜드 스타트 비교: 워커마다 모델 로드(local) vs 사이드카 하나 공유(sidecar)
+#
+#   cd backend
+#   python -m bench.bench_workers --workers 8 --backend int8
+#
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.common import BACKEND_DIR, sqlite_env, wait_ready
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return 0.0
+
+
+def children(pid: int) -> list[int]:
+    """uvicorn 워커 프로세스 목록 (multiprocessing resource_tracker 제외)."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids = [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+    workers = []
+    for child in pids:
+        try:
+            with open(f"/proc/{child}/cmdline", "rb") as f:
+                if b"resource_tracker" in f.read():
+                    continue
+        except FileNotFoundError:
+            continue
+        workers.append(child)
+    return workers
+
+
+async def run_mode(mode: str, args, workdir: str) -> dict:
+    db_path = os.path.join(workdir, f"{mode}.db")
+    env = {
+        "OPENAI_API_KEY": "sk-bench",
+        **sqlite_env(db_path),
+        "INTENT_BACKEND": args.backend,
+        "INTENT_SERVER_ADDR": f"127.0.0.1:{args.sidecar_port}",
+    }
+    sidecar = None
+    start = time.perf_counter()
+    if mode == "sidecar":
+        sidecar = subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND_DIR, "intent_server.py")],
+            cwd=BACKEND_DIR, env={**os.environ, **env},
+            stdout=subprocess.PIPE, text=True,
+        )
+        for line in sidecar.stdout:
+            if "사이드카 시작" in line:
+                break
+        env["INTENT_BACKEND"] = "remote"
+
+    # 모델 경로(./trained_intent_model)가 backend 기준이라 이 벤치는 cwd=BACKEND_DIR 로 실행
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, **env},
+    )
+    try:
+        await wait_ready(app, f"http://127.0.0.1:{args.app_port}/docs", timeout=600)
+        cold_start = time.perf_counter() - start
+        await asyncio.sleep(args.settle)
+        worker_rss = [rss_mb(pid) for pid in children(app.pid) if rss_mb(pid) > 0]
+        result = {
+            "mode": mode,
+            "workers": len(worker_rss),
+            "cold_start_s": round(cold_start, 2),
+            "per_worker_rss_mb": round(sum(worker_rss) / max(len(worker_rss), 1), 1),
+            "total_rss_mb": round(sum(worker_rss) + rss_mb(app.pid), 1),
+        }
+        if sidecar is not None:
+            result["sidecar_rss_mb"] = round(rss_mb(sidecar.pid), 1)
+            result["total_rss_mb"] = round(result["total_rss_mb"] + result["sidecar_rss_mb"], 1)
+        return result
+    finally:
+        app.terminate()
+        app.wait()
+        if sidecar is not None:
+            sidecar.terminate()
+            sidecar.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--backend", default="eager", choices=["eager", "int8"])
+    parser.add_argument("--modes", nargs="+", default=["local", "sidecar"])
+    parser.add_argument("--settle", type=float, default=5.0)
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--sidecar-port", type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    for mode in args.modes:
+        print(await run_mode(mode, args, workdir))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+# 메시지 저장 처리량 비교: 요청마다 바로 INSERT vs write-behind 배치 INSERT
+#
+#   cd backend
+#   python -m bench.bench_write_behind --requests 5000 --concurrency 50
+#   (DATABASE_URL / ASYNC_DATABASE_URL 을 지정하면 MySQL 로도 측정 가능, 기본은 임시 SQLite)
+#
+# /chat 지연 비교는 bench_chat_async 에 환경 변수를 넘겨서 측정:
+#   python -m bench.bench_chat_async --env DB_WRITE_BEHIND=0
+#   python -m bench.bench_chat_async --env DB_WRITE_BEHIND=1
+#
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from bench.common import latency_summary, use_sqlite
+
+use_sqlite(os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from text_sql_9 import Async_Text_SQL
+
+
+async def run(write_behind: bool, requests: int, concurrency: int) -> dict:
+    adb = Async_Text_SQL(write_behind=write_behind)
+    await adb.init()
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await adb.save_messages([("user", f"안녕 {i}"), ("assistant", f"안녕하세요! {i}")])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    await adb.close()  # write-behind 는 남은 행을 모두 저장할 때까지 기다림
+    elapsed = time.perf_counter() - start
+
+    return {
+        "write_behind": write_behind,
+        "rows_per_s": round(requests * 2 / elapsed, 1),
+        **{f"save_{k}": v for k, v in latency_summary(latencies, digits=3).items()},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    for write_behind in (False, True):
+        print(await run(write_behind, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+# 벤치마크 공통 도구: 서버 실행, SQLite 대체 DB, 부하 생성, 지연 요약, 결과 JSON 저장
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 결과 JSON 기본 저장 위치 (실행한 디렉토리 기준)
+RESULTS_DIR = "bench_results"
+
+
+def sqlite_env(db_path: str | None = None) -> dict:
+    """
+    MySQL 대신 쓸 SQLite URL (Text_SQL / Async_Text_SQL 의 DATABASE_URL, ASYNC_DATABASE_URL).
+    db_path 가 없으면 인메모리 DB (프로세스 안에서만 유효하므로 마이크로 벤치마크용).
+    """
+    if db_path is None:
+        return {"DATABASE_URL": "sqlite://", "ASYNC_DATABASE_URL": "sqlite+aiosqlite://"}
+    return {"DATABASE_URL": f"sqlite:///{db_path}", "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}"}
+
+
+def use_sqlite(db_path: str | None = None):
+    """text_sql_9 를 import 하기 전에 호출. 이미 DB URL 이 지정돼 있으면 그대로 둠."""
+    for key, value in sqlite_env(db_path).items():
+        os.environ.setdefault(key, value)
+
+
+def latency_summary(latencies: list[float], digits: int = 1) -> dict:
+    values = sorted(latencies)
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+
+    def pick(p):
+        return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, digits)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def start_server(app: str, port: int, env: dict, workdir: str, workers: int = 1) -> subprocess.Popen:
+    # chat_log.jsonl 등이 저장소가 아닌 임시 디렉토리에 쌓이도록 cwd 를 분리
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--app-dir", BACKEND_DIR,
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir,
+        env={**os.environ, **env},
+    )
+
+
+async def wait_ready(proc: subprocess.Popen, url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as c:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"서버가 종료됨 (exit={proc.returncode}): {url}")
+            try:
+                await c.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"서버가 준비되지 않음: {url}")
+
+
+async def run_load(send, concurrency: int, total: int) -> dict:
+    """
+    send: async (client, i) → httpx.Response. i 번째 요청을 concurrency 개의 연결로 total 번 실행.
+    2xx 가 아니거나 전송에 실패한 요청은 errors 로 집계.
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=300) as c:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    r = await send(c, i)
+                    r.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        **latency_summary(latencies),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(name: str, args, results: list[dict], out: str | None = None) -> str:
+    """실행 환경 + 인자 + 결과를 JSON 으로 저장하고 경로를 반환 (python -m bench.compare 로 비교)."""
+    now = datetime.now()
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{name}-{now:%Y%m%d-%H%M%S}.json")
+    report = {
+        "benchmark": name,
+        "timestamp": now.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+        "results": results,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📝 결과 저장: {out}")
+    return out
@@ -0,0 +1,54 @@
+# 두 벤치마크 결과 JSON 비교 (bench_load / bench_micro 의 --out 결과)
+#
+#   cd backend
+#   python -m bench.compare before.json after.json
+#
+# 같은 측정 항목(결과 행의 문자열/정수 식별 필드가 같은 행)끼리 맞춰 처리량과 지연의 변화율을 출력
+import argparse
+import json
+
+METRICS = ["rps", "ops_per_s", "p50_ms", "p95_ms", "p99_ms", "errors"]
+
+
+def row_key(row: dict) -> tuple:
+    return tuple(
+        (k, v) for k, v in row.items()
+        if k not in METRICS and k not in ("requests", "ops") and isinstance(v, (str, int, bool))
+    )
+
+
+def change(old, new) -> str:
+    if old is None or new is None:
+        return f"{old} → {new}"
+    if not old:
+        return f"{old} → {new}"
+    return f"{old} → {new} ({(new - old) / old * 100:+.1f}%)"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    print(f"{before['benchmark']}: {before.get('git_commit')} ({before['timestamp']}) → "
+          f"{after.get('git_commit')} ({after['timestamp']})")
+
+    old_rows = {row_key(r): r for r in before["results"]}
+    for row in after["results"]:
+        key = row_key(row)
+        label = " ".join(f"{k}={v}" for k, v in key)
+        old = old_rows.get(key)
+        if old is None:
+            print(f"[{label}] 이전 결과 없음")
+            continue
+        parts = [f"{m}: {change(old.get(m), row.get(m))}" for m in METRICS if m in row or m in old]
+        print(f"[{label}] " + ", ".join(parts))
+
+
+if __name__ == "__main__":
+    main()
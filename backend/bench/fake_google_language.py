@@ -0,0 +1,66 @@
+# 벤치마크용 가짜 Google Cloud Natural Language 서버 (REST /v2/documents:analyzeSentiment 만 흉내냄)
+#
+#   FAKE_GOOGLE_LATENCY_MS=80 FAKE_GOOGLE_HANDSHAKE_MS=150 uvicorn bench.fake_google_language:app --port 9200
+#   SENTIMENT_ENDPOINT=127.0.0.1:9200 → sentiment.Google_Sentiment_Backend 가 인증 없이 이 서버로 요청
+#
+# 새 연결의 첫 요청에는 FAKE_GOOGLE_HANDSHAKE_MS 를 더 기다림 (실제 서비스의 TLS + 인증 토큰 발급 비용 대역)
+import asyncio
+import os
+import re
+
+from fastapi import FastAPI, Request
+
+LATENCY_MS = float(os.getenv("FAKE_GOOGLE_LATENCY_MS", "80"))
+HANDSHAKE_MS = float(os.getenv("FAKE_GOOGLE_HANDSHAKE_MS", "150"))
+
+app = FastAPI()
+
+stats = {"total": 0, "connections": 0}
+_seen_connections = set()
+_SENTENCE_END = re.compile(r"(?<=[.!?~])\s+")
+_POSITIVE = ("좋", "고마", "감사", "행복", "최고", "멋")
+_NEGATIVE = ("싫", "슬프", "힘들", "짜증", "우울", "나빠")
+
+
+def _score(sentence: str) -> float:
+    positive = sum(w in sentence for w in _POSITIVE)
+    negative = sum(w in sentence for w in _NEGATIVE)
+    return max(-1.0, min(1.0, 0.4 * (positive - negative)))
+
+
+@app.post("/v2/documents:analyzeSentiment")
+async def analyze_sentiment(request: Request):
+    body = await request.json()
+    stats["total"] += 1
+    connection = request.client
+    if connection not in _seen_connections:
+        _seen_connections.add(connection)
+        stats["connections"] += 1
+        await asyncio.sleep(HANDSHAKE_MS / 1000)
+    await asyncio.sleep(LATENCY_MS / 1000)
+
+    content = body["document"]["content"]
+    sentences = [s for s in _SENTENCE_END.split(content) if s.strip()] or [content]
+    offset = 0
+    items = []
+    for sentence in sentences:
+        score = _score(sentence)
+        items.append({
+            "text": {"content": sentence, "beginOffset": content.find(sentence, offset)},
+            "sentiment": {"score": score, "magnitude": abs(score)},
+        })
+        offset += len(sentence)
+    return {
+        "documentSentiment": {
+            "score": sum(i["sentiment"]["score"] for i in items) / len(items),
+            "magnitude": sum(i["sentiment"]["magnitude"] for i in items),
+        },
+        "languageCode": "ko",
+        "sentences": items,
+        "languageSupported": True,
+    }
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
@@ -0,0 +1,90 @@
+# 벤치마크용 가짜 OpenAI 서버 (/v1/chat/completions 만 흉내냄)
+#
+#   FAKE_OPENAI_LATENCY_MS=800 uvicorn bench.fake_openai:app --port 9100
+#
+# stream=True 요청은 FAKE_OPENAI_TTFT_MS 뒤에 첫 토큰을 보내고,
+# 나머지 토큰을 (LATENCY_MS - TTFT_MS) 동안 나눠서 보냄 → 전체 시간은 비스트리밍과 동일
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY_MS = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "800"))
+TTFT_MS = float(os.getenv("FAKE_OPENAI_TTFT_MS", "150"))
+REPLY = os.getenv("FAKE_OPENAI_REPLY", "안녕하세요! 무엇을 도와드릴까요?")
+
+app = FastAPI()
+
+# 동시에 처리 중인 요청 수 (peak 는 워커 하나가 붙잡을 수 있는 in-flight 수)
+stats = {"in_flight": 0, "peak_in_flight": 0, "total": 0}
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    data = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_reply(model: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    tokens = [t + " " for t in REPLY.split(" ")]
+    tokens[-1] = tokens[-1].rstrip()
+    token_delay = max(LATENCY_MS - TTFT_MS, 0) / 1000 / max(len(tokens) - 1, 1)
+    try:
+        await asyncio.sleep(TTFT_MS / 1000)
+        yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(token_delay)
+            yield _chunk(completion_id, model, {"content": token})
+        yield _chunk(completion_id, model, {}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["in_flight"] += 1
+    stats["total"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+    if body.get("stream"):
+        return StreamingResponse(_stream_reply(body.get("model", "gpt-3.5-turbo")),
+                                 media_type="text/event-stream")
+    try:
+        await asyncio.sleep(LATENCY_MS / 1000)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": REPLY},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
+
+
+@app.post("/stats/reset")
+def reset_stats():
+    stats.update(in_flight=0, peak_in_flight=0, total=0)
+    return stats
@@ -0,0 +1,268 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# 대화 로그 (JSONL, 한 줄에 대화 한 턴)
+#   CHAT_LOG_MAX_BYTES       : 이 크기를 넘으면 회전
+#   CHAT_LOG_ROTATE_SECONDS  : 이 주기(기본 하루)가 바뀌면 회전 (0 이면 크기 기준만)
+#   CHAT_LOG_BACKUPS         : 보관할 압축 파일 수
+#   CHAT_LOG_FLUSH_MS        : 버퍼에 모았다가 디스크에 쓰는 최대 간격
+#   CHAT_LOG_MAX_QUEUE       : 대기열이 가득 차면 새 기록은 버리고 dropped 로 집계 (요청을 막지 않음)
+CHAT_LOG_PATH           = os.getenv("CHAT_LOG_PATH", "chat_log.jsonl")
+CHAT_LOG_MAX_BYTES      = int(os.getenv("CHAT_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+CHAT_LOG_ROTATE_SECONDS = int(os.getenv("CHAT_LOG_ROTATE_SECONDS", "86400"))
+CHAT_LOG_BACKUPS        = int(os.getenv("CHAT_LOG_BACKUPS", "14"))
+CHAT_LOG_FLUSH_MS       = float(os.getenv("CHAT_LOG_FLUSH_MS", "200"))
+CHAT_LOG_MAX_QUEUE      = int(os.getenv("CHAT_LOG_MAX_QUEUE", "10000"))
+CHAT_LOG_BATCH_SIZE     = 500
+
+_STOP = object()
+
+try:
+    import fcntl
+
+    def _lock(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def rotated_files(path: str) -> list[str]:
+    """회전된 압축 파일 목록 (오래된 것부터)."""
+    return sorted(glob.glob(f"{glob.escape(path)}.*.gz"))
+
+
+# 여러 워커 프로세스가 같은 파일에 안전하게 이어 쓰는 JSONL 로그 기록기
+#   - write() 는 대기열에 넣기만 하고 바로 반환 (요청 경로에서 파일 I/O 없음)
+#   - 백그라운드 스레드가 모아서 한 번의 write() 로 기록 (O_APPEND + 파일 잠금 → 줄이 섞이지 않음)
+#   - 크기 / 주기 기준으로 회전하고 gzip 으로 압축, 오래된 파일은 삭제
+class Chat_Log_Writer:
+    def __init__(self, path: str = CHAT_LOG_PATH, max_bytes: int = CHAT_LOG_MAX_BYTES,
+                 rotate_seconds: int = CHAT_LOG_ROTATE_SECONDS, backups: int = CHAT_LOG_BACKUPS,
+                 flush_ms: float = CHAT_LOG_FLUSH_MS, max_queue: int = CHAT_LOG_MAX_QUEUE):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.flush_interval = flush_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._fd = None
+        self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: dict):
+        """기록 하나를 대기열에 넣음. ts 가 없으면 현재 시각(UTC)을 붙임."""
+        record = {"ts": now_iso(), **record}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def log_chat(self, user_input: str, ai_response: str, **fields):
+        self.write({**fields, "user_input": user_input, "ai_response": ai_response})
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {"backlog": self.backlog, "written": self.written, "dropped": self.dropped,
+                "rotations": self.rotations}
+
+    def close(self, timeout: float | None = 10):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect(self) -> tuple[list, bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < CHAT_LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect()
+            if batch:
+                data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch).encode("utf-8")
+                try:
+                    self._append(data)
+                    self.written += len(batch)
+                except OSError as e:
+                    self.dropped += len(batch)
+                    print(f"⚠️ 대화 로그 기록 실패: {e}")
+            if stop:
+                break
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        os.close(self._lock_fd)
+
+    @contextmanager
+    def _locked(self):
+        _lock(self._lock_fd)
+        try:
+            yield
+        finally:
+            _unlock(self._lock_fd)
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _should_rotate(self, st: os.stat_result, incoming: int, now: float) -> bool:
+        if st.st_size == 0:
+            return False
+        if st.st_size + incoming > self.max_bytes:
+            return True
+        # 마지막 기록이 이전 주기였다면 그 주기의 로그는 끝난 것
+        return bool(self.rotate_seconds) and int(st.st_mtime // self.rotate_seconds) != int(now // self.rotate_seconds)
+
+    def _append(self, data: bytes):
+        rotated = None
+        with self._locked():
+            # 다른 프로세스가 회전했으면 새 파일을 다시 엶
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                st = None
+            if self._fd is None or st is None or os.fstat(self._fd).st_ino != st.st_ino:
+                self._open()
+                st = os.fstat(self._fd)
+            now = time.time()
+            if self._should_rotate(st, len(data), now):
+                # 회전은 잠금 안에서 차례로 일어나므로 회전 시각(마이크로초)이 곧 파일 순서
+                stamp = datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M%S-%f")
+                rotated = f"{self.path}.{stamp}-{os.getpid()}"
+                os.close(self._fd)
+                self._fd = None
+                os.rename(self.path, rotated)
+                self._open()
+                self.rotations += 1
+            os.write(self._fd, data)
+        if rotated is not None:
+            # 압축은 잠금 밖에서 (이름을 바꾼 파일은 이 프로세스만 건드림)
+            self._compress(rotated)
+            self._prune()
+
+    def _compress(self, path: str):
+        try:
+            with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        except OSError as e:
+            print(f"⚠️ 대화 로그 압축 실패: {e}")
+
+    def _prune(self):
+        for old in rotated_files(self.path)[:-self.backups or None]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _open_log(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_chat_log(path: str = CHAT_LOG_PATH, include_rotated: bool = True, since: str | None = None,
+                  until: str | None = None, contains: str | None = None, **fields):
+    """
+    로그를 한 줄씩 읽어 조건에 맞는 기록(dict)을 오래된 것부터 yield (파일 전체를 메모리에 올리지 않음).
+    since / until : ISO 시각 문자열 (ts 와 문자열 비교)
+    contains      : user_input 또는 ai_response 에 포함된 문자열
+    fields        : 그 밖의 필드 일치 조건 (예: conversation_id="...")
+    """
+    path = os.path.abspath(path)
+    paths = (rotated_files(path) if include_rotated else []) + ([path] if os.path.exists(path) else [])
+    for p in paths:
+        with _open_log(p) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 기록 중 잘린 마지막 줄 등
+                ts = record.get("ts", "")
+                if since and ts < since:
+                    continue
+                if until and ts >= until:
+                    continue
+                if contains and contains not in record.get("user_input", "") \
+                        and contains not in record.get("ai_response", ""):
+                    continue
+                if any(record.get(k) != v for k, v in fields.items()):
+                    continue
+                yield record
+
+
+# 로그 검색 CLI
+#   python -m chat_log --contains 안녕 --since 2025-05-01 --limit 20
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=CHAT_LOG_PATH)
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    parser.add_argument("--contains")
+    parser.add_argument("--conversation-id")
+    parser.add_argument("--request-id")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    fields = {k: v for k, v in (("conversation_id", args.conversation_id),
+                                ("request_id", args.request_id)) if v}
+    records = iter_chat_log(args.path, since=args.since, until=args.until, contains=args.contains, **fields)
+    for i, record in enumerate(records):
+        if args.limit is not None and i >= args.limit:
+            break
+        print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
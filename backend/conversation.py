@@ -0,0 +1,194 @@
+import asyncio
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+# 프롬프트에 넣을 최근 대화의 토큰 예산 (이보다 오래된 턴은 요약으로 접힘)
+CONTEXT_TOKEN_BUDGET    = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# 누적 요약의 최대 토큰 수
+SUMMARY_TOKEN_BUDGET    = int(os.getenv("SUMMARY_TOKEN_BUDGET", "300"))
+# 메모리에 유지할 대화 수 (LRU 로 오래 안 쓴 대화부터 내보냄)
+CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "10000"))
+# 캐시에 없는 대화를 DB 에서 불러올 때 읽는 최근 메시지 수
+CONVERSATION_LOAD_TURNS = int(os.getenv("CONVERSATION_LOAD_TURNS", "20"))
+
+# 메시지 하나에 붙는 role/구분자 토큰
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 근사치: 한글 등 비ASCII 문자는 글자당 1토큰,
+    ASCII 는 4글자당 1토큰 (gpt-3.5 cl100k 기준으로 약간 넉넉하게 잡음).
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4 + MESSAGE_TOKEN_OVERHEAD
+
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
+
+
+# 대화 하나의 상태: 누적 요약 + 토큰 예산 안의 최근 턴
+class Conversation_State:
+    def __init__(self, user_id: str | None = None, summary: str = ""):
+        self.user_id = user_id
+        self.summary = summary
+        self.turns = deque()
+        self.tokens = 0
+        # 창에서 밀려났지만 아직 요약에 반영되지 않은 턴
+        self.pending = []
+        self._lock = threading.Lock()
+        self.fold_lock = asyncio.Lock()
+
+    def _push(self, turn: dict):
+        self.turns.append(turn)
+        self.tokens += estimate_tokens(turn["content"])
+
+    def append(self, turns: list[dict], budget: int = CONTEXT_TOKEN_BUDGET,
+               fold: bool = True) -> list[dict]:
+        """
+        턴을 추가하고 예산을 넘는 오래된 턴을 잘라내 반환.
+        fold=True 면 잘린 턴을 pending 에 모아 두었다가 요약에 합침 (False 면 그냥 버림).
+        """
+        overflow = []
+        with self._lock:
+            for turn in turns:
+                self._push(turn)
+            while self.tokens > budget and len(self.turns) > 1:
+                old = self.turns.popleft()
+                self.tokens -= estimate_tokens(old["content"])
+                overflow.append(old)
+            if fold:
+                self.pending.extend(overflow)
+        return overflow
+
+    def take_pending(self) -> list[dict]:
+        with self._lock:
+            pending, self.pending = self.pending, []
+        return pending
+
+    def restore_pending(self, turns: list[dict]):
+        """요약에 실패한 턴을 다음 접기 때 다시 요약하도록 되돌림 (그 사이 밀려난 턴보다 앞에)."""
+        with self._lock:
+            self.pending[:0] = turns
+
+    def has_context(self) -> bool:
+        return bool(self.summary or self.turns)
+
+    def context_messages(self) -> list[dict]:
+        with self._lock:
+            messages = []
+            if self.summary:
+                messages.append({"role": "system", "content": f"지금까지의 대화 요약: {self.summary}"})
+            messages.extend(self.turns)
+            return messages
+
+
+# 대화 상태 LRU 캐시 (대화 수와 무관하게 메모리 상한 유지)
+class Conversation_Store:
+    def __init__(self, max_conversations: int = CONVERSATION_CACHE_SIZE):
+        self.max_conversations = max_conversations
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> Conversation_State | None:
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is not None:
+                self._states.move_to_end(conversation_id)
+            return state
+
+    def put(self, conversation_id: str, state: Conversation_State) -> Conversation_State:
+        """이미 있으면 기존 상태를 반환 (동시에 로드된 경우 먼저 들어간 쪽 사용)."""
+        with self._lock:
+            existing = self._states.get(conversation_id)
+            if existing is not None:
+                self._states.move_to_end(conversation_id)
+                return existing
+            self._states[conversation_id] = state
+            while len(self._states) > self.max_conversations:
+                self._states.popitem(last=False)
+            return state
+
+    def get_or_create(self, conversation_id: str, user_id: str | None = None) -> Conversation_State:
+        return self.get(conversation_id) or self.put(conversation_id, Conversation_State(user_id))
+
+    def __len__(self):
+        return len(self._states)
+
+
+def build_messages(state: Conversation_State, system_prompt: str, user_input: str) -> list[dict]:
+    return [
+        {"role": "system", "content": system_prompt},
+        *state.context_messages(),
+        {"role": "user", "content": user_input},
+    ]
+
+
+# Conversation_Store + DB 로드 + 요약 접기를 묶은 비동기 관리자
+class Conversation_Manager:
+    def __init__(self, store: Conversation_Store, load=None, create=None, summarize=None,
+                 save_summary=None):
+        """
+        load         : async (conversation_id) → (user_id, summary, turns) 또는 없으면 None
+        create       : async (conversation_id, user_id) → None
+        summarize    : async (summary, turns) → 새 요약 문자열
+        save_summary : async (conversation_id, user_id, summary) → None
+        """
+        self.store = store
+        self.load = load
+        self.create = create
+        self.summarize = summarize
+        self.save_summary = save_summary
+
+    async def start(self, user_id: str | None = None) -> tuple[str, Conversation_State]:
+        """새 대화를 만들고 (conversation_id, 상태) 반환. DB 저장에 실패하면 이 프로세스 메모리에만 두고 계속."""
+        conversation_id = new_conversation_id()
+        if self.create is not None:
+            try:
+                await self.create(conversation_id, user_id)
+            except Exception as e:
+                print(f"⚠️ 대화 저장 실패 (메모리에만 유지): {e}")
+        return conversation_id, self.store.put(conversation_id, Conversation_State(user_id))
+
+    async def get_state(self, conversation_id: str) -> Conversation_State | None:
+        """캐시 → DB 순서로 찾고, 없는 대화면 None."""
+        state = self.store.get(conversation_id)
+        if state is not None:
+            return state
+        loaded = await self.load(conversation_id) if self.load is not None else None
+        if loaded is None:
+            return None
+        user_id, summary, turns = loaded
+        state = Conversation_State(user_id, summary)
+        state.append(turns, fold=False)  # DB 에서 읽은 창 밖의 턴은 다시 요약하지 않음
+        return self.store.put(conversation_id, state)
+
+    def record(self, state: Conversation_State, user_input: str, ai_response: str) -> bool:
+        """응답이 끝난 턴을 창에 추가. 요약할 턴이 생기면 True."""
+        overflow = state.append([
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": ai_response},
+        ], fold=self.summarize is not None)
+        return bool(overflow) and self.summarize is not None
+
+    async def fold(self, conversation_id: str, state: Conversation_State):
+        """창에서 밀려난 턴을 누적 요약에 합침 (응답 후 백그라운드에서 실행)."""
+        async with state.fold_lock:
+            pending = state.take_pending()
+            if not pending:
+                return
+            try:
+                state.summary = await self.summarize(state.summary, pending)
+            except asyncio.CancelledError:
+                state.restore_pending(pending)
+                raise
+            except Exception as e:
+                # 잘린 턴이 창에도 요약에도 없이 사라지지 않게 되돌려 두고, 다음 턴의 접기에서 다시 시도
+                state.restore_pending(pending)
+                print(f"⚠️ 대화 요약 실패: {e}")
+                return
+            if self.save_summary is not None:
+                await self.save_summary(conversation_id, state.user_id, state.summary)
@@ -0,0 +1,115 @@
+import asyncio
+from dataclasses import dataclass
+
+from metrics import ENRICH_FAILURES, stage
+
+
+@dataclass
+class Enrichment_Stage:
+    name: str
+    fn: object                 # async (values: dict) → 결과
+    after: tuple = ()          # 먼저 끝나야(또는 주어져야) 하는 입력 / 단계 이름
+    timeout: float | None = None
+    default: object = None     # 시간 초과·실패 시 결과
+    detach: bool = False       # 시간 초과 시 기다리기만 멈추고 작업은 계속 (저장처럼 취소하면 안 되는 단계)
+
+
+# 응답 생성과 독립적인 부가 처리(의도 분류, 감정 분석, 검열, 저장)를 작은 DAG 로 선언하고 동시에 실행
+#   - 단계는 after 에 적은 입력/단계가 준비되는 즉시 시작 (입력만 필요한 단계는 LLM 호출과 겹쳐 실행)
+#   - 단계마다 timeout, 실패하거나 시간을 넘기면 default 로 대신하고 요청은 계속 진행
+#   - add() 는 이미 선언된 이름에만 의존할 수 있으므로 순환이 생기지 않음
+class Enrichment_Pipeline:
+    def __init__(self, inputs: tuple = ()):
+        """inputs: 실행 시 값을 넣어 주는 이름 (start() 에서 바로, 또는 나중에 provide() 로)."""
+        self.inputs = set(inputs)
+        self.stages = {}
+
+    def add(self, name: str, fn, after: tuple = (), timeout: float | None = None, default=None,
+            detach: bool = False):
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"이미 있는 이름입니다: {name}")
+        unknown = [dep for dep in after if dep not in self.stages and dep not in self.inputs]
+        if unknown:
+            raise ValueError(f"{name} 의 선행 단계가 없습니다: {unknown}")
+        self.stages[name] = Enrichment_Stage(name, fn, tuple(after), timeout, default, detach)
+        return self
+
+    def start(self, values: dict) -> "Enrichment_Run":
+        """values: 입력 값 (+ 이미 알고 있는 단계 결과는 넣으면 그 단계를 건너뜀)."""
+        return Enrichment_Run(self, values)
+
+
+class Enrichment_Run:
+    def __init__(self, pipeline: Enrichment_Pipeline, values: dict):
+        loop = asyncio.get_running_loop()
+        self.values = dict(values)
+        self.status = {}
+        self._ready = {name: loop.create_future() for name in (*pipeline.inputs, *pipeline.stages)}
+        self._tasks = {}
+        for name, value in values.items():
+            self._ready[name].set_result(value)
+            if name in pipeline.stages:
+                self.status[name] = "provided"
+        for name, st in pipeline.stages.items():
+            if name not in values:
+                self._tasks[name] = asyncio.create_task(self._run_stage(st), name=f"enrich-{name}")
+
+    def provide(self, name: str, value):
+        """나중에 준비된 입력(예: LLM 응답)을 넣음. 단계 이름이면 그 단계를 실행하지 않고 값으로 대신함."""
+        task = self._tasks.pop(name, None)
+        if task is not None:
+            task.cancel()
+            self.status[name] = "provided"
+        self.values[name] = value
+        if not self._ready[name].done():
+            self._ready[name].set_result(value)
+
+    async def wait(self, *names: str) -> dict:
+        """지정한 단계(없으면 전체)가 끝날 때까지 기다리고 값 dict 반환 (단계 실패는 default 로 채워짐)."""
+        tasks = [self._tasks[n] for n in (names or self._tasks) if n in self._tasks]
+        if tasks:
+            await asyncio.wait(tasks)
+        return self.values
+
+    def cancel(self):
+        """끝나지 않은 단계를 모두 취소 (요청이 실패해 응답이 없을 때)."""
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+
+    async def _run_stage(self, st: Enrichment_Stage):
+        try:
+            for dep in st.after:
+                await self._ready[dep]
+        except asyncio.CancelledError:
+            self.status[st.name] = "skipped"
+            raise
+
+        work = st.fn(self.values)
+        if st.detach:
+            work = asyncio.shield(asyncio.ensure_future(work))
+        try:
+            with stage(st.name):
+                value = await asyncio.wait_for(work, st.timeout)
+            self.status[st.name] = "ok"
+        except asyncio.TimeoutError:
+            value = st.default
+            self.status[st.name] = "timeout"
+            ENRICH_FAILURES.labels(st.name, "timeout").inc()
+            print(f"⚠️ {st.name} 단계 시간 초과 ({st.timeout}s)")
+        except asyncio.CancelledError:
+            self.status[st.name] = "cancelled"
+            raise
+        except Exception as e:
+            value = st.default
+            self.status[st.name] = "error"
+            ENRICH_FAILURES.labels(st.name, "error").inc()
+            print(f"⚠️ {st.name} 단계 실패: {e}")
+        self.values[st.name] = value
+        self._ready[st.name].set_result(value)
@@ -0,0 +1,134 @@
+import re
+
+from sqlalchemy import and_, column, func, literal, literal_column, select, table, text
+from sqlalchemy.dialects.mysql import match as mysql_match
+
+from pagination import message_to_dict
+
+# /history/search 페이지 크기
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT     = 100
+# 관련도 순 결과는 offset 으로 넘기므로 너무 깊은 페이지는 막음
+SEARCH_MAX_OFFSET    = 1000
+# 검색어에서 쓰는 최대 단어 수
+SEARCH_MAX_TERMS     = 8
+
+FTS_TABLE      = "chat_messages_fts"
+FULLTEXT_INDEX = "ft_chat_messages_content"
+
+_WORD = re.compile(r"\w+")
+
+
+# 전문 검색 인덱스 (create_schema 에서 호출, 이미 있으면 아무것도 하지 않음)
+#   MySQL  : InnoDB FULLTEXT + ngram 파서 (한국어는 띄어쓰기 단위가 아니라 2글자 조각으로 색인)
+#   SQLite : FTS5 외부 콘텐츠 테이블 + 트리거 (INSERT / UPDATE / DELETE 때 같은 트랜잭션에서 색인 갱신)
+def create_search_index(conn):
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        exists = conn.execute(text(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'chat_messages' AND index_name = :name"
+        ), {"name": FULLTEXT_INDEX}).scalar()
+        if not exists:
+            conn.execute(text(
+                f"ALTER TABLE chat_messages ADD FULLTEXT INDEX {FULLTEXT_INDEX} (content) WITH PARSER ngram"
+            ))
+    elif dialect == "sqlite":
+        exists = conn.execute(text(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {"name": FTS_TABLE}).scalar()
+        if exists:
+            return
+        # unicode61 은 띄어쓰기 단위로 색인하므로 검색은 단어 앞부분 일치("날씨" → "날씨가")로 함
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"content, content='chat_messages', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON chat_messages BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON chat_messages BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF content ON chat_messages BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); "
+            f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END"
+        ))
+        # 인덱스가 생기기 전에 쌓인 행을 한 번 색인
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def search_terms(query: str) -> list[str]:
+    """검색어 → 단어 목록 (따옴표·연산자 등 검색 문법 문자는 버림). 단어가 없으면 ValueError."""
+    terms = _WORD.findall(query)[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("검색어가 비어 있습니다.")
+    return terms
+
+
+def search_select(model, dialect: str, query: str, limit: int, offset: int = 0, order: str = "rank",
+                  speaker: str | None = None, intent: str | None = None, since=None, until=None):
+    """
+    전문 검색 쿼리. 모든 단어를 포함하는 메시지를 관련도(order="rank") 또는 최신(order="recent") 순으로.
+    다음 페이지가 있는지 알기 위해 limit + 1 행을 읽음. 다른 DB 는 LIKE 로 대신함 (인덱스 없음, score 0).
+    """
+    terms = search_terms(query)
+    recent = model.id.desc()
+    if dialect == "mysql":
+        # ngram 파서는 단어를 2글자 조각 구(phrase)로 바꿔 찾으므로 "+단어" 는 단어가 들어간 메시지 (중간 일치 포함)
+        match = mysql_match(model.content, against=" ".join(f'+"{t}"' for t in terms)).in_boolean_mode()
+        stmt = select(*_columns(model), match.label("score")).where(match)
+    elif dialect == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"))
+        match = text(f"{FTS_TABLE} MATCH :match").bindparams(
+            match=" AND ".join(f'"{t}"*' for t in terms),
+        )
+        # bm25 는 작을수록 관련도가 높으므로 부호를 바꿔 큰 값이 위로 오게 함
+        score = (-func.bm25(literal_column(FTS_TABLE))).label("score")
+        stmt = (
+            select(*_columns(model), score)
+            .select_from(fts.join(model, model.id == fts.c.rowid))
+            .where(match)
+        )
+        # FTS5 는 rowid 역순으로 바로 읽을 수 있어 흔한 단어도 limit 만큼만 보고 멈춤
+        recent = fts.c.rowid.desc()
+    else:
+        stmt = select(*_columns(model), literal(0.0).label("score")).where(
+            and_(*(model.content.contains(t, autoescape=True) for t in terms))
+        )
+
+    if speaker is not None:
+        stmt = stmt.where(model.speaker == speaker)
+    if intent is not None:
+        stmt = stmt.where(model.intent == intent)
+    if since is not None:
+        stmt = stmt.where(model.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(model.created_at < until)
+
+    # 관련도 순은 일치하는 행을 모두 점수 매김 (흔한 단어는 필터를 함께 쓰거나 최신 순이 빠름)
+    if order == "rank":
+        stmt = stmt.order_by(literal_column("score").desc(), model.id.desc())
+    else:
+        # id 는 저장 순서 = 시간 순서 (created_at 인덱스 없이 전문 검색 결과를 그대로 정렬)
+        stmt = stmt.order_by(recent)
+    return stmt.limit(limit + 1).offset(offset)
+
+
+def _columns(model):
+    return (model.id, model.speaker, model.content, model.created_at, model.intent)
+
+
+def build_search_page(rows, limit: int, offset: int) -> dict:
+    has_more = len(rows) > limit
+    return {
+        "items": [
+            {**message_to_dict(r), "intent": r.intent, "score": round(float(r.score), 4)}
+            for r in rows[:limit]
+        ],
+        "next_offset": offset + limit if has_more and offset + limit <= SEARCH_MAX_OFFSET else None,
+    }
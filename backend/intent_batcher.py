@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import INTENT_BATCH_SIZE
+
+
+# 동시에 들어온 분류 요청을 모아서 한 번의 패딩된 배치로 추론하는 스케줄러
+class Intent_Batcher:
+    def __init__(self, predict_batch, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        predict_batch : list[str] → list[결과] 를 반환하는 함수 (입력 순서 유지)
+        max_batch_size: 한 배치에 담을 최대 요청 수
+        max_wait_ms   : 첫 요청이 들어온 뒤 배치를 채우기 위해 기다리는 최대 시간
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="intent-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """text 를 대기열에 넣고, 배치 추론이 끝나면 결과가 채워지는 Future 반환."""
+        if self._closed:
+            raise RuntimeError("Intent_Batcher 가 이미 종료되었습니다.")
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def close(self, timeout: float | None = 5.0):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(text, fut) for text, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            INTENT_BATCH_SIZE.observe(len(batch))
+            try:
+                results = self.predict_batch([text for text, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
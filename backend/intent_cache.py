@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from response_cache import normalize_input
+
+# 의도 분류 결과 메모이제이션 (같은 AI 응답이 자주 반복되므로 모델 추론을 건너뜀)
+#   INTENT_CACHE_SIZE : 최대 항목 수 (0 이면 끔, 가득 차면 가장 오래 안 쓴 항목부터 교체)
+#   INTENT_CACHE_PATH : 비어 있지 않으면 종료 시 저장하고 시작 시 불러옴 (문장 원문이 아닌 해시만 저장)
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "10000"))
+INTENT_CACHE_PATH = os.getenv("INTENT_CACHE_PATH", "")
+
+# 정규화 방식이 바뀌면 올려서 저장된 캐시를 무효화
+INTENT_CACHE_VERSION = 1
+
+
+def text_key(text: str) -> str:
+    return hashlib.blake2b(normalize_input(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def model_fingerprint(*parts) -> str:
+    """
+    모델 식별값. 디렉토리는 안의 파일 경로·크기·수정 시각으로, 나머지는 문자열로 합침.
+    다시 학습해서 모델 파일이 바뀌면 값이 달라져 저장된 캐시를 버림.
+    """
+    h = hashlib.blake2b(f"v{INTENT_CACHE_VERSION}".encode(), digest_size=16)
+    for part in parts:
+        part = str(part)
+        if os.path.isdir(part):
+            for root, dirs, files in os.walk(part):
+                dirs.sort()
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    h.update(f"{os.path.relpath(path, part)}:{st.st_size}:{st.st_mtime_ns}".encode())
+        else:
+            h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# 정규화된 문장 해시 → 원본 라벨(LABEL_n) LRU
+class Intent_Cache:
+    def __init__(self, fingerprint: str, max_entries: int = INTENT_CACHE_SIZE, path: str = INTENT_CACHE_PATH):
+        """fingerprint: 지금 메모리에 올라온 모델의 식별값 (저장 파일과 다르면 불러오지 않음)."""
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            label = self._entries.get(key)
+            if label is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return label
+
+    def set(self, key: str, label: str):
+        with self._lock:
+            self._entries[key] = label
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self._entries),
+        }
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 의도 캐시 불러오기 실패: {e}")
+            return
+        if payload.get("fingerprint") != self.fingerprint:
+            print("♻️ 의도 분류 모델이 바뀌어 저장된 의도 캐시를 버립니다.")
+            return
+        with self._lock:
+            for key, label in payload["entries"][-self.max_entries:]:
+                self._entries[key] = label
+        print(f"✅ 의도 캐시 불러옴: {len(self._entries)}개")
+
+    def save(self):
+        with self._lock:
+            entries = list(self._entries.items())
+        # 워커마다 다른 임시 파일에 쓴 뒤 바꿔치기 (여러 워커가 동시에 종료해도 서로의 파일을 덮어쓰지 않음)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint, "entries": entries}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def close(self):
+        if self.path:
+            self.save()
@@ -0,0 +1,162 @@
+# 의도 분류 사이드카
+#
+# 모델을 이 프로세스 하나에만 올리고, uvicorn 워커들은 로컬 소켓으로 분류를 요청함.
+# 여러 워커에서 온 요청이 사이드카의 Intent_Batcher 에서 한 배치로 합쳐짐.
+#
+#   INTENT_BACKEND=int8 python intent_server.py
+#   INTENT_BACKEND=remote uvicorn main:app --workers 8
+#
+# 프로토콜: 한 줄에 JSON 하나
+#   요청 {"texts": ["...", ...]}  →  응답 {"labels": ["LABEL_2", ...]} 또는 {"error": "..."}
+import asyncio
+import json
+import os
+import socket
+import threading
+
+# "host:port" 또는 "unix:/path/to.sock"
+INTENT_SERVER_ADDR    = os.getenv("INTENT_SERVER_ADDR", "127.0.0.1:8765")
+INTENT_SERVER_TIMEOUT = float(os.getenv("INTENT_SERVER_TIMEOUT", "10"))
+# 요청 한 줄의 최대 바이트 수 (asyncio 기본 64KiB 는 긴 답변 배치에 모자람). 클라이언트도 이보다 큰 요청은 보내지 않음
+INTENT_SERVER_MAX_LINE = int(os.getenv("INTENT_SERVER_MAX_LINE", str(16 * 1024 * 1024)))
+
+
+def _connect(addr: str, timeout: float) -> socket.socket:
+    if addr.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(addr[len("unix:"):])
+        return sock
+    host, port = addr.rsplit(":", 1)
+    sock = socket.create_connection((host, int(port)), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+# transformers pipeline 과 같은 모양([[{"label": ...}]])으로 결과를 돌려주는 클라이언트
+class Remote_Intent_Client:
+    def __init__(self, addr: str = INTENT_SERVER_ADDR, timeout: float = INTENT_SERVER_TIMEOUT,
+                 max_line: int = INTENT_SERVER_MAX_LINE):
+        self.addr = addr
+        self.timeout = timeout
+        self.max_line = max_line
+        self._local = threading.local()
+        # 사이드카가 떠 있지 않으면 여기서 실패 → TEXT_Embed 가 로드 실패로 처리
+        self._conn()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = _connect(self.addr, self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def _request(self, texts: list[str]) -> list[str]:
+        payload = json.dumps({"texts": texts}, ensure_ascii=False).encode("utf-8") + b"\n"
+        if len(payload) > self.max_line:
+            raise RuntimeError(f"요청이 너무 큽니다 ({len(payload)} > {self.max_line} 바이트).")
+        for attempt in range(2):
+            try:
+                sock, reader = self._conn()
+                sock.sendall(payload)
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError("사이드카 연결이 끊어졌습니다.")
+                break
+            except OSError:
+                self._drop()
+                if attempt:
+                    raise
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["labels"]
+
+    def __call__(self, texts, batch_size=None):
+        labels = self._request([texts] if isinstance(texts, str) else list(texts))
+        return [[{"label": label}] for label in labels]
+
+    def close(self):
+        self._drop()
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes | None:
+    """요청 한 줄 (연결이 끝나면 b""). 한도를 넘는 줄은 끝까지 읽어 버리고 None → 다음 요청과 어긋나지 않음."""
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+    try:
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+    except asyncio.IncompleteReadError:
+        return b""
+
+
+async def _handle(embedder, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while (line := await _read_line(reader)) != b"":
+            try:
+                if line is None:
+                    raise ValueError(f"요청이 INTENT_SERVER_MAX_LINE({INTENT_SERVER_MAX_LINE} 바이트)보다 큽니다.")
+                texts = json.loads(line)["texts"]
+                if embedder.batcher is not None:
+                    labels = await asyncio.gather(
+                        *(asyncio.wrap_future(embedder.batcher.submit(t)) for t in texts)
+                    )
+                else:
+                    labels = await asyncio.to_thread(embedder.predict_batch, texts)
+                reply = {"labels": list(labels)}
+            except Exception as e:
+                reply = {"error": str(e)}
+            writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(addr: str = INTENT_SERVER_ADDR):
+    from text_embed_9 import INTENT_BACKEND, TEXT_Embed
+
+    if INTENT_BACKEND == "remote":
+        raise RuntimeError("❌ 사이드카는 INTENT_BACKEND=eager, int8, student 중 하나로 실행해야 합니다.")
+    embedder = TEXT_Embed()
+    if embedder.clf is None:
+        raise RuntimeError("❌ 의도 분류기를 불러오지 못했습니다.")
+
+    handler = lambda r, w: _handle(embedder, r, w)
+    if addr.startswith("unix:"):
+        path = addr[len("unix:"):]
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(handler, path=path, limit=INTENT_SERVER_MAX_LINE)
+    else:
+        host, port = addr.rsplit(":", 1)
+        server = await asyncio.start_server(handler, host, int(port), limit=INTENT_SERVER_MAX_LINE)
+    print(f"✅ 의도 분류 사이드카 시작: {addr}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        embedder.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
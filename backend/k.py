@@ -1,15 +1,18 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import openai
 import os
 from dotenv import load_dotenv
 
-# ▼ 추가: 구글 감정분석 라이브러리
-from google.cloud import language_v2
+from conversation import Conversation_Store, build_messages, new_conversation_id
 
-# (1) Google 서비스 계정 키 환경변수 설정
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"C:\Path\chatbot-454403-a78c4d9ba772.json"
+# ▼ 추가: 감정분석 엔진 (공유 클라이언트, 배치 API, 로컬 모델 백엔드)
+from sentiment import SentimentData, get_sentiment_engine
+
+# (1) Google 서비스 계정 키 환경변수 설정 (이미 지정돼 있으면 그대로 사용)
+os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", r"C:\Path\chatbot-454403-a78c4d9ba772.json")
 
 # (2) .env 파일 로드
 load_dotenv()
@@ -22,6 +25,14 @@ if not OPENAI_API_KEY:
 # (4) 구버전 OpenAI 클라이언트 초기화 (옛날 방식)
 client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
+# 한 번의 /sentiment/batch 요청에 담을 수 있는 최대 문장 수
+SENTIMENT_BATCH_MAX_TEXTS = 100
+# OpenAI 응답이 나온 뒤 감정분석 결과를 더 기다리는 최대 시간(초). 넘으면 sentiment 없이 응답
+SENTIMENT_WAIT_SECONDS    = float(os.getenv("SENTIMENT_WAIT_SECONDS", "1"))
+
+# 감정분석을 OpenAI 호출과 동시에 돌리는 스레드 풀
+sentiment_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-sentiment")
+
 # FastAPI 앱 생성
 app = FastAPI()
 
@@ -33,96 +44,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ 대화 기록 저장 (전역 변수)
-chat_history = []
-
-# (A) 감정분석 결과를 담을 모델 정의
-class SentenceSentiment(BaseModel):
-    text: str
-    score: float
-    magnitude: float
-
-class SentimentData(BaseModel):
-    document_score: float
-    document_magnitude: float
-    language: str
-    sentences: list[SentenceSentiment]
+# ✅ 대화별 기록 저장 (LRU 로 대화 수 제한, 대화마다 토큰 예산 안의 최근 턴만 유지)
+conversations = Conversation_Store()
 
 # (B) 요청/응답 데이터 모델
 class ChatRequest(BaseModel):
     user_input: str
+    conversation_id: str | None = None
 
 class ChatResponse(BaseModel):
     response: str
     sentiment: SentimentData | None
+    conversation_id: str | None = None
 
-# (C) 구글 감정분석 함수
-def analyze_sentiment(text: str) -> SentimentData:
-    """
-    Google Cloud Natural Language API를 이용해
-    text에 대한 감정분석 결과를 SentimentData 형태로 반환.
-    """
-    client_nlp = language_v2.LanguageServiceClient()
-
-    document = {
-        "content": text,
-        "type_": language_v2.Document.Type.PLAIN_TEXT,
-    }
-
-    response = client_nlp.analyze_sentiment(
-        request={"document": document, "encoding_type": language_v2.EncodingType.UTF8}
-    )
-
-    doc_score = response.document_sentiment.score
-    doc_magnitude = response.document_sentiment.magnitude
-    language = response.language_code
-
-    sentences_list = []
-    for s in response.sentences:
-        sentences_list.append(
-            SentenceSentiment(
-                text=s.text.content,
-                score=s.sentiment.score,
-                magnitude=s.sentiment.magnitude
-            )
-        )
+class SentimentBatchRequest(BaseModel):
+    texts: list[str] = Field(..., max_length=SENTIMENT_BATCH_MAX_TEXTS)
 
-    return SentimentData(
-        document_score=doc_score,
-        document_magnitude=doc_magnitude,
-        language=language,
-        sentences=sentences_list
-    )
+# (C) 감정분석 함수 (SENTIMENT_BACKEND=off 면 None)
+#   클라이언트는 프로세스에서 한 번만 만들어 재사용 (요청마다 gRPC 채널 + 인증을 새로 맺지 않음)
+def analyze_sentiment(text: str) -> SentimentData | None:
+    engine = get_sentiment_engine()
+    return engine.analyze(text) if engine is not None else None
 
 # (D) OpenAI + 감정분석 통합 엔드포인트
 @app.post("/chat", response_model=ChatResponse)
 def chat_endpoint(request: ChatRequest):
     """
-    1) 사용자 입력에 대해 Google 감정분석
-    2) OpenAI (구버전: client.chat.completions.create) 호출
-    3) 결과(모델 응답 + 감정분석)를 반환
+    1) 사용자 입력에 대해 Google 감정분석 시작 (백그라운드 스레드)
+    2) 그동안 OpenAI (구버전: client.chat.completions.create) 호출
+    3) 결과(모델 응답 + 감정분석)를 반환 (감정분석이 늦거나 실패하면 sentiment 는 null)
     """
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=500, detail="OpenAI API 키가 설정되지 않았습니다.")
 
     try:
         user_input = request.user_input
+        conversation_id = request.conversation_id or new_conversation_id()
+        state = conversations.get_or_create(conversation_id)
         print(f"👤 사용자 입력: {user_input}")
 
-        # (1) 구글 감정분석
-        try:
-            sentiment_result = analyze_sentiment(user_input)
-            print(f"💬 감정분석 결과: {sentiment_result}")
-        except Exception as e:
-            print(f"⚠️ 감정분석 실패: {e}")
-            sentiment_result = None
+        # (1) 구글 감정분석은 OpenAI 호출과 겹쳐서 실행
+        sentiment_future = sentiment_pool.submit(analyze_sentiment, user_input)
 
-        # (2) 이전 대화 기록 + 이번 메시지를 포함한 messages 생성
-        messages = [
-            {"role": "system", "content": "귀엽고 깝찍한 캐릭터야, 유쾌하고 재미있게 대화해줘"}
-        ]
-        messages.extend(chat_history)
-        messages.append({"role": "user", "content": user_input})
+        # (2) 이 대화의 최근 기록(토큰 예산 안) + 이번 메시지를 포함한 messages 생성
+        messages = build_messages(
+            state, "귀엽고 깝찍한 캐릭터야, 유쾌하고 재미있게 대화해줘", user_input
+        )
 
         # (3) OpenAI 호출
         response = client.chat.completions.create(
@@ -134,14 +101,27 @@ def chat_endpoint(request: ChatRequest):
         ai_response = response.choices[0].message.content
         print(f"🤖 OpenAI 응답: {ai_response}")
 
-        # (4) 대화 기록 갱신
-        chat_history.append({"role": "user", "content": user_input})
-        chat_history.append({"role": "assistant", "content": ai_response})
+        try:
+            sentiment_result = sentiment_future.result(timeout=SENTIMENT_WAIT_SECONDS)
+            print(f"💬 감정분석 결과: {sentiment_result}")
+        except FutureTimeoutError:
+            print(f"⚠️ 감정분석 시간 초과 ({SENTIMENT_WAIT_SECONDS}s)")
+            sentiment_result = None
+        except Exception as e:
+            print(f"⚠️ 감정분석 실패: {e}")
+            sentiment_result = None
+
+        # (4) 대화 기록 갱신 (예산을 넘는 오래된 턴은 버림)
+        state.append([
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": ai_response},
+        ], fold=False)
 
         # (5) 반환 (모델 응답 + 감정분석 결과)
         return {
             "response": ai_response,
-            "sentiment": sentiment_result
+            "sentiment": sentiment_result,
+            "conversation_id": conversation_id
         }
 
     except Exception as e:
@@ -150,3 +130,11 @@ def chat_endpoint(request: ChatRequest):
             "response": "오류 발생: OpenAI API를 사용할 수 없습니다.",
             "sentiment": None
         }
+
+# (E) 감정분석 배치 엔드포인트 (지난 대화 백필용, 실패한 문장은 null)
+@app.post("/sentiment/batch")
+def sentiment_batch_endpoint(request: SentimentBatchRequest):
+    engine = get_sentiment_engine()
+    if engine is None:
+        raise HTTPException(status_code=503, detail="감정분석이 꺼져 있습니다.")
+    return {"results": engine.analyze_batch(request.texts), "stats": engine.stats()}
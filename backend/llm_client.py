@@ -0,0 +1,29 @@
+import os
+
+import httpx
+from openai import AsyncOpenAI
+
+# 커넥션 풀 설정 (워커 하나가 OpenAI 로 동시에 열 수 있는 연결 수)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE   = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_TIMEOUT         = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_POOL_TIMEOUT    = float(os.getenv("OPENAI_POOL_TIMEOUT", "10"))
+
+
+def create_async_client(api_key: str, base_url: str | None = None) -> AsyncOpenAI:
+    """
+    크기가 제한된 httpx 커넥션 풀을 공유하는 AsyncOpenAI 클라이언트를 생성.
+    base_url 이 없으면 OPENAI_BASE_URL 환경변수(또는 기본 OpenAI 주소)를 사용.
+    """
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, pool=OPENAI_POOL_TIMEOUT),
+    )
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+        http_client=http_client,
+    )
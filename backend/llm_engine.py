@@ -0,0 +1,295 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+
+# 로컬 LLM (gpt4all) 설정. 모델 파일이 수 GB 라서 LOCAL_LLM=1 일 때만 로드
+LOCAL_LLM            = os.getenv("LOCAL_LLM", "0") == "1"
+LOCAL_LLM_MODEL      = os.getenv("LOCAL_LLM_MODEL", "Meta-Llama-3-8B-Instruct.Q4_0.gguf")
+LOCAL_LLM_MODEL_DIR  = os.getenv("LOCAL_LLM_MODEL_DIR") or None
+LOCAL_LLM_THREADS    = int(os.getenv("LOCAL_LLM_THREADS", "0")) or None
+LOCAL_LLM_MAX_TOKENS = int(os.getenv("LOCAL_LLM_MAX_TOKENS", "256"))
+# 로컬 모델 동시 생성 수 (CPU 하나에서는 1 이 가장 빠름, 슬롯마다 모델을 따로 올림) / 이보다 많이 대기 중이면 로컬로 보내지 않음
+LOCAL_LLM_CONCURRENCY = int(os.getenv("LOCAL_LLM_CONCURRENCY", "1"))
+LOCAL_LLM_MAX_QUEUE   = int(os.getenv("LOCAL_LLM_MAX_QUEUE", "4"))
+
+# 라우팅 기준 (기본 엔진 = OpenAI)
+#   LLM_LATENCY_BUDGET_MS : 최근 성공 호출의 지연 중앙값이 이보다 길면 로컬로
+#   LLM_MAX_QUEUE_DEPTH   : OpenAI 로 진행 중인 요청이 이만큼이면 로컬로
+#   LLM_ERROR_RATE        : 최근 LLM_HEALTH_WINDOW 건 중 실패 비율이 이 이상이면 로컬로
+#   LLM_PROBE_RATE        : 로컬로 돌리는 중에도 이 비율만큼은 OpenAI 로 보내 회복 여부를 확인
+LLM_LATENCY_BUDGET_MS = float(os.getenv("LLM_LATENCY_BUDGET_MS", "8000"))
+LLM_MAX_QUEUE_DEPTH   = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "200"))
+LLM_ERROR_RATE        = float(os.getenv("LLM_ERROR_RATE", "0.5"))
+LLM_HEALTH_WINDOW     = int(os.getenv("LLM_HEALTH_WINDOW", "50"))
+LLM_HEALTH_MIN_SAMPLES = 5
+LLM_PROBE_RATE        = float(os.getenv("LLM_PROBE_RATE", "0.1"))
+
+_DONE = object()
+
+
+# OpenAI Chat Completions 엔진 (동시성·속도 제한·재시도는 Upstream_Manager 가 담당)
+class OpenAI_Engine:
+    name = "openai"
+
+    def __init__(self, upstream, model: str):
+        self.upstream = upstream
+        self.model = model
+
+    async def complete(self, messages: list[dict], temperature: float, max_tokens: int | None = None) -> str:
+        response = await self.upstream.complete(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            **({"max_tokens": max_tokens} if max_tokens else {}),
+        )
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages: list[dict], temperature: float, max_tokens: int | None = None):
+        async for chunk in self.upstream.stream(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            **({"max_tokens": max_tokens} if max_tokens else {}),
+        ):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+def split_messages(messages: list[dict]) -> tuple[str, str]:
+    """OpenAI 형식 메시지 → (system prompt, 이전 대화를 포함한 마지막 사용자 프롬프트)."""
+    system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+    dialogue = [m for m in messages if m["role"] != "system"]
+    *history, last = dialogue
+    if not history:
+        return system, last["content"]
+    transcript = "\n".join(
+        f"{'사용자' if m['role'] == 'user' else 'AI'}: {m['content']}" for m in history
+    )
+    return system, f"{transcript}\n사용자: {last['content']}"
+
+
+# gpt4all 로컬 엔진 (CPU 에서 블로킹으로 생성 → 스레드에서 실행)
+#   GPT4All 인스턴스와 chat_session 은 스레드 안전하지 않으므로 동시 생성 슬롯마다 모델을 하나씩 두고,
+#   한 슬롯의 호출(스트리밍 중 next 포함)은 그 슬롯 전용 스레드 하나에서만 실행
+class GPT4All_Engine:
+    name = "local"
+
+    def __init__(self, model_name: str = LOCAL_LLM_MODEL, model_path: str | None = LOCAL_LLM_MODEL_DIR,
+                 n_threads: int | None = LOCAL_LLM_THREADS, max_tokens: int = LOCAL_LLM_MAX_TOKENS,
+                 concurrency: int = LOCAL_LLM_CONCURRENCY):
+        from gpt4all import GPT4All
+
+        concurrency = max(1, concurrency)
+        self._slots = [
+            (GPT4All(model_name, model_path=model_path, n_threads=n_threads, device="cpu"),
+             ThreadPoolExecutor(max_workers=1, thread_name_prefix="gpt4all"))
+            for _ in range(concurrency)
+        ]
+        self._free = list(self._slots)
+        self.max_tokens = max_tokens
+        self._limiter = anyio.CapacityLimiter(concurrency)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._limiter.borrowed_tokens + self._limiter.statistics().tasks_waiting
+
+    def _generate(self, model, messages: list[dict], temperature: float, max_tokens: int | None):
+        system, prompt = split_messages(messages)
+        with model.chat_session(system_prompt=system):
+            yield from model.generate(
+                prompt,
+                max_tokens=max_tokens or self.max_tokens,
+                temp=temperature,
+                streaming=True,
+            )
+
+    async def complete(self, messages: list[dict], temperature: float, max_tokens: int | None = None) -> str:
+        async with self._limiter:
+            model, executor = slot = self._free.pop()
+            try:
+                text = await asyncio.get_running_loop().run_in_executor(
+                    executor, lambda: "".join(self._generate(model, messages, temperature, max_tokens))
+                )
+            finally:
+                self._free.append(slot)
+        return text.strip()
+
+    async def stream(self, messages: list[dict], temperature: float, max_tokens: int | None = None):
+        async with self._limiter:
+            model, executor = slot = self._free.pop()
+            loop = asyncio.get_running_loop()
+            tokens = self._generate(model, messages, temperature, max_tokens)
+            try:
+                while True:
+                    token = await loop.run_in_executor(executor, next, tokens, _DONE)
+                    if token is _DONE:
+                        break
+                    yield token
+            finally:
+                # 취소돼도 같은 스레드에서 진행 중인 next 뒤에 닫기가 이어서 실행되므로, 다음 요청은 그 뒤에 시작됨
+                close = loop.run_in_executor(executor, tokens.close)
+                self._free.append(slot)
+                await close
+
+    def close(self):
+        for model, executor in self._slots:
+            executor.shutdown(wait=True)
+            model.close()
+
+
+# 최근 호출 결과(성공 여부, 지연)를 창 단위로 집계
+class Engine_Health:
+    def __init__(self, window: int = LLM_HEALTH_WINDOW):
+        self.outcomes = deque(maxlen=window)
+        self.in_flight = 0
+
+    def record(self, ok: bool, latency: float):
+        self.outcomes.append((ok, latency))
+
+    def error_rate(self) -> float:
+        if len(self.outcomes) < LLM_HEALTH_MIN_SAMPLES:
+            return 0.0
+        return sum(1 for ok, _ in self.outcomes if not ok) / len(self.outcomes)
+
+    def latency_ms(self) -> float:
+        latencies = [latency for ok, latency in self.outcomes if ok]
+        if len(latencies) < LLM_HEALTH_MIN_SAMPLES:
+            return 0.0
+        latencies.sort()
+        return latencies[len(latencies) // 2] * 1000
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "error_rate": round(self.error_rate(), 4),
+            "p50_latency_ms": round(self.latency_ms(), 1),
+        }
+
+
+# 요청마다 엔진을 고르는 라우터
+#   기본은 primary(OpenAI). 지연 예산 초과 / 대기열 과다 / 오류율 상승 시 fallback(로컬) 으로 보내고,
+#   primary 호출이 실패하면 같은 요청을 fallback 으로 한 번 더 시도
+class LLM_Router:
+    def __init__(self, primary, fallback=None, latency_budget_ms: float = LLM_LATENCY_BUDGET_MS,
+                 max_queue_depth: int = LLM_MAX_QUEUE_DEPTH, error_rate: float = LLM_ERROR_RATE,
+                 probe_rate: float = LLM_PROBE_RATE, fallback_max_queue: int = LOCAL_LLM_MAX_QUEUE):
+        """
+        fallback: 로컬 엔진을 돌려주는 인자 없는 함수 (아직 로드 중이거나 없으면 None).
+                  모델 로드가 끝나기 전에도 OpenAI 로는 바로 응답할 수 있게 함수로 받음.
+        """
+        self.primary = primary
+        self.fallback = fallback or (lambda: None)
+        self.latency_budget_ms = latency_budget_ms
+        self.max_queue_depth = max_queue_depth
+        self.error_rate = error_rate
+        self.probe_rate = probe_rate
+        self.fallback_max_queue = fallback_max_queue
+        self.health = {primary.name: Engine_Health()}
+        self.routes = {}
+
+    def _health(self, engine) -> Engine_Health:
+        return self.health.setdefault(engine.name, Engine_Health())
+
+    def _available_fallback(self):
+        engine = self.fallback()
+        if engine is None or engine.queue_depth >= self.fallback_max_queue:
+            return None
+        return engine
+
+    def route_reason(self) -> str | None:
+        """fallback 으로 보내야 하면 그 이유, 아니면 None."""
+        health = self.health[self.primary.name]
+        if health.in_flight >= self.max_queue_depth:
+            return "queue_depth"
+        degraded = (
+            "error_rate" if health.error_rate() >= self.error_rate
+            else "latency" if health.latency_ms() > self.latency_budget_ms
+            else None
+        )
+        if degraded and random.random() < self.probe_rate:
+            return None
+        return degraded
+
+    def _count(self, route: str):
+        self.routes[route] = self.routes.get(route, 0) + 1
+
+    def pick(self):
+        fallback = self._available_fallback()
+        reason = self.route_reason() if fallback is not None else None
+        if reason:
+            self._count(f"{fallback.name}:{reason}")
+            return fallback
+        self._count(self.primary.name)
+        return self.primary
+
+    def _engines(self):
+        engine = self.pick()
+        yield engine
+        fallback = self._available_fallback() if engine is self.primary else None
+        if fallback is not None:
+            self._count(f"{fallback.name}:primary_failed")
+            yield fallback
+
+    async def complete(self, messages: list[dict], temperature: float,
+                       max_tokens: int | None = None) -> tuple[str, str]:
+        """(응답, 응답한 엔진 이름)."""
+        error = None
+        for engine in self._engines():
+            health = self._health(engine)
+            health.in_flight += 1
+            start = time.perf_counter()
+            try:
+                text = await engine.complete(messages, temperature, max_tokens)
+            except Exception as e:
+                health.record(False, time.perf_counter() - start)
+                print(f"⚠️ LLM 호출 실패 ({engine.name}): {e}")
+                error = e
+                continue
+            finally:
+                health.in_flight -= 1
+            health.record(True, time.perf_counter() - start)
+            return text, engine.name
+        raise error
+
+    async def stream(self, messages: list[dict], temperature: float):
+        """(엔진 이름, 토큰) 을 생성. 첫 토큰 전에 실패한 경우에만 fallback 으로 재시도."""
+        error = None
+        for engine in self._engines():
+            health = self._health(engine)
+            health.in_flight += 1
+            start = time.perf_counter()
+            started = False
+            try:
+                async for delta in engine.stream(messages, temperature):
+                    started = True
+                    yield engine.name, delta
+            except Exception as e:
+                health.record(False, time.perf_counter() - start)
+                if started:
+                    raise
+                print(f"⚠️ LLM 스트리밍 실패 ({engine.name}): {e}")
+                error = e
+                continue
+            finally:
+                health.in_flight -= 1
+            health.record(True, time.perf_counter() - start)
+            return
+        raise error
+
+    def stats(self) -> dict:
+        return {
+            "engines": {name: health.stats() for name, health in self.health.items()},
+            "routes": dict(self.routes),
+        }
+
+
+def create_local_engine() -> GPT4All_Engine | None:
+    return GPT4All_Engine() if LOCAL_LLM else None
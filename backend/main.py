@@ -1,27 +1,165 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import anyio
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from openai import OpenAI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import Literal
 from dotenv import load_dotenv
 import os
 
-from text_sql_9 import Text_SQL
+from chat_log import Chat_Log_Writer
+from enrichment import Enrichment_Pipeline
+from conversation import (
+    CONVERSATION_LOAD_TURNS, SUMMARY_TOKEN_BUDGET,
+    Conversation_Manager, Conversation_Store, build_messages,
+)
+from llm_client import create_async_client
+from llm_engine import LLM_Router, OpenAI_Engine, create_local_engine
+from metrics import STAGE_SECONDS, Metrics_Middleware, Stats_Collector, render_metrics, stage, timed
+from history_search import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, SEARCH_MAX_OFFSET
+from pagination import HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT
+from rollups import stats_range, style_id
+from response_cache import cache_key, create_response_cache, temperature_bucket
+from semantic_cache import create_semantic_cache, namespace_id
+from sentiment import SentimentData, create_sentiment_engine
+from services import Service_Registry
+from upstream import Upstream_Manager, Upstream_Rejected
+from text_sql_9 import Async_Text_SQL
 from text_embed_9 import TEXT_Embed
-from security import get_password_by_username, user_exists
+from security import SESSION_TTL_SECONDS, User_Store
 
 # 환경 설정
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("❌ OpenAI API 키가 없습니다.")
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-# 클래스 인스턴스
-db = Text_SQL()
-embedder = TEXT_Embed()
+# OpenAI 호출 설정
+CHAT_MODEL       = "gpt-3.5-turbo"
+CHAT_TEMPERATURE = 0.7
+
+# 시작 시 분류기로 한 번 추론해서 첫 요청의 지연을 없앰
+WARMUP_INFERENCE = os.getenv("WARMUP_INFERENCE", "1") == "1"
+
+# 부가 처리 단계 (응답과 독립적으로 동시에 실행, 시간 초과·실패 시 null 로 응답)
+#   ENRICH_USER_INTENT : 사용자 입력 의도 분류 (LLM 호출과 겹쳐 실행)
+#   ENRICH_SENTIMENT   : 사용자 입력 감정 분석 (sentiment.py, SENTIMENT_BACKEND 설정 사용)
+#   ENRICH_MODERATION  : OpenAI moderation 으로 사용자 입력 검사
+#   ENRICH_*_TIMEOUT   : 단계별 제한 시간(초). 저장은 제한 시간이 지나도 취소하지 않고 기다리기만 멈춤
+ENRICH_USER_INTENT        = os.getenv("ENRICH_USER_INTENT", "1") == "1"
+ENRICH_SENTIMENT          = os.getenv("ENRICH_SENTIMENT", "0") == "1"
+ENRICH_MODERATION         = os.getenv("ENRICH_MODERATION", "0") == "1"
+ENRICH_INTENT_TIMEOUT     = float(os.getenv("ENRICH_INTENT_TIMEOUT", "2"))
+ENRICH_SENTIMENT_TIMEOUT  = float(os.getenv("ENRICH_SENTIMENT_TIMEOUT", "3"))
+ENRICH_MODERATION_TIMEOUT = float(os.getenv("ENRICH_MODERATION_TIMEOUT", "3"))
+ENRICH_PERSIST_TIMEOUT    = float(os.getenv("ENRICH_PERSIST_TIMEOUT", "5"))
+
+# 클래스 인스턴스 (연결/모델 로드는 lifespan 에서 백그라운드로, 또는 첫 사용 시)
+async def create_adb():
+    adb = Async_Text_SQL()
+    await adb.init()
+    return adb
+
+def create_embedder():
+    embedder = TEXT_Embed()
+    if WARMUP_INFERENCE and embedder.clf is not None:
+        embedder.classify_intent("안녕하세요")
+    return embedder
+
+# OpenAI 클라이언트 + 동시성·속도 제한·재시도·중복 요청 합치기
+async def create_upstream():
+    client = await services.get("client")
+    return Upstream_Manager(client)
+
+# OpenAI 를 기본으로, 로컬 gpt4all(LOCAL_LLM=1) 을 대체 엔진으로 쓰는 라우터
+#   로컬 모델은 백그라운드에서 로드되고, 로드가 끝난 뒤부터 라우팅 대상이 됨
+async def create_llm():
+    upstream = await services.get("upstream")
+    return LLM_Router(OpenAI_Engine(upstream, CHAT_MODEL), lambda: services.peek("local_llm"))
+
+# 창 밖으로 밀려난 턴을 누적 요약에 합치는 요약기
+async def summarize_turns(summary: str, turns: list[dict]) -> str:
+    llm = await services.get("llm")
+    dialogue = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    with stage("summarize"):
+        summary, _ = await llm.complete(
+            [
+                {"role": "system", "content": "이전 요약과 이어지는 대화를 읽고, 이후 대화에 필요한 사실과 맥락만 남겨 한국어로 짧게 다시 요약해줘."},
+                {"role": "user", "content": f"이전 요약: {summary or '(없음)'}\n\n대화:\n{dialogue}"},
+            ],
+            temperature=0.3,
+            max_tokens=SUMMARY_TOKEN_BUDGET,
+        )
+    return summary
+
+async def create_conversations():
+    adb = await services.get("adb")
+    return Conversation_Manager(
+        Conversation_Store(),
+        load=lambda cid: adb.load_conversation(cid, CONVERSATION_LOAD_TURNS),
+        create=adb.create_conversation,
+        summarize=summarize_turns,
+        save_summary=adb.save_summary,
+    )
+
+async def create_users():
+    adb = await services.get("adb")
+    return User_Store(adb)
+
+services = Service_Registry()
+services.register("client", lambda: create_async_client(OPENAI_API_KEY), close=lambda c: c.close())
+services.register("local_llm", create_local_engine, close=lambda e: e.close() if e else None)
+services.register("upstream", create_upstream)
+services.register("llm", create_llm)
+services.register("adb", create_adb, close=lambda d: d.close())
+services.register("embedder", create_embedder, close=lambda e: e.close())
+services.register("conversations", create_conversations)
+services.register("users", create_users)
+services.register("cache", create_response_cache, close=lambda c: c.close() if c else None)
+services.register("semantic_cache", create_semantic_cache, close=lambda c: c.close() if c else None)
+services.register("chat_log", Chat_Log_Writer, close=lambda w: anyio.to_thread.run_sync(w.close))
+services.register(
+    "sentiment", lambda: create_sentiment_engine() if ENRICH_SENTIMENT else None,
+    close=lambda e: anyio.to_thread.run_sync(e.close) if e else None,
+)
+
+# /metrics 에 scrape 시점의 서비스 상태를 노출 (아직 생성 전인 서비스는 건너뜀)
+def peek_stats(name: str, read):
+    def stats():
+        instance = services.peek(name)
+        return read(instance) if instance is not None else None
+    return stats
+
+stats_collector = Stats_Collector()
+stats_collector.register("db", peek_stats("adb", lambda d: d.stats()))
+stats_collector.register("response_cache", peek_stats("cache", lambda c: c.counters()))
+stats_collector.register("semantic_cache", peek_stats("semantic_cache", lambda c: c.stats()))
+stats_collector.register("upstream", peek_stats("upstream", lambda u: u.stats()))
+stats_collector.register("llm", peek_stats("llm", lambda l: l.stats()))
+stats_collector.register("intent", peek_stats("embedder", lambda e: e.stats()))
+stats_collector.register("chat_log", peek_stats("chat_log", lambda w: w.stats()))
+stats_collector.register("sentiment", peek_stats("sentiment", lambda e: e.stats()))
+stats_collector.register("users", peek_stats("users", lambda u: u.stats()))
+stats_collector.register("conversations", peek_stats("conversations", lambda c: {"cached": len(c.store)}))
+
+# 시작: 서비스 백그라운드 워밍업 (서버는 바로 연결을 받음) / 종료: 커넥션 풀 정리
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services.start()
+    yield
+    await services.close()
 
 # FastAPI 초기화
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(Metrics_Middleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,88 +171,435 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     user_input: str
     system_prompt: str
+    user_id: str | None = None
+    # 없으면 새 대화를 시작하고 응답으로 id 를 돌려줌
+    conversation_id: str | None = None
 
 class ChatResponse(BaseModel):
     response: str
     intent: str | None = None
+    conversation_id: str | None = None
+    # 부가 처리 결과 (꺼져 있거나 시간 초과·실패하면 null)
+    user_intent: str | None = None
+    sentiment: SentimentData | None = None
+    moderation: dict | None = None
 
-# 텍스트 파일 저장
-def save_chat_to_file(user_input: str, ai_response: str):
-    with open("chat_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"👤 사용자: {user_input}\n")
-        f.write(f"🤖 AI: {ai_response}\n")
-        f.write("=" * 40 + "\n")
+# 로그에 남길 요청 id (프록시가 붙인 X-Request-ID 가 있으면 그대로 사용)
+def get_request_id(http_request: Request) -> str:
+    return http_request.headers.get("x-request-id") or uuid.uuid4().hex
 
-# /chat 엔드포인트
+# 대화 로그 (대기열에 넣기만 함) + DB 저장 (의도는 분류된 경우에만, 스타일은 system prompt id. 검색 필터·집계용)
+async def persist_chat(request: ChatRequest, conversation_id: str, ai_response: str, request_id: str,
+                       user_intent: str | None = None, intent: str | None = None):
+    adb = await services.get("adb")
+    chat_log = await services.get("chat_log")
+    with stage("save_file"):
+        chat_log.log_chat(
+            request.user_input, ai_response,
+            request_id=request_id, conversation_id=conversation_id, user_id=request.user_id,
+        )
+    style = style_id(request.system_prompt)
+    await asyncio.gather(
+        timed("save_db", adb.save_messages(
+            [("user", request.user_input, user_intent), ("assistant", ai_response, intent)],
+            user_id=request.user_id,
+            conversation_id=conversation_id,
+            style=style,
+        )),
+        adb.save_style(style, request.system_prompt),
+    )
+
+# 부가 처리 단계. values: request, conversation_id, request_id (시작 시) + reply (LLM 응답 후) + 앞 단계 결과
+async def enrich_user_intent(values: dict):
+    embedder = await services.get("embedder")
+    return await embedder.aclassify_intent(values["request"].user_input)
+
+async def enrich_sentiment(values: dict):
+    engine = await services.get("sentiment")
+    if engine is None:
+        return None
+    return await anyio.to_thread.run_sync(engine.analyze, values["request"].user_input)
+
+async def enrich_moderation(values: dict):
+    client = await services.get("client")
+    result = (await client.moderations.create(input=values["request"].user_input)).results[0]
+    categories = result.categories.model_dump()
+    return {"flagged": result.flagged, "categories": sorted(k for k, v in categories.items() if v)}
+
+async def enrich_intent(values: dict):
+    embedder = await services.get("embedder")
+    return await embedder.aclassify_intent(values["reply"])
+
+async def enrich_persist(values: dict):
+    await persist_chat(
+        values["request"], values["conversation_id"], values["reply"], values["request_id"],
+        user_intent=values.get("user_intent"), intent=values.get("intent"),
+    )
+
+# 새 단계는 여기에 add() 로 추가 (after 에 적은 입력/단계가 준비되는 즉시 시작하므로 응답 경로가 길어지지 않음)
+enrichment = Enrichment_Pipeline(inputs=("request", "conversation_id", "request_id", "reply"))
+if ENRICH_USER_INTENT:
+    enrichment.add("user_intent", enrich_user_intent, timeout=ENRICH_INTENT_TIMEOUT)
+if ENRICH_SENTIMENT:
+    enrichment.add("sentiment", enrich_sentiment, timeout=ENRICH_SENTIMENT_TIMEOUT)
+if ENRICH_MODERATION:
+    enrichment.add("moderation", enrich_moderation, timeout=ENRICH_MODERATION_TIMEOUT)
+enrichment.add("intent", enrich_intent, after=("reply",), timeout=ENRICH_INTENT_TIMEOUT)
+# 저장은 의도 분류 결과를 함께 남기므로 의도 단계 뒤에 (둘 다 제한 시간이 있어 실패해도 NULL 로 저장됨)
+enrichment.add(
+    "persist", enrich_persist,
+    after=("reply", "intent", *(("user_intent",) if ENRICH_USER_INTENT else ())),
+    timeout=ENRICH_PERSIST_TIMEOUT, detach=True,
+)
+
+def start_enrichment(request: ChatRequest, conversation_id: str, request_id: str):
+    return enrichment.start({"request": request, "conversation_id": conversation_id, "request_id": request_id})
+
+def chat_response(ai_response: str, conversation_id: str, values: dict) -> dict:
+    return {
+        "response": ai_response,
+        "intent": values.get("intent"),
+        "conversation_id": conversation_id,
+        "user_intent": values.get("user_intent"),
+        "sentiment": values.get("sentiment"),
+        "moderation": values.get("moderation"),
+    }
+
+# 요청의 대화를 찾거나 새로 시작 → (conversation_id, 상태)
+async def open_conversation(request: ChatRequest):
+    conversations = await services.get("conversations")
+    if request.conversation_id is None:
+        with stage("conversation"):
+            return await conversations.start(request.user_id)
+    with stage("conversation"):
+        state = await conversations.get_state(request.conversation_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="대화를 찾을 수 없습니다.")
+    if state.user_id is not None and state.user_id != request.user_id:
+        raise HTTPException(status_code=403, detail="다른 사용자의 대화입니다.")
+    return request.conversation_id, state
+
+# 응답이 끝난 턴을 대화 창에 추가하고, 밀려난 턴이 있으면 요약을 예약
+async def record_turn(conversation_id, state, request: ChatRequest, ai_response: str,
+                      background_tasks: BackgroundTasks):
+    conversations = await services.get("conversations")
+    if conversations.record(state, request.user_input, ai_response):
+        background_tasks.add_task(conversations.fold, conversation_id, state)
+
+# 응답 캐시 조회: 정확 일치 → 의미 유사 순서. (캐시된 값 또는 None, 미스일 때 응답을 저장하는 함수)
+#   이전 맥락이 있으면 같은 입력이라도 답이 달라지므로 맥락 없는 첫 턴만 캐시
+async def lookup_cached_response(request: ChatRequest, state):
+    if state.has_context():
+        return None, None
+    cache = await services.get("cache")
+    semantic = await services.get("semantic_cache")
+    key = cache_key(request.system_prompt, request.user_input, CHAT_MODEL, CHAT_TEMPERATURE)
+    if cache is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached, None
 
+    # 같은 스타일(system prompt)·모델·temperature 안에서만 유사 입력을 찾음
+    namespace = namespace_id(request.system_prompt, CHAT_MODEL, temperature_bucket(CHAT_TEMPERATURE))
+    vector = None
+    if semantic is not None:
+        cached, vector = await semantic.get(namespace, request.user_input)
+        if cached is not None:
+            if cache is not None:
+                await cache.set(key, cached)
+            return cached, None
 
+    async def store(value: dict):
+        if cache is not None:
+            await cache.set(key, value)
+        if semantic is not None:
+            await semantic.set(namespace, request.user_input, value, vector)
+
+    return None, store
+
+# /chat 엔드포인트
 @app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request, background_tasks: BackgroundTasks):
+    request_id = get_request_id(http_request)
+    conversation_id = request.conversation_id
     try:
-        messages = [
-            {"role": "system", "content": request.system_prompt},
-            {"role": "user", "content": request.user_input}
-        ]
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.7,
-        )
-        ai_response = response.choices[0].message.content.strip()
-        intent = embedder.classify_intent(ai_response)
+        conversation_id, state = await open_conversation(request)
+        # 사용자 입력만 필요한 단계(의도·감정·검열)는 캐시 조회·LLM 호출과 동시에 시작
+        async with start_enrichment(request, conversation_id, request_id) as enrich:
+            with stage("cache"):
+                cached, store_cache = await lookup_cached_response(request, state)
+            if cached is not None:
+                ai_response = cached["response"]
+                enrich.provide("intent", cached["intent"])
+                enrich.provide("reply", ai_response)
+                await record_turn(conversation_id, state, request, ai_response, background_tasks)
+                return chat_response(ai_response, conversation_id, await enrich.wait())
 
-        # 저장 (파일 + DB)
-        save_chat_to_file(request.user_input, ai_response)
-        db.save_message("user", request.user_input)
-        db.save_message("assistant", ai_response)
+            llm = await services.get("llm")
+            with stage("llm"):
+                ai_response, engine = await llm.complete(
+                    build_messages(state, request.system_prompt, request.user_input),
+                    CHAT_TEMPERATURE,
+                )
+            # 응답 의도 분류 + 저장 (로그 + DB) 이 이어서 동시에 실행
+            enrich.provide("reply", ai_response)
+            await record_turn(conversation_id, state, request, ai_response, background_tasks)
+            values = await enrich.wait()
 
-        return {"response": ai_response, "intent": intent}
+        if store_cache is not None and engine == OpenAI_Engine.name and enrich.status["intent"] == "ok":
+            await store_cache({"response": ai_response, "intent": values["intent"]})
+
+        return chat_response(ai_response, conversation_id, values)
+    except HTTPException:
+        raise
+    except Upstream_Rejected as e:
+        print(f"⚠️ {e}")
+        return {"response": "요청이 많아 잠시 후 다시 시도해주세요.", "intent": None, "conversation_id": conversation_id}
     except Exception as e:
         print(f"❌ 오류 발생: {e}")
-        return {"response": "서버 오류 발생", "intent": None}
+        return {"response": "서버 오류 발생", "intent": None, "conversation_id": conversation_id}
+
+# SSE 이벤트 한 건
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# /chat/stream 엔드포인트 (SSE)
+#   event: token  → {"content": "..."}  (OpenAI 가 생성하는 대로 전달)
+#   event: intent → {"intent": "인사"}   (응답 완료 후 한 번)
+#   event: done   → {"response": "...", "conversation_id": "..."} (전체 응답)
+#   event: error  → {"detail": "..."}
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    request_id = get_request_id(http_request)
+    try:
+        conversation_id, state = await open_conversation(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ 대화 불러오기 실패: {e}")
+        return StreamingResponse(iter([sse_event("error", {"detail": "서버 오류 발생"})]), media_type="text/event-stream")
+    background_tasks = BackgroundTasks()
+    enrich = start_enrichment(request, conversation_id, request_id)
+
+    async def event_stream():
+        try:
+            with stage("cache"):
+                cached, store_cache = await lookup_cached_response(request, state)
+            if cached is not None:
+                # 캐시 적중: 전체 응답을 토큰 하나로 바로 전송
+                ai_response = cached["response"]
+                yield sse_event("token", {"content": ai_response})
+                enrich.provide("intent", cached["intent"])
+                enrich.provide("reply", ai_response)
+                await record_turn(conversation_id, state, request, ai_response, background_tasks)
+                yield sse_event("intent", {"intent": cached["intent"]})
+                yield sse_event("done", {"response": ai_response, "conversation_id": conversation_id})
+                return
+
+            llm = await services.get("llm")
+            chunks = []
+            engine = None
+            start = time.perf_counter()
+            with stage("llm"):
+                async for engine, delta in llm.stream(
+                    build_messages(state, request.system_prompt, request.user_input),
+                    CHAT_TEMPERATURE,
+                ):
+                    if not chunks:
+                        STAGE_SECONDS.labels("llm_first_token").observe(time.perf_counter() - start)
+                    chunks.append(delta)
+                    yield sse_event("token", {"content": delta})
+
+            ai_response = "".join(chunks).strip()
+            enrich.provide("reply", ai_response)
+            await record_turn(conversation_id, state, request, ai_response, background_tasks)
+            intent = (await enrich.wait("intent"))["intent"]
+            if store_cache is not None and engine == OpenAI_Engine.name and enrich.status["intent"] == "ok":
+                await store_cache({"response": ai_response, "intent": intent})
+            yield sse_event("intent", {"intent": intent})
+            yield sse_event("done", {"response": ai_response, "conversation_id": conversation_id})
+        except Upstream_Rejected as e:
+            print(f"⚠️ {e}")
+            yield sse_event("error", {"detail": "요청이 많아 잠시 후 다시 시도해주세요."})
+        except Exception as e:
+            print(f"❌ 스트리밍 오류 발생: {e}")
+            yield sse_event("error", {"detail": "서버 오류 발생"})
+        finally:
+            # 응답이 없으면 (오류·연결 끊김) 응답을 기다리는 단계를 정리
+            if "reply" not in enrich.values:
+                enrich.cancel()
+
+    # 저장(+ 대화 요약)은 스트림이 닫힌 뒤에 기다림 (저장 단계는 응답이 나온 순간부터 이미 실행 중)
+    async def persist_after_stream():
+        await enrich.wait()
+        await background_tasks()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(persist_after_stream),
+    )
 
 # /history 엔드포인트
 @app.get("/history")
-def get_chat_history():
+async def get_chat_history(
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: str | None = None,
+    order: Literal["asc", "desc"] = "asc",
+):
+    """(created_at, id) keyset 페이지. 다음 페이지는 next_cursor 를 cursor 로 전달."""
     try:
-        return db.get_all_messages()
+        adb = await services.get("adb")
+        return await adb.get_messages_page(limit, cursor, order)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
     except Exception as e:
         print(f"❌ 히스토리 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="대화 기록 조회 오류")
 
-# 🔐 사용자 인증 관련 임포트
-from security import get_password_by_username, user_exists
+# DB 의 created_at 은 시간대 없는 UTC → 시간대가 붙은 since/until (…Z, +09:00) 은 UTC 로 바꾼 뒤 시간대를 뗌
+def to_naive_utc(dt: datetime | None) -> datetime | None:
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+# /history/search 엔드포인트 (전문 검색: MySQL FULLTEXT ngram / SQLite FTS5)
+@app.get("/history/search")
+async def search_chat_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    speaker: Literal["user", "assistant"] | None = None,
+    intent: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: Literal["rank", "recent"] = "rank",
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+):
+    """모든 단어를 포함하는 메시지. 다음 페이지는 next_offset 을 offset 으로 전달."""
+    adb = await services.get("adb")
+    try:
+        with stage("search"):
+            return await adb.search_messages(
+                q, limit, offset, order, speaker=speaker, intent=intent,
+                since=to_naive_utc(since), until=to_naive_utc(until),
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# /stats 엔드포인트 (시간/일 × 스타일 × 의도 × 화자 별 메시지 수, 미리 집계된 행만 읽음)
+@app.get("/stats")
+async def message_stats(
+    granularity: Literal["hour", "day"] = "day",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    style: str | None = None,
+    intent: str | None = None,
+    speaker: Literal["user", "assistant"] | None = None,
+    group_by: list[Literal["style", "intent", "speaker"]] = Query(["style", "intent", "speaker"]),
+):
+    """group_by 에 없는 차원은 합쳐서 돌려줌. 예: ?speaker=assistant&group_by=style&group_by=intent"""
+    try:
+        since, until = stats_range(granularity, to_naive_utc(since), to_naive_utc(until))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    adb = await services.get("adb")
+    return await adb.get_stats(
+        granularity, since, until, tuple(dict.fromkeys(group_by)), style=style, intent=intent, speaker=speaker,
+    )
+
+# /history/export 엔드포인트 (전체 기록을 NDJSON 으로 스트리밍)
+@app.get("/history/export")
+async def export_chat_history():
+    adb = await services.get("adb")
+    async def lines():
+        async for batch in adb.stream_messages():
+            yield "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# /cache/stats : 응답 캐시 적중률 (semantic: 의미 캐시, 꺼져 있으면 null)
+@app.get("/cache/stats")
+async def cache_stats():
+    cache = await services.get("cache")
+    semantic = await services.get("semantic_cache")
+    stats = await cache.stats() if cache is not None else {"backend": "off"}
+    stats["semantic"] = semantic.stats() if semantic is not None else None
+    return stats
+
+# /llm/stats : 엔진별 진행 중 요청·오류율·지연과 라우팅 횟수 + OpenAI 대기열·거절·재시도 횟수
+@app.get("/llm/stats")
+async def llm_stats():
+    llm = await services.get("llm")
+    upstream = await services.get("upstream")
+    return {**llm.stats(), "upstream": upstream.stats()}
+
+# /metrics : Prometheus 텍스트 형식 (단계별 지연 히스토그램, 동시 처리 수, 분류 배치 크기, DB 풀, 캐시 적중률 등)
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics(stats_collector)
+    return Response(body, media_type=content_type)
+
+# /healthz : 프로세스가 살아 있는지 (의존성과 무관하게 바로 200)
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+# /readyz : 모델 + DB 준비 완료 여부 (준비 전에는 503)
+@app.get("/readyz")
+async def readyz():
+    status = services.status()
+    ready = all(status[name] == "ready" for name in ("adb", "embedder"))
+
+    embedder = services.peek("embedder")
+    if embedder is not None and embedder.clf is None:
+        status["embedder"] = "failed (의도 분류기 로드 실패)"
+        ready = False
+
+    adb = services.peek("adb")
+    if adb is not None:
+        try:
+            await asyncio.wait_for(adb.ping(), timeout=2)
+        except Exception as e:
+            status["adb"] = f"failed ({type(e).__name__}: {e})"
+            ready = False
+
+    return JSONResponse(
+        {"ready": ready, "services": status},
+        status_code=200 if ready else 503,
+    )
 
 # ✅ 사용자 로그인 요청 모델
 class VerifyRequest(BaseModel):
     username: str
-    password: str
+    password: str | None = None
+    # 이전 /verify 응답의 token (유효 시간 안이면 비밀번호 해시 계산 없이 확인)
+    token: str | None = None
 
-# ✅ /verify 엔드포인트 추가
+# ✅ /verify 엔드포인트 (성공하면 SESSION_TTL_SECONDS 동안 쓸 수 있는 token 발급)
 @app.post("/verify")
-def verify_user(data: VerifyRequest):
-    if not user_exists(data.username):
-        return {"success": False, "reason": "not_found"}
-    correct_pwd = get_password_by_username(data.username)
-    if data.password == correct_pwd:
-        return {"success": True}
-    return {"success": False, "reason": "wrong_password"}
+async def verify_user(data: VerifyRequest):
+    users = await services.get("users")
+    if data.token is not None and users.sessions.check(data.username, data.token):
+        return {"success": True, "token": data.token}
+    if data.password is None:
+        return {"success": False, "reason": "invalid_token"}
+    result = await users.verify(data.username, data.password)
+    if result != "ok":
+        return {"success": False, "reason": result}
+    return {"success": True, "token": users.sessions.issue(data.username), "expires_in": SESSION_TTL_SECONDS}
 
 class RegisterRequest(BaseModel):
-    username: str
-    password: str
+    username: str = Field(..., min_length=1, max_length=64)
+    password: str = Field(..., min_length=4)
 
 @app.post("/register")
-def register_user(request: RegisterRequest):
+async def register_user(request: RegisterRequest):
+    users = await services.get("users")
     try:
-        exists = db.user_exists(request.username)
-        if exists:
-            raise HTTPException(status_code=400, detail="이미 존재하는 사용자입니다.")
-        success = db.add_user(request.username, request.password)
-        if success:
-            return {"message": f"{request.username}님, 가입을 환영합니다!"}
-        else:
-            raise HTTPException(status_code=500, detail="가입 실패. 서버 에러.")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        created = await users.register(request.username, request.password)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not created:
+        raise HTTPException(status_code=400, detail="이미 존재하는 사용자입니다.")
+    return {"message": f"{request.username}님, 가입을 환영합니다!"}
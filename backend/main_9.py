@@ -1,15 +1,24 @@
 # app.py (FastAPI 백엔드)
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Literal, Optional
 
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
 
-from text_sql_9 import Text_SQL
+from chat_log import Chat_Log_Writer
+from llm_client import create_async_client
+from pagination import HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT
+from rollups import style_id
+from text_sql_9 import Async_Text_SQL
 from text_embed_9 import TEXT_Embed
 
 # 환경 설정
@@ -17,14 +26,25 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("❌ OpenAI API 키가 없습니다.")
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = create_async_client(OPENAI_API_KEY)
 
 # 클래스 인스턴스
-db = Text_SQL()
+adb = Async_Text_SQL()
 embedder = TEXT_Embed()
+chat_log = Chat_Log_Writer()
+
+# 시작 시 테이블 생성 / 종료 시 커넥션 풀 정리
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await adb.init()
+    yield
+    await client.close()
+    await adb.close()
+    embedder.close()
+    await anyio.to_thread.run_sync(chat_log.close)
 
 # FastAPI 초기화
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -49,16 +69,9 @@ STYLE_PROMPTS = {
     "비즈니스": "너는 전문 컨설턴트야. 비즈니스 어투로 간결하게 답변해줘."
 }
 
-# 텍스트 파일 저장
-def save_chat_to_file(user_input: str, ai_response: str):
-    with open("chat_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"👤 사용자: {user_input}\n")
-        f.write(f"🤖 AI: {ai_response}\n")
-        f.write("=" * 40 + "\n")
-
 # /chat 엔드포인트
 @app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest):
     try:
         system_prompt = STYLE_PROMPTS.get(request.style, STYLE_PROMPTS["친구체"])
         messages = [
@@ -66,18 +79,24 @@ def chat_endpoint(request: ChatRequest):
             {"role": "user",   "content": request.user_input}
         ]
 
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=messages,
             temperature=0.7,
         )
         ai_response = response.choices[0].message.content.strip()
-        intent = embedder.classify_intent(ai_response)
 
-        # 저장 (파일 + DB)
-        save_chat_to_file(request.user_input, ai_response)
-        db.save_message("user", request.user_input)
-        db.save_message("assistant", ai_response)
+        # 대화 로그는 대기열에 넣기만 하고, 의도 분류 후 의도·스타일(system prompt id)과 함께 DB 저장 (검색 필터·집계용)
+        chat_log.log_chat(request.user_input, ai_response, style=request.style)
+        intent = await embedder.aclassify_intent(ai_response)
+        style = style_id(system_prompt)
+        await asyncio.gather(
+            adb.save_messages(
+                [("user", request.user_input), ("assistant", ai_response, intent)],
+                style=style,
+            ),
+            adb.save_style(style, system_prompt),
+        )
 
         return {"response": ai_response, "intent": intent}
     except Exception as e:
@@ -86,9 +105,25 @@ def chat_endpoint(request: ChatRequest):
 
 # /history 엔드포인트
 @app.get("/history")
-def get_chat_history():
+async def get_chat_history(
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+):
+    """(created_at, id) keyset 페이지. 다음 페이지는 next_cursor 를 cursor 로 전달."""
     try:
-        return db.get_all_messages()
+        return await adb.get_messages_page(limit, cursor, order)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
     except Exception as e:
         print(f"❌ 히스토리 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="대화 기록 조회 오류")
+
+# /history/export 엔드포인트 (전체 기록을 NDJSON 으로 스트리밍)
+@app.get("/history/export")
+async def export_chat_history():
+    async def lines():
+        async for batch in adb.stream_messages():
+            yield "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
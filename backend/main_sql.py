@@ -1,13 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Literal
+import json
 import openai
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Index, select
 from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
 
+from chat_log import Chat_Log_Writer
+from pagination import (
+    EXPORT_BATCH_SIZE, HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT,
+    build_page, keyset_select, message_columns, message_to_dict,
+)
+
 # ✅ .env 파일 로드 및 OpenAI 키 설정
 load_dotenv("env")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -45,7 +54,15 @@ class ChatMessage(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # /history keyset 페이지네이션용 복합 인덱스
+    __table_args__ = (
+        Index("ix_chat_messages_created_at_id", "created_at", "id"),
+    )
+
 Base.metadata.create_all(bind=engine)
+# 이미 있던 테이블에도 인덱스 추가
+for index in ChatMessage.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
 
 # ✅ 요청/응답 모델 정의
 class ChatRequest(BaseModel):
@@ -54,12 +71,8 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
 
-# ✅ 대화 로그 파일 저장
-def save_chat_to_file(user_input: str, ai_response: str):
-    with open("chat_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"👤 사용자: {user_input}\n")
-        f.write(f"🤖 AI: {ai_response}\n")
-        f.write("=" * 40 + "\n")
+# ✅ 대화 로그 (백그라운드 스레드가 JSONL 파일에 모아서 기록)
+chat_log = Chat_Log_Writer()
 
 # ✅ 챗봇 대화 처리 API
 @app.post("/chat", response_model=ChatResponse)
@@ -80,8 +93,8 @@ def chat_endpoint(request: ChatRequest):
 
         ai_response = response.choices[0].message.content
 
-        # ✅ 텍스트 파일 저장
-        save_chat_to_file(user_input, ai_response)
+        # ✅ 대화 로그 저장
+        chat_log.log_chat(user_input, ai_response)
 
         # ✅ DB 저장
         with SessionLocal() as db:
@@ -95,16 +108,31 @@ def chat_endpoint(request: ChatRequest):
         print(f"❌ 에러 발생: {e}")
         return {"response": "오류 발생: 대화 처리 중 문제 발생"}
 
-# ✅ /history API - 이전 대화 전체 불러오기
+# ✅ /history API - (created_at, id) keyset 페이지 단위로 불러오기
 @app.get("/history")
-def get_chat_history():
-    with SessionLocal() as db:
-        messages = db.query(ChatMessage).order_by(ChatMessage.created_at.asc()).all()
-        return [
-            {
-                "speaker": msg.speaker,
-                "content": msg.content,
-                "created_at": msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            for msg in messages
-        ]
+def get_chat_history(
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: str | None = None,
+    order: Literal["asc", "desc"] = "asc",
+):
+    try:
+        with SessionLocal() as db:
+            rows = db.execute(keyset_select(ChatMessage, limit, cursor, order)).all()
+            return build_page(rows, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+
+# ✅ /history/export API - 전체 기록을 NDJSON 으로 스트리밍 (서버 사이드 커서)
+@app.get("/history/export")
+def export_chat_history():
+    def lines():
+        with SessionLocal() as db:
+            result = db.execute(
+                select(*message_columns(ChatMessage))
+                .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+                .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+            )
+            for partition in result.partitions():
+                yield "".join(json.dumps(message_to_dict(m), ensure_ascii=False) + "\n" for m in partition)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
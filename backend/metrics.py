@@ -0,0 +1,149 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# 응답에 Server-Timing 헤더를 붙일지 (브라우저 개발자 도구에서 단계별 시간 확인용)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+# uvicorn --workers 로 여러 프로세스를 띄울 때 프로세스 간 지표를 합치는 디렉터리 (prometheus_client multiprocess 모드)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# /chat 처리 단계별 소요 시간
+#   conversation, cache, llm, llm_first_token, intent, save_file, save_db, summarize
+#   + 부가 처리 단계: user_intent, sentiment, moderation, persist (enrichment.py)
+#   + /history/search 쿼리: search
+STAGE_SECONDS = Histogram(
+    "chatbot_stage_seconds", "Time spent in each /chat stage", ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_SECONDS = Histogram(
+    "chatbot_http_request_seconds", "HTTP request latency", ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "chatbot_http_requests_in_flight", "HTTP requests currently being handled", multiprocess_mode="livesum",
+)
+INTENT_BATCH_SIZE = Histogram(
+    "chatbot_intent_batch_size", "Texts per intent classifier batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+ENRICH_FAILURES = Counter(
+    "chatbot_enrich_failures", "Enrichment stages that fell back to their default", ["stage", "reason"],
+)
+
+# 요청별 (단계, 초) 목록. Server-Timing 이 켜진 요청에서만 채워짐
+_timings = ContextVar("chatbot_timings", default=None)
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+@contextmanager
+def stage(name: str):
+    """with stage("llm"): ... 구간의 시간을 히스토그램(+ Server-Timing)에 기록."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+async def timed(name: str, awaitable):
+    with stage(name):
+        return await awaitable
+
+
+def server_timing_header(timings: list[tuple[str, float]]) -> str:
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings)
+
+
+# HTTP 지연 / 동시 처리 수를 재고, 켜져 있으면 Server-Timing 헤더를 붙이는 ASGI 미들웨어
+#   (BaseHTTPMiddleware 와 달리 스트리밍 응답을 버퍼링하지 않음)
+class Metrics_Middleware:
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = [] if self.server_timing else None
+        token = _timings.set(timings)
+        status = {"code": 500}
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if timings:
+                    total = time.perf_counter() - start
+                    header = server_timing_header([*timings, ("total", total)])
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            _timings.reset(token)
+            # 경로 파라미터별로 라벨이 늘어나지 않게 라우트 템플릿을 사용
+            route = scope.get("route")
+            HTTP_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status["code"]),
+            ).observe(time.perf_counter() - start)
+
+
+def _flatten(prefix: str, stats: dict):
+    for key, value in stats.items():
+        name = f"{prefix}_{_INVALID_NAME.sub('_', str(key))}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+# 각 구성요소의 stats() dict 를 scrape 시점에 읽어 gauge 로 내보내는 수집기
+#   (요청 경로에서는 아무 비용이 없고, 이미 있는 카운터를 그대로 노출)
+class Stats_Collector:
+    def __init__(self):
+        self._sources = {}
+        self.registry = CollectorRegistry()
+        self.registry.register(self)
+
+    def register(self, name: str, read):
+        """read: 인자 없는 함수 → 숫자 값을 담은 (중첩) dict, 아직 준비 전이면 None."""
+        self._sources[name] = read
+
+    def collect(self):
+        for source, read in self._sources.items():
+            try:
+                stats = read()
+            except Exception:
+                continue
+            if not stats:
+                continue
+            for name, value in _flatten(f"chatbot_{source}", stats):
+                yield GaugeMetricFamily(name, f"{source} stats", value=value)
+
+
+def render_metrics(collector: Stats_Collector) -> tuple[bytes, str]:
+    """Prometheus 텍스트 형식 (본문, content-type). 서비스 stats 는 요청을 받은 워커의 값."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(collector.registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,70 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+
+# /history 페이지 크기
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT     = 1000
+# /history/export 에서 서버 사이드 커서로 한 번에 읽어오는 행 수
+EXPORT_BATCH_SIZE     = 1000
+
+
+# 커서 = 마지막으로 본 행의 (created_at, id) 를 urlsafe base64 로 감싼 문자열
+def encode_cursor(created_at: datetime, message_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """잘못된 커서면 ValueError."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, message_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+    return datetime.fromisoformat(created_at), int(message_id)
+
+
+def message_columns(model):
+    return (model.id, model.speaker, model.content, model.created_at)
+
+
+def message_to_dict(row) -> dict:
+    return {
+        "id":         row.id,
+        "speaker":    row.speaker,
+        "content":    row.content,
+        "created_at": row.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def keyset_select(model, limit: int, cursor: str | None = None, order: str = "asc"):
+    """
+    (created_at, id) 복합 인덱스를 타는 keyset 페이지 쿼리.
+    다음 페이지가 있는지 알기 위해 limit + 1 행을 읽음.
+    """
+    stmt = select(*message_columns(model))
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        if order == "asc":
+            stmt = stmt.where(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > last_id),
+            ))
+        else:
+            stmt = stmt.where(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < last_id),
+            ))
+    if order == "asc":
+        stmt = stmt.order_by(model.created_at.asc(), model.id.asc())
+    else:
+        stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+    return stmt.limit(limit + 1)
+
+
+def build_page(rows, limit: int) -> dict:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [message_to_dict(r) for r in rows],
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+    }
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# 응답 캐시 설정
+#   RESPONSE_CACHE_BACKEND : memory (프로세스 내 LRU, 기본) | redis (워커/서버 간 공유) | off
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL     = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE    = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+REDIS_URL              = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX       = "chat:response:"
+
+_WHITESPACE = re.compile(r"\s+")
+_REPEATED_PUNCT = re.compile(r"([!?.~])\1+")
+
+
+def normalize_input(text: str) -> str:
+    """'  안녕??  ' 과 '안녕?' 이 같은 키가 되도록 정규화 (NFKC, 공백, 대소문자, 반복 문장부호)."""
+    text = unicodedata.normalize("NFKC", text).strip().lower()
+    text = _WHITESPACE.sub(" ", text)
+    return _REPEATED_PUNCT.sub(r"\1", text)
+
+
+def temperature_bucket(temperature: float) -> float:
+    return round(temperature, 1)
+
+
+def cache_key(system_prompt: str, user_input: str, model: str, temperature: float) -> str:
+    raw = json.dumps(
+        [system_prompt, normalize_input(user_input), model, temperature_bucket(temperature)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# 프로세스 내 TTL + LRU 백엔드
+class Memory_Cache_Backend:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: int = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def size(self) -> int:
+        """만료된 항목을 치운 뒤 개수 (조회로 순서가 바뀌어 만료 순서가 아니므로 전체를 봄)."""
+        with self._lock:
+            now = time.monotonic()
+            for key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[key]
+            return len(self._entries)
+
+    async def close(self):
+        pass
+
+
+# Redis 공유 백엔드 (LRU 는 Redis 의 maxmemory-policy allkeys-lru 로 설정)
+class Redis_Cache_Backend:
+    def __init__(self, url: str = REDIS_URL, ttl: int = RESPONSE_CACHE_TTL):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key: str):
+        raw = await self.redis.get(REDIS_KEY_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: dict):
+        await self.redis.set(REDIS_KEY_PREFIX + key, json.dumps(value, ensure_ascii=False), ex=self.ttl)
+
+    async def size(self) -> int | None:
+        # dbsize() 는 같은 DB 의 다른 키까지 세고, 접두사로 세려면 키 공간 전체를 SCAN 해야 하므로 크기는 보고하지 않음
+        return None
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+CACHE_BACKENDS = {
+    "memory": Memory_Cache_Backend,
+    "redis":  Redis_Cache_Backend,
+}
+
+
+# 응답 캐시: {"response": ..., "intent": ...} 를 저장하고 적중률을 집계
+class Response_Cache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str):
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            # 캐시 장애는 요청 실패로 이어지지 않게 미스로 처리
+            self.errors += 1
+            print(f"⚠️ 응답 캐시 조회 실패: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: dict):
+        try:
+            await self.backend.set(key, value)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ 응답 캐시 저장 실패: {e}")
+
+    def counters(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    async def stats(self) -> dict:
+        try:
+            size = await self.backend.size()
+        except Exception:
+            size = None
+        return {"backend": type(self.backend).__name__, **self.counters(), "size": size}
+
+    async def close(self):
+        await self.backend.close()
+
+
+def create_response_cache(backend: str = RESPONSE_CACHE_BACKEND) -> Response_Cache | None:
+    if backend == "off":
+        return None
+    return Response_Cache(CACHE_BACKENDS[backend]())
@@ -0,0 +1,172 @@
+import hashlib
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, exists, insert, literal, select, update
+
+# 메시지 집계 (시간/일 × 스타일 × 의도 × 화자 별 메시지 수)
+#   메시지를 저장하는 같은 트랜잭션에서 배치 단위로 더해 두므로 /stats 는 기록 크기와 무관하게 집계 행만 읽음
+ROLLUP_GRANULARITIES = ("hour", "day")
+# /stats 기본 구간 수 / 한 번에 돌려주는 최대 구간 수
+STATS_DEFAULT_BUCKETS = {"hour": 48, "day": 30}
+STATS_MAX_BUCKETS     = {"hour": 24 * 31, "day": 366}
+# 백필 한 번에 읽는 행 수
+ROLLUP_BACKFILL_CHUNK = int(os.getenv("ROLLUP_BACKFILL_CHUNK", "10000"))
+
+_STEP = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def style_id(system_prompt: str) -> str:
+    """system prompt(스타일) → 16자 id (원문은 chat_styles 에 한 번만 저장)."""
+    return hashlib.blake2b(system_prompt.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def bucket_start(dt: datetime, granularity: str) -> datetime:
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0) if granularity == "day" else dt
+
+
+def stats_range(granularity: str, since: datetime | None, until: datetime | None) -> tuple[datetime, datetime]:
+    """/stats 조회 구간 [since, until). 비어 있으면 최근 기본 구간, 최대 구간 수를 넘으면 ValueError."""
+    step = _STEP[granularity]
+    until = until or bucket_start(datetime.utcnow(), granularity) + step
+    since = since or until - step * STATS_DEFAULT_BUCKETS[granularity]
+    if since >= until:
+        raise ValueError("since 는 until 보다 앞이어야 합니다.")
+    if (until - since) / step > STATS_MAX_BUCKETS[granularity]:
+        raise ValueError(f"{granularity} 집계는 한 번에 {STATS_MAX_BUCKETS[granularity]}구간까지 조회할 수 있습니다.")
+    return since, until
+
+
+def rollup_counts(rows: list[dict]) -> Counter:
+    """저장할 메시지 행들 → {(granularity, bucket_start, style, intent, speaker): 개수}. 없는 값은 ""."""
+    counts = Counter()
+    for row in rows:
+        created_at = row.get("created_at")
+        if created_at is None:
+            continue
+        for granularity in ROLLUP_GRANULARITIES:
+            counts[(
+                granularity, bucket_start(created_at, granularity),
+                row.get("style") or "", row.get("intent") or "", row["speaker"],
+            )] += 1
+    return counts
+
+
+_ROLLUP_KEYS = ("granularity", "bucket_start", "style", "intent", "speaker")
+
+
+def rollup_upserts(dialect: str, model, counts: Counter) -> list:
+    """
+    집계 행에 개수를 더하는 문 목록 (메시지를 저장하는 같은 세션에서 차례로 실행, 더할 게 없으면 빈 목록).
+    MySQL / SQLite / PostgreSQL : INSERT ... ON DUPLICATE KEY / ON CONFLICT 한 문
+    그 밖의 DB : 키마다 없으면 0 으로 INSERT ... SELECT WHERE NOT EXISTS → UPDATE messages + n
+                 (처음 생기는 키를 두 트랜잭션이 동시에 만들면 한쪽이 기본 키 위반으로 실패하고, 메시지와 함께 롤백되어
+                  write-behind 재시도 때 다시 더해짐 → 중복 집계는 없음)
+    """
+    if not counts:
+        return []
+    # 키 순서를 고정해 동시에 쓰는 트랜잭션끼리 잠금 순서가 엇갈리지 않게 함
+    values = [
+        {**dict(zip(_ROLLUP_KEYS, key)), "messages": n}
+        for key, n in sorted(counts.items())
+    ]
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(model).values(values)
+        return [stmt.on_duplicate_key_update(messages=model.messages + stmt.inserted.messages)]
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stmt = dialect_insert(model).values(values)
+        return [stmt.on_conflict_do_update(
+            index_elements=[c.name for c in model.__table__.primary_key.columns],
+            set_={"messages": model.messages + stmt.excluded.messages},
+        )]
+
+    stmts = []
+    for row in values:
+        columns = [getattr(model, k) for k in _ROLLUP_KEYS]
+        same_key = and_(*(col == row[k] for k, col in zip(_ROLLUP_KEYS, columns)))
+        stmts.append(insert(model).from_select(
+            [*_ROLLUP_KEYS, "messages"],
+            select(*(literal(row[k], col.type) for k, col in zip(_ROLLUP_KEYS, columns)), literal(0))
+            .where(~exists().where(same_key)),
+        ))
+        stmts.append(update(model).where(same_key).values(messages=model.messages + row["messages"]))
+    return stmts
+
+
+def build_stats(rows, styles: dict, granularity: str, since: datetime, until: datetime, backfill_pending: int) -> dict:
+    return {
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "items": [
+            {
+                "bucket": r.bucket_start.strftime("%Y-%m-%d %H:%M:%S"),
+                **{dim: (getattr(r, dim) or None) for dim in ("style", "intent", "speaker") if dim in r._fields},
+                "messages": int(r.messages),
+            }
+            for r in rows
+        ],
+        "styles": styles,
+        # 아직 집계에 들어가지 않은 (롤업 도입 전) 메시지 수. 0 이 아니면 python -m rollups backfill 실행
+        "backfill_pending": backfill_pending,
+    }
+
+
+# 롤업 도입 전에 쌓인 메시지를 chunk 단위로 집계 (중단해도 다시 실행하면 이어서 진행)
+#   python -m rollups backfill [--chunk 10000] [--classify]
+#   --classify : 의도가 비어 있는 메시지를 의도 분류기로 채운 뒤 집계 (TEXT_Embed 로드)
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import time
+
+    import anyio
+
+    from text_sql_9 import Async_Text_SQL
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--chunk", type=int, default=ROLLUP_BACKFILL_CHUNK)
+    parser.add_argument("--classify", action="store_true")
+    args = parser.parse_args()
+
+    def make_classifier():
+        from text_embed_9 import TEXT_Embed
+
+        embedder = TEXT_Embed()
+        if embedder.clf is None:
+            raise SystemExit("❌ 의도 분류기를 불러오지 못했습니다.")
+
+        async def classify(texts):
+            return await anyio.to_thread.run_sync(embedder.classify_batch, texts)
+
+        return classify
+
+    async def main():
+        classify = make_classifier() if args.classify else None
+        adb = Async_Text_SQL(write_behind=False)
+        await adb.init()
+        start = time.perf_counter()
+        total = 0
+        try:
+            while True:
+                processed, remaining = await adb.backfill_rollups(args.chunk, classify)
+                total += processed
+                if processed:
+                    print(f"  {total:,}행 집계 (남은 행 최대 {remaining:,})")
+                if remaining == 0:
+                    break
+        finally:
+            await adb.close()
+        print(f"✅ 백필 완료: {total:,}행, {time.perf_counter() - start:.1f}s")
+
+    asyncio.run(main())
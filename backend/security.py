@@ -1,14 +1,226 @@
+import base64
+import os
+import secrets
+import time
+from collections import OrderedDict
 
-users = {
-    1: ["hohoyeol", "1234"],
-    2: ["minji", "abcd"]
+import anyio
+
+# 비밀번호 해시 / 로그인 토큰 설정
+#   PASSWORD_HASHER       : bcrypt (기본) | argon2. 다른 방식으로 저장된 해시는 로그인에 성공할 때 새 방식으로 다시 저장
+#   BCRYPT_ROUNDS         : bcrypt cost (2^n 반복, 기본 12)
+#   PASSWORD_HASH_WORKERS : 동시에 해시를 계산하는 최대 스레드 수 (넘는 요청은 기다림, 이벤트 루프는 막지 않음)
+#   SESSION_TTL_SECONDS   : /verify 가 발급한 토큰의 유효 시간 (이 안에는 토큰으로 확인, 해시 계산 없음. 0 이면 발급 안 함)
+PASSWORD_HASHER       = os.getenv("PASSWORD_HASHER", "bcrypt")
+BCRYPT_ROUNDS         = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+SESSION_TTL_SECONDS   = float(os.getenv("SESSION_TTL_SECONDS", "300"))
+SESSION_CACHE_SIZE    = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+
+
+class Bcrypt_Hasher:
+    name = "bcrypt"
+    prefix = "$2"
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS):
+        import bcrypt
+
+        self.bcrypt = bcrypt
+        self.rounds = rounds
+
+    @staticmethod
+    def _encode(password: str) -> bytes:
+        # bcrypt 는 72바이트 뒤를 무시하므로 잘라서 저장하지 않고 거절
+        data = password.encode("utf-8")
+        if len(data) > 72:
+            raise ValueError("비밀번호가 너무 깁니다 (UTF-8 72바이트 이하).")
+        return data
+
+    def hash(self, password: str) -> str:
+        return self.bcrypt.hashpw(self._encode(password), self.bcrypt.gensalt(self.rounds)).decode("ascii")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self.bcrypt.checkpw(self._encode(password), hashed.encode("ascii"))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # $2b$12$... 의 cost 가 지금 설정과 다르면 다시 해시
+        return int(hashed.split("$")[2]) != self.rounds
+
+    def dummy_hash(self) -> str:
+        # 같은 cost 의 형식만 맞는 해시 (해시 계산 없이 만들고, 확인에는 진짜 해시와 같은 시간이 걸림)
+        return self.bcrypt.gensalt(self.rounds).decode("ascii") + "." * 31
+
+
+class Argon2_Hasher:
+    name = "argon2"
+    prefix = "$argon2"
+
+    def __init__(self):
+        from argon2 import PasswordHasher
+        from argon2.exceptions import InvalidHashError, VerificationError
+
+        self.ph = PasswordHasher()
+        self._errors = (InvalidHashError, VerificationError)
+
+    def hash(self, password: str) -> str:
+        return self.ph.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self.ph.verify(hashed, password)
+        except self._errors:
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return self.ph.check_needs_rehash(hashed)
+
+    def dummy_hash(self) -> str:
+        ph = self.ph
+        b64 = lambda n: base64.b64encode(secrets.token_bytes(n)).decode("ascii").rstrip("=")
+        return (f"$argon2id$v=19$m={ph.memory_cost},t={ph.time_cost},p={ph.parallelism}"
+                f"${b64(ph.salt_len)}${b64(ph.hash_len)}")
+
+
+PASSWORD_HASHERS = {
+    "bcrypt": Bcrypt_Hasher,
+    "argon2": Argon2_Hasher,
 }
 
-def get_password_by_username(username):
-    for _, (name, pwd) in users.items():
-        if name == username:
-            return pwd
-    return None
 
-def user_exists(username):
-    return any(name == username for _, (name, _) in users.items())
+# 로그인에 성공한 사용자에게 발급하는 짧은 유효 시간 토큰 (프로세스 메모리)
+#   유효 시간이 모두 같으므로 발급 순서 = 만료 순서 → 앞에서부터 만료된 토큰을 치움
+#   워커끼리 공유하지 않고, 비밀번호 해시를 다시 저장해도 이미 발급한 토큰은 만료될 때까지 유효
+class Session_Cache:
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_entries: int = SESSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # token → (username, 만료 시각)
+
+    def _evict(self, now: float):
+        while self._entries:
+            token, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[token]
+
+    def issue(self, username: str) -> str | None:
+        if self.ttl <= 0:
+            return None
+        now = time.monotonic()
+        token = secrets.token_urlsafe(32)
+        self._entries[token] = (username, now + self.ttl)
+        self._evict(now)
+        return token
+
+    def check(self, username: str, token: str) -> bool:
+        entry = self._entries.get(token)
+        if entry is None or entry[0] != username or entry[1] <= time.monotonic():
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"active": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# users 테이블 + 비밀번호 해시 (해시 계산은 크기가 제한된 스레드 풀에서)
+class User_Store:
+    def __init__(self, db, scheme: str = PASSWORD_HASHER, workers: int = PASSWORD_HASH_WORKERS,
+                 sessions: Session_Cache | None = None):
+        """db: Async_Text_SQL (get_password_hash, add_user, update_password_hash)."""
+        self.db = db
+        self.hasher = PASSWORD_HASHERS[scheme]()
+        self._hashers = {self.hasher.name: self.hasher}
+        self._limiter = anyio.CapacityLimiter(workers)
+        self.sessions = sessions or Session_Cache()
+        # 없는 사용자 확인용 (있는 사용자와 같은 비용으로 확인해 응답 시간으로 존재 여부를 알 수 없게 함)
+        self._dummy_hash = self.hasher.dummy_hash()
+        self.hashes = 0
+        self.verifications = 0
+        self.rehashes = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._limiter.borrowed_tokens + self._limiter.statistics().tasks_waiting
+
+    def _hasher_for(self, hashed: str):
+        # 긴 접두사부터 비교 ($argon2 → $2)
+        for name, cls in sorted(PASSWORD_HASHERS.items(), key=lambda item: -len(item[1].prefix)):
+            if hashed.startswith(cls.prefix):
+                if name not in self._hashers:
+                    self._hashers[name] = cls()
+                return self._hashers[name]
+        return None
+
+    async def _run(self, fn, *args):
+        return await anyio.to_thread.run_sync(fn, *args, limiter=self._limiter)
+
+    async def register(self, username: str, password: str) -> bool:
+        """이미 있는 사용자면 False. 비밀번호가 해시할 수 없는 값이면 ValueError."""
+        hashed = await self._run(self.hasher.hash, password)
+        self.hashes += 1
+        return await self.db.add_user(username, hashed)
+
+    async def verify(self, username: str, password: str) -> str:
+        """"ok" | "invalid_credentials" (없는 아이디와 틀린 비밀번호를 구분하지 않음)."""
+        hashed = await self.db.get_password_hash(username)
+        if hashed is None:
+            await self._run(self.hasher.verify, password, self._dummy_hash)
+            self.verifications += 1
+            return "invalid_credentials"
+        hasher = self._hasher_for(hashed)
+        self.verifications += 1
+        if hasher is None or not await self._run(hasher.verify, password, hashed):
+            return "invalid_credentials"
+        if hasher is not self.hasher or hasher.needs_rehash(hashed):
+            await self.db.update_password_hash(username, await self._run(self.hasher.hash, password))
+            self.rehashes += 1
+        return "ok"
+
+    def stats(self) -> dict:
+        return {
+            "hash_queue": self.queue_depth,
+            "hashes": self.hashes,
+            "verifications": self.verifications,
+            "rehashes": self.rehashes,
+            "sessions": self.sessions.stats(),
+        }
+
+
+# 사용자 추가 (서버 없이)
+#   python security.py add-user minji                 : 비밀번호를 입력받아 한 명 추가
+#   python security.py import-users users.json        : {"아이디": "비밀번호", ...} 를 한 번에 추가 (이미 있으면 건너뜀)
+if __name__ == "__main__":
+    import argparse
+    import getpass
+    import json
+
+    from text_sql_9 import Text_SQL
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["add-user", "import-users"])
+    parser.add_argument("target", help="add-user: 아이디, import-users: JSON 파일")
+    args = parser.parse_args()
+
+    db = Text_SQL()
+    db.init()
+    hasher = PASSWORD_HASHERS[PASSWORD_HASHER]()
+    if args.command == "add-user":
+        if db.add_user(args.target, hasher.hash(getpass.getpass("비밀번호: "))):
+            print(f"✅ {args.target} 추가됨")
+        else:
+            raise SystemExit(f"❌ 이미 존재하는 사용자입니다: {args.target}")
+    else:
+        with open(args.target, encoding="utf-8") as f:
+            accounts = json.load(f)
+        for username, password in accounts.items():
+            if db.user_exists(username):
+                print(f"  {username} : 이미 있음, 건너뜀")
+            elif db.add_user(username, hasher.hash(password)):
+                print(f"✅ {username} 추가됨")
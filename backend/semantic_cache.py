@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import anyio
+import numpy as np
+
+from response_cache import RESPONSE_CACHE_TTL, normalize_input
+
+# 의미(임베딩 유사도) 기반 응답 캐시 설정
+#   "안녕하세요!" 와 "안녕하세요~" 처럼 정확 일치 캐시가 놓치는 거의 같은 입력을 잡음
+SEMANTIC_CACHE           = os.getenv("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_MODEL     = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE      = int(os.getenv("SEMANTIC_CACHE_SIZE", "5000"))
+SEMANTIC_CACHE_PATH      = os.getenv("SEMANTIC_CACHE_PATH", "./semantic_cache.npz")
+# 새 항목이 이만큼 쌓일 때마다 디스크에 저장 (종료 시에도 저장)
+SEMANTIC_CACHE_SAVE_EVERY = int(os.getenv("SEMANTIC_CACHE_SAVE_EVERY", "100"))
+
+
+def namespace_id(*parts) -> int:
+    """스타일(system prompt)·모델·temperature 를 int64 하나로 (같은 namespace 안에서만 검색)."""
+    digest = hashlib.blake2b(json.dumps(parts, ensure_ascii=False).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+# 정규화된 임베딩을 미리 할당한 NumPy 행렬에 담는 고정 크기 인덱스
+#   검색: 행렬 · 질의 벡터 한 번 (코사인 유사도), 가득 차면 만료된 칸 → 가장 오래 안 쓴 칸 순으로 덮어씀 (LRU)
+#   항목은 정확 일치 캐시와 같은 TTL(RESPONSE_CACHE_TTL) 이 지나면 검색되지 않음 (쓸 때마다 늘어나지 않음)
+class Semantic_Index:
+    def __init__(self, dim: int, capacity: int = SEMANTIC_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 model_name: str = "", normalized: bool = True):
+        self.dim = dim
+        self.capacity = capacity
+        self.ttl = ttl
+        # 저장 파일에 함께 기록해, 다른 모델(같은 차원이어도)로 만든 벡터는 불러오지 않음
+        self.model_name = model_name
+        self.normalized = normalized
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.namespaces = np.zeros(capacity, dtype=np.int64)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.last_used = np.zeros(capacity, dtype=np.float64)  # 0 이면 빈 칸
+        self.values = [None] * capacity
+        self._lock = threading.Lock()
+
+    def _live(self) -> np.ndarray:
+        return (self.last_used > 0) & (self.created_at > time.time() - self.ttl)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._live()))
+
+    def search(self, namespace: int, vector: np.ndarray):
+        """(값, 유사도) 또는 만료되지 않은 항목이 없으면 (None, 0.0)."""
+        with self._lock:
+            valid = self._live() & (self.namespaces == namespace)
+            if not valid.any():
+                return None, 0.0
+            scores = self.vectors @ vector
+            scores[~valid] = -1.0
+            best = int(np.argmax(scores))
+            return (best, self.values[best]), float(scores[best])
+
+    def touch(self, slot: int):
+        with self._lock:
+            self.last_used[slot] = time.time()
+
+    def add(self, namespace: int, vector: np.ndarray, value: dict):
+        with self._lock:
+            now = time.time()
+            free = np.flatnonzero(~self._live())
+            slot = int(free[0]) if len(free) else int(np.argmin(self.last_used))
+            self.vectors[slot] = vector
+            self.namespaces[slot] = namespace
+            self.created_at[slot] = now
+            self.last_used[slot] = now
+            self.values[slot] = value
+
+    def save(self, path: str):
+        with self._lock:
+            filled = np.flatnonzero(self._live())
+            payload = {
+                "model_name": np.array(self.model_name),
+                "normalized": np.array(self.normalized),
+                "vectors": self.vectors[filled],
+                "namespaces": self.namespaces[filled],
+                "created_at": self.created_at[filled],
+                "last_used": self.last_used[filled],
+                "values": np.array([json.dumps(self.values[i], ensure_ascii=False) for i in filled], dtype=str),
+            }
+        # 워커마다 다른 임시 파일에 쓴 뒤 바꿔치기 (여러 워커가 동시에 저장해도 서로의 파일을 덮어쓰지 않음)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp.npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def load(self, path: str):
+        """저장된 인덱스를 불러옴. 모델·정규화 여부·차원이 다르면 (모델이 바뀐 경우) 무시, 만료된 항목은 건너뜀."""
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            if ("model_name" not in data or str(data["model_name"]) != self.model_name
+                    or bool(data["normalized"]) != self.normalized):
+                print(f"⚠️ 의미 캐시를 만든 모델이 달라 무시합니다: {path}")
+                return
+            if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+                print(f"⚠️ 의미 캐시 차원이 달라 무시합니다: {path}")
+                return
+            live = np.flatnonzero(data["created_at"] > time.time() - self.ttl)
+            # 최근에 쓴 항목부터 용량만큼만
+            order = live[np.argsort(-data["last_used"][live])][: self.capacity]
+            n = len(order)
+            with self._lock:
+                self.vectors[:n] = vectors[order]
+                self.namespaces[:n] = data["namespaces"][order]
+                self.created_at[:n] = data["created_at"][order]
+                self.last_used[:n] = data["last_used"][order]
+                for slot, i in enumerate(order):
+                    self.values[slot] = json.loads(str(data["values"][i]))
+
+
+class Semantic_Cache:
+    def __init__(self, model_name: str = SEMANTIC_CACHE_MODEL, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 capacity: int = SEMANTIC_CACHE_SIZE, path: str | None = SEMANTIC_CACHE_PATH):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.threshold = threshold
+        self.path = path
+        # 코사인 유사도를 내적 한 번으로 구하므로 항상 정규화
+        self.normalize = True
+        self.index = Semantic_Index(
+            self.model.get_sentence_embedding_dimension(), capacity,
+            model_name=model_name, normalized=self.normalize,
+        )
+        if path and os.path.exists(path):
+            self.index.load(path)
+        self._limiter = anyio.CapacityLimiter(1)
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.model.encode(normalize_input(text), normalize_embeddings=self.normalize).astype(np.float32)
+
+    async def get(self, namespace: int, text: str):
+        """(캐시된 값 또는 None, 질의 벡터). 벡터는 미스 후 set() 에 다시 넘겨 재계산을 피함."""
+        vector = await anyio.to_thread.run_sync(self.encode, text, limiter=self._limiter)
+        found, score = self.index.search(namespace, vector)
+        if found is not None and score >= self.threshold:
+            slot, value = found
+            self.index.touch(slot)
+            self.hits += 1
+            return value, vector
+        self.misses += 1
+        return None, vector
+
+    async def set(self, namespace: int, text: str, value: dict, vector: np.ndarray | None = None):
+        if vector is None:
+            vector = await anyio.to_thread.run_sync(self.encode, text, limiter=self._limiter)
+        self.index.add(namespace, vector, value)
+        self._unsaved += 1
+        if self.path and self._unsaved >= SEMANTIC_CACHE_SAVE_EVERY:
+            self._unsaved = 0
+            await anyio.to_thread.run_sync(self.index.save, self.path)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self.index),
+            "threshold": self.threshold,
+        }
+
+    def close(self):
+        if self.path:
+            self.index.save(self.path)
+
+
+def create_semantic_cache() -> Semantic_Cache | None:
+    return Semantic_Cache() if SEMANTIC_CACHE else None
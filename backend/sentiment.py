@@ -0,0 +1,249 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+# 감정 분석 엔진 설정
+#   SENTIMENT_BACKEND  : google (Cloud Natural Language, 기본) | local (transformers 감정 모델) | off
+#   SENTIMENT_FALLBACK : local 이면 google 호출이 실패한 문장을 로컬 모델로 다시 분석 (첫 실패 때 로드)
+#   SENTIMENT_ENDPOINT : 지정하면 google 클라이언트가 이 주소(host:port)로 인증 없이 REST 요청 (로컬 대역 서버용)
+SENTIMENT_BACKEND           = os.getenv("SENTIMENT_BACKEND", "google")
+SENTIMENT_FALLBACK          = os.getenv("SENTIMENT_FALLBACK", "off")
+SENTIMENT_ENDPOINT          = os.getenv("SENTIMENT_ENDPOINT", "")
+SENTIMENT_TIMEOUT           = float(os.getenv("SENTIMENT_TIMEOUT", "5"))
+SENTIMENT_BATCH_CONCURRENCY = int(os.getenv("SENTIMENT_BATCH_CONCURRENCY", "8"))
+SENTIMENT_LOCAL_MODEL       = os.getenv("SENTIMENT_LOCAL_MODEL", "cardiffnlp/twitter-xlm-roberta-base-sentiment")
+SENTIMENT_LOCAL_BATCH_SIZE  = int(os.getenv("SENTIMENT_LOCAL_BATCH_SIZE", "32"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。~])\s+|\n+")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+# 감정분석 결과 (Google Natural Language 응답과 같은 모양)
+class SentenceSentiment(BaseModel):
+    text: str
+    score: float
+    magnitude: float
+
+class SentimentData(BaseModel):
+    document_score: float
+    document_magnitude: float
+    language: str
+    sentences: list[SentenceSentiment]
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+    return sentences or [text]
+
+
+# Google Cloud Natural Language
+#   클라이언트(gRPC 채널 + 인증)는 한 번만 만들고 모든 요청이 같이 씀 (클라이언트는 스레드 안전)
+class Google_Sentiment_Backend:
+    name = "google"
+
+    def __init__(self, endpoint: str = SENTIMENT_ENDPOINT, timeout: float = SENTIMENT_TIMEOUT,
+                 batch_concurrency: int = SENTIMENT_BATCH_CONCURRENCY):
+        from google.cloud import language_v2
+
+        self.language_v2 = language_v2
+        self.client = create_google_client(endpoint)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=batch_concurrency, thread_name_prefix="sentiment")
+
+    def analyze(self, text: str) -> SentimentData:
+        response = self.client.analyze_sentiment(
+            request={
+                "document": {"content": text, "type_": self.language_v2.Document.Type.PLAIN_TEXT},
+                "encoding_type": self.language_v2.EncodingType.UTF8,
+            },
+            timeout=self.timeout,
+        )
+        return SentimentData(
+            document_score=response.document_sentiment.score,
+            document_magnitude=response.document_sentiment.magnitude,
+            language=response.language_code,
+            sentences=[
+                SentenceSentiment(text=s.text.content, score=s.sentiment.score, magnitude=s.sentiment.magnitude)
+                for s in response.sentences
+            ],
+        )
+
+    def _analyze_or_none(self, text: str) -> SentimentData | None:
+        try:
+            return self.analyze(text)
+        except Exception as e:
+            print(f"⚠️ 감정분석 실패: {e}")
+            return None
+
+    def analyze_batch(self, texts: list[str]) -> list[SentimentData | None]:
+        """API 에 배치 호출이 없으므로 같은 채널로 batch_concurrency 개씩 동시에 요청 (실패한 문장은 None)."""
+        return list(self._pool.map(self._analyze_or_none, texts))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.client.transport.close()
+
+
+def create_google_client(endpoint: str = ""):
+    from google.cloud import language_v2
+
+    if not endpoint:
+        return language_v2.LanguageServiceClient()
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud.language_v2.services.language_service.transports import LanguageServiceRestTransport
+
+    transport = LanguageServiceRestTransport(host=endpoint, credentials=AnonymousCredentials(), url_scheme="http")
+    return language_v2.LanguageServiceClient(transport=transport)
+
+
+# 로컬 transformers 감정 모델 (negative / neutral / positive)
+#   문장별 score = P(positive) - P(negative), magnitude = P(positive) + P(negative)
+#   문서 score 는 문장 score 평균, 문서 magnitude 는 문장 magnitude 합 (Google 과 같은 해석)
+class Local_Sentiment_Backend:
+    name = "local"
+
+    def __init__(self, model_name: str = SENTIMENT_LOCAL_MODEL, batch_size: int = SENTIMENT_LOCAL_BATCH_SIZE):
+        import torch
+        from transformers import pipeline
+
+        self.clf = pipeline(
+            "text-classification",
+            model=model_name,
+            tokenizer=model_name,
+            top_k=None,
+            device=0 if torch.cuda.is_available() else -1,
+        )
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _polarity(scores: list[dict]) -> tuple[float, float]:
+        probs = {"positive": 0.0, "negative": 0.0}
+        for item in scores:
+            label = item["label"].lower()
+            # 라벨 이름이 없는 모델은 LABEL_0 = 부정, LABEL_2 = 긍정 (3 클래스 순서)
+            if label.startswith("pos") or label == "label_2":
+                probs["positive"] += item["score"]
+            elif label.startswith("neg") or label == "label_0":
+                probs["negative"] += item["score"]
+        return probs["positive"] - probs["negative"], probs["positive"] + probs["negative"]
+
+    def analyze_batch(self, texts: list[str]) -> list[SentimentData | None]:
+        """모든 문서의 문장을 한 번에 모아 배치 추론한 뒤 문서별로 다시 묶음."""
+        per_doc = [split_sentences(text) for text in texts]
+        flat = [s for sentences in per_doc for s in sentences]
+        with self._lock:
+            outputs = self.clf(flat, batch_size=self.batch_size, truncation=True)
+
+        results = []
+        i = 0
+        for text, sentences in zip(texts, per_doc):
+            items = []
+            for sentence in sentences:
+                score, magnitude = self._polarity(outputs[i])
+                items.append(SentenceSentiment(text=sentence, score=round(score, 4), magnitude=round(magnitude, 4)))
+                i += 1
+            results.append(SentimentData(
+                document_score=round(sum(s.score for s in items) / len(items), 4),
+                document_magnitude=round(sum(s.magnitude for s in items), 4),
+                language="ko" if _HANGUL.search(text) else "und",
+                sentences=items,
+            ))
+        return results
+
+    def analyze(self, text: str) -> SentimentData:
+        return self.analyze_batch([text])[0]
+
+    def close(self):
+        pass
+
+
+SENTIMENT_BACKENDS = {
+    "google": Google_Sentiment_Backend,
+    "local":  Local_Sentiment_Backend,
+}
+
+
+# 기본 백엔드 + (선택) 실패 시 대체 백엔드
+class Sentiment_Engine:
+    def __init__(self, primary, fallback_loader=None):
+        """fallback_loader: 대체 백엔드를 만드는 함수 (처음 필요할 때 한 번만 호출)."""
+        self.primary = primary
+        self._fallback_loader = fallback_loader
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self.requests = 0
+        self.fallbacks = 0
+        self.failures = 0
+
+    def _get_fallback(self):
+        if self._fallback_loader is None:
+            return None
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = self._fallback_loader()
+        return self._fallback
+
+    def analyze(self, text: str) -> SentimentData:
+        self.requests += 1
+        try:
+            return self.primary.analyze(text)
+        except Exception:
+            fallback = self._get_fallback()
+            if fallback is None:
+                self.failures += 1
+                raise
+            self.fallbacks += 1
+            return fallback.analyze(text)
+
+    def analyze_batch(self, texts: list[str]) -> list[SentimentData | None]:
+        """백필용: 여러 문장을 한 번에 분석 (결과 순서 = 입력 순서, 끝내 실패한 문장은 None)."""
+        self.requests += len(texts)
+        results = self.primary.analyze_batch(texts)
+        failed = [i for i, r in enumerate(results) if r is None]
+        if failed:
+            fallback = self._get_fallback()
+            if fallback is not None:
+                for i, r in zip(failed, fallback.analyze_batch([texts[i] for i in failed])):
+                    results[i] = r
+                self.fallbacks += len(failed)
+            self.failures += sum(r is None for r in results)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.primary.name,
+            "fallback_loaded": self._fallback is not None,
+            "requests": self.requests,
+            "fallbacks": self.fallbacks,
+            "failures": self.failures,
+        }
+
+    def close(self):
+        self.primary.close()
+        if self._fallback is not None:
+            self._fallback.close()
+
+
+def create_sentiment_engine(backend: str = SENTIMENT_BACKEND, fallback: str = SENTIMENT_FALLBACK):
+    if backend == "off":
+        return None
+    fallback_loader = SENTIMENT_BACKENDS[fallback] if fallback in SENTIMENT_BACKENDS and fallback != backend else None
+    return Sentiment_Engine(SENTIMENT_BACKENDS[backend](), fallback_loader)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_sentiment_engine() -> Sentiment_Engine | None:
+    """프로세스에 하나만 만드는 공유 엔진 (처음 호출할 때 생성, SENTIMENT_BACKEND=off 면 None)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_sentiment_engine()
+    return _engine
@@ -0,0 +1,86 @@
+import asyncio
+import inspect
+
+import anyio
+
+
+# 무거운 의존성(DB, 모델, OpenAI 클라이언트)을 필요할 때 한 번만 만드는 레지스트리
+#   - register() 는 팩토리만 등록 (import 시점에 아무것도 연결/로드하지 않음)
+#   - get() 은 처음 호출될 때 생성, 동시에 여러 요청이 와도 한 번만 생성
+#   - start() 는 lifespan 에서 백그라운드로 미리 생성(워밍업)
+class Service_Registry:
+    def __init__(self):
+        self._factories = {}
+        self._closers = {}
+        self._instances = {}
+        self._errors = {}
+        self._locks = {}
+        self._warmup_task = None
+
+    def register(self, name: str, factory, close=None):
+        """
+        factory: 인자 없는 함수 또는 코루틴 함수. 동기 함수는 스레드에서 실행되어
+                 모델 로드 같은 긴 작업이 이벤트 루프를 막지 않음.
+        close  : 종료 시 인스턴스를 받아 정리하는 함수 (코루틴 함수 가능)
+        """
+        self._factories[name] = factory
+        if close is not None:
+            self._closers[name] = close
+
+    async def get(self, name: str):
+        if name in self._instances:
+            return self._instances[name]
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if name not in self._instances:
+                factory = self._factories[name]
+                try:
+                    if inspect.iscoroutinefunction(factory):
+                        instance = await factory()
+                    else:
+                        instance = await anyio.to_thread.run_sync(factory)
+                except Exception as e:
+                    self._errors[name] = f"{type(e).__name__}: {e}"
+                    raise
+                self._errors.pop(name, None)
+                self._instances[name] = instance
+        return self._instances[name]
+
+    def peek(self, name: str):
+        """생성이 끝났으면 인스턴스, 아니면 None (생성을 유발하지 않음)."""
+        return self._instances.get(name)
+
+    def status(self) -> dict:
+        return {
+            name: "ready" if name in self._instances
+            else f"failed ({self._errors[name]})" if name in self._errors
+            else "pending"
+            for name in self._factories
+        }
+
+    def start(self, names: list[str] | None = None):
+        """등록된 서비스를 백그라운드에서 미리 생성 (실패해도 다음 get() 에서 재시도)."""
+        async def warm(name):
+            try:
+                await self.get(name)
+            except Exception as e:
+                print(f"❌ 서비스 초기화 실패 ({name}): {e}")
+
+        async def warm_all():
+            await asyncio.gather(*(warm(n) for n in (names or list(self._factories))))
+
+        self._warmup_task = asyncio.create_task(warm_all())
+
+    async def close(self):
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        for name, close in self._closers.items():
+            instance = self._instances.pop(name, None)
+            if instance is None:
+                continue
+            try:
+                result = close(instance)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"⚠️ 서비스 종료 실패 ({name}): {e}")
@@ -1,17 +1,178 @@
-from transformers import pipeline
-import torch
+import asyncio
+import os
+import threading
+
+import anyio
+import numpy as np
+
+from intent_batcher import Intent_Batcher
+from intent_cache import INTENT_CACHE_PATH, INTENT_CACHE_SIZE, Intent_Cache, model_fingerprint, text_key
+
+# 분류기를 동시에 돌릴 스레드 수 (torch 가 내부적으로 이미 멀티스레드)
+INTENT_THREADS = int(os.getenv("INTENT_THREADS", "2"))
+
+# 마이크로 배칭 설정 (INTENT_BATCHING=0 이면 요청마다 바로 추론)
+INTENT_BATCHING          = os.getenv("INTENT_BATCHING", "1") == "1"
+INTENT_BATCH_MAX_SIZE    = int(os.getenv("INTENT_BATCH_MAX_SIZE", "16"))
+INTENT_BATCH_MAX_WAIT_MS = float(os.getenv("INTENT_BATCH_MAX_WAIT_MS", "5"))
+
+# 추론 백엔드 선택
+#   eager : ./trained_intent_model 의 fp32 모델 (기본값)
+#   int8  : ML/Text_ML.py 가 내보낸 동적 int8 양자화 모델 (CPU 전용)
+#   student: ML/Text_ML.py --distill 로 만든 문자 n-gram TF-IDF + 로지스틱 회귀 모델 (torch 불필요)
+#   remote: intent_server.py 사이드카에 소켓으로 요청 (워커는 모델을 메모리에 올리지 않음)
+# transformers / torch 는 실제로 모델을 올리는 백엔드에서만 import
+INTENT_BACKEND        = os.getenv("INTENT_BACKEND", "eager")
+INTENT_MODEL_DIR      = os.getenv("INTENT_MODEL_DIR", "./trained_intent_model")
+INTENT_INT8_MODEL_DIR = os.getenv("INTENT_INT8_MODEL_DIR", "./trained_intent_model_int8")
+INTENT_STUDENT_DIR    = os.getenv("INTENT_STUDENT_DIR", "./trained_intent_model_student")
+# remote 백엔드는 워커에서 모델 파일을 볼 수 없으므로, 사이드카 모델을 바꿀 때마다 이 값도 바꿔야 의도 캐시가 무효화됨
+#   비어 있으면 remote 에서는 INTENT_CACHE_PATH 를 무시 (메모리 캐시만 사용)
+INTENT_REMOTE_MODEL_ID = os.getenv("INTENT_REMOTE_MODEL_ID", "")
+
+# 캐스케이드: 학생 모델이 먼저 분류하고, 보정된 확률이 기준 미만인 문장만 INTENT_BACKEND 모델로 넘김
+#   기준값은 python -m bench.bench_intent_cascade 의 단계별 적중률 / 정확도를 보고 조정
+INTENT_CASCADE           = os.getenv("INTENT_CASCADE", "0") == "1"
+INTENT_CASCADE_THRESHOLD = float(os.getenv("INTENT_CASCADE_THRESHOLD", "0.9"))
+
+
+def load_eager_pipeline():
+    import torch
+    from transformers import pipeline
+
+    return pipeline(
+        "text-classification",
+        model=INTENT_MODEL_DIR,
+        tokenizer=INTENT_MODEL_DIR,
+        top_k=1,
+        device=0 if torch.cuda.is_available() else -1
+    )
+
+
+def load_int8_pipeline():
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+    # fp32 가중치를 읽지 않고 config 로 뼈대만 만든 뒤 양자화 → int8 state_dict 로드
+    config = AutoConfig.from_pretrained(INTENT_INT8_MODEL_DIR)
+    model = AutoModelForSequenceClassification.from_config(config)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    state_dict = torch.load(
+        os.path.join(INTENT_INT8_MODEL_DIR, "quantized_model.pt"),
+        map_location="cpu",
+        weights_only=False,
+    )
+    model.load_state_dict(state_dict)
+    model.eval()
+    return pipeline(
+        "text-classification",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(INTENT_INT8_MODEL_DIR),
+        top_k=1,
+        device=-1
+    )
+
+
+# 학생 모델을 transformers 파이프라인과 같은 출력 형식([[{"label": "LABEL_n", "score": p}], ...])으로 감쌈
+#   score 는 Text_ML.py 가 검증셋으로 맞춘 온도로 보정한 확률
+class Student_Intent_Pipeline:
+    def __init__(self, model_dir: str):
+        import joblib
+
+        bundle = joblib.load(os.path.join(model_dir, "student.joblib"))
+        self.model = bundle["model"]
+        self.temperature = bundle.get("temperature", 1.0)
+
+    def __call__(self, texts, batch_size=None):
+        scores = self.model.decision_function([texts] if isinstance(texts, str) else list(texts)) / self.temperature
+        probs = np.exp(scores - scores.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        classes = self.model.classes_
+        return [[{"label": f"LABEL_{classes[i]}", "score": float(p[i])}] for p in probs for i in [p.argmax()]]
+
+
+def load_student_pipeline():
+    return Student_Intent_Pipeline(INTENT_STUDENT_DIR)
+
+
+# 빠른 1단계(학생)가 확신하는 문장은 바로 답하고, 나머지만 2단계(BERT 등)로 한 배치에 모아 추론
+class Cascade_Intent_Pipeline:
+    def __init__(self, fast, slow, threshold: float = INTENT_CASCADE_THRESHOLD):
+        self.fast = fast
+        self.slow = slow
+        self.threshold = threshold
+        self.fast_hits = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, batch_size=None):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        results = self.fast(texts)
+        escalate = [i for i, out in enumerate(results) if out[0]["score"] < self.threshold]
+        if escalate:
+            slow_results = self.slow([texts[i] for i in escalate], batch_size=len(escalate))
+            for i, out in zip(escalate, slow_results):
+                results[i] = out
+        with self._lock:
+            self.fast_hits += len(texts) - len(escalate)
+            self.escalated += len(escalate)
+        return results
+
+    def stats(self) -> dict:
+        total = self.fast_hits + self.escalated
+        return {
+            "threshold": self.threshold,
+            "fast_hits": self.fast_hits,
+            "escalated": self.escalated,
+            "fast_hit_rate": round(self.fast_hits / total, 4) if total else 0.0,
+        }
+
+
+def load_remote_pipeline():
+    from intent_server import INTENT_SERVER_ADDR, Remote_Intent_Client
+
+    return Remote_Intent_Client(INTENT_SERVER_ADDR)
+
+
+INTENT_BACKENDS = {
+    "eager":   load_eager_pipeline,
+    "int8":    load_int8_pipeline,
+    "student": load_student_pipeline,
+    "remote":  load_remote_pipeline,
+}
+
+# 의도 캐시 무효화 기준이 되는 백엔드별 모델 위치
+INTENT_MODEL_DIRS = {
+    "eager":   INTENT_MODEL_DIR,
+    "int8":    INTENT_INT8_MODEL_DIR,
+    "student": INTENT_STUDENT_DIR,
+    "remote":  INTENT_REMOTE_MODEL_ID,
+}
+
+
+def intent_cache_path() -> str:
+    """저장 경로. 모델 식별값을 알 수 없는 경우(remote 인데 INTENT_REMOTE_MODEL_ID 없음)에는 저장하지 않음."""
+    if INTENT_CACHE_PATH and INTENT_BACKEND == "remote" and not INTENT_REMOTE_MODEL_ID:
+        print("⚠️ INTENT_REMOTE_MODEL_ID 가 없어 의도 캐시를 파일에 저장하지 않습니다.")
+        return ""
+    return INTENT_CACHE_PATH
+
+
+def current_model_fingerprint() -> str:
+    parts = [INTENT_BACKEND, INTENT_MODEL_DIRS.get(INTENT_BACKEND, "")]
+    if INTENT_CASCADE:
+        parts += [INTENT_STUDENT_DIR, INTENT_CASCADE_THRESHOLD]
+    return model_fingerprint(*parts)
+
 
 class TEXT_Embed:
     def __init__(self):
         try:
-            self.clf = pipeline(
-                "text-classification",
-                model="./trained_intent_model",
-                tokenizer="./trained_intent_model",
-                top_k=1,
-                device=0 if torch.cuda.is_available() else -1
-            )
-            print("✅ 의도 분류기 로드 완료!")
+            if INTENT_CASCADE:
+                self.clf = Cascade_Intent_Pipeline(load_student_pipeline(), INTENT_BACKENDS[INTENT_BACKEND]())
+            else:
+                self.clf = INTENT_BACKENDS[INTENT_BACKEND]()
+            print(f"✅ 의도 분류기 로드 완료! (backend={INTENT_BACKEND}, cascade={INTENT_CASCADE})")
         except Exception as e:
             print(f"❌ 분류기 로드 실패: {e}")
             self.clf = None
@@ -23,9 +184,80 @@ class TEXT_Embed:
             "LABEL_3": "작별",
             "LABEL_4": "칭찬"
         }
+        self._limiter = anyio.CapacityLimiter(INTENT_THREADS)
+
+        self.cache = None
+        if self.clf is not None and INTENT_CACHE_SIZE > 0:
+            self.cache = Intent_Cache(current_model_fingerprint(), path=intent_cache_path())
+
+        self.batcher = None
+        if self.clf is not None and INTENT_BATCHING:
+            self.batcher = Intent_Batcher(
+                self.predict_batch,
+                max_batch_size=INTENT_BATCH_MAX_SIZE,
+                max_wait_ms=INTENT_BATCH_MAX_WAIT_MS,
+            )
+
+    def predict_batch(self, texts):
+        """여러 문장을 한 번의 패딩된 배치로 추론해 원본 라벨(LABEL_n) 목록 반환."""
+        outputs = self.clf(texts, batch_size=len(texts))
+        return [out[0]["label"] for out in outputs]
+
+    def _cached(self, text):
+        """(캐시 키, 캐시된 원본 라벨 또는 None). 캐시를 끄면 (None, None)."""
+        if self.cache is None:
+            return None, None
+        key = text_key(text)
+        return key, self.cache.get(key)
+
+    def _predict(self, text):
+        if self.batcher is not None:
+            return self.batcher.submit(text).result()
+        return self.clf(text)[0][0]["label"]
 
     def classify_intent(self, text):
         if self.clf is None:
             return None
-        prediction = self.clf(text)[0][0]["label"]
+        key, prediction = self._cached(text)
+        if prediction is None:
+            prediction = self._predict(text)
+            if key is not None:
+                self.cache.set(key, prediction)
+        return self.label_map.get(prediction, "알 수 없음")
+
+    def classify_batch(self, texts, batch_size=64):
+        """여러 문장을 batch_size 개씩 묶어 추론 (지난 메시지 백필용, 캐시·배처를 거치지 않음)."""
+        if self.clf is None:
+            return [None] * len(texts)
+        labels = []
+        for i in range(0, len(texts), batch_size):
+            labels.extend(self.predict_batch(texts[i:i + batch_size]))
+        return [self.label_map.get(label, "알 수 없음") for label in labels]
+
+    async def aclassify_intent(self, text):
+        """이벤트 루프 밖에서 추론 (배칭 스레드 또는 전용 스레드 풀). 캐시에 있으면 바로 반환."""
+        if self.clf is None:
+            return None
+        key, prediction = self._cached(text)
+        if prediction is None:
+            if self.batcher is not None:
+                prediction = await asyncio.wrap_future(self.batcher.submit(text))
+            else:
+                prediction = await anyio.to_thread.run_sync(self._predict, text, limiter=self._limiter)
+            if key is not None:
+                self.cache.set(key, prediction)
         return self.label_map.get(prediction, "알 수 없음")
+
+    def stats(self) -> dict:
+        stats = {}
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if isinstance(self.clf, Cascade_Intent_Pipeline):
+            stats["cascade"] = self.clf.stats()
+        return stats
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.cache is not None:
+            self.cache.close()
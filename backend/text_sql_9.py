@@ -1,8 +1,16 @@
+import asyncio
+import json
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Index, func, insert, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from history_search import build_search_page, create_search_index, search_select
+from pagination import EXPORT_BATCH_SIZE, keyset_select, build_page, message_columns, message_to_dict
+from rollups import build_stats, rollup_counts, rollup_upserts
 
 # .env 로드
 load_dotenv()
@@ -14,37 +22,158 @@ MYSQL_HOST     = os.getenv("MYSQL_HOST", "localhost")
 MYSQL_PORT     = os.getenv("MYSQL_PORT", "3306")
 MYSQL_DB       = os.getenv("MYSQL_DB", "chat_db")
 
-# MySQL 연결 URL
-DATABASE_URL = (
+# MySQL 연결 URL (DATABASE_URL 환경변수로 덮어쓰기 가능)
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}"
     f"@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 )
 
+# 비동기 드라이버(aiomysql) 연결 URL
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or (
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}"
+    f"@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+)
+
+# 비동기 커넥션 풀 크기
+DB_POOL_SIZE    = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# write-behind: 메시지를 큐에 모았다가 배치마다 multi-row INSERT 한 번으로 저장
+DB_WRITE_BEHIND      = os.getenv("DB_WRITE_BEHIND", "1") == "1"
+DB_WRITE_BATCH_SIZE  = int(os.getenv("DB_WRITE_BATCH_SIZE", "500"))
+DB_WRITE_FLUSH_MS    = float(os.getenv("DB_WRITE_FLUSH_MS", "200"))
+DB_WRITE_MAX_BACKLOG = int(os.getenv("DB_WRITE_MAX_BACKLOG", "10000"))
+DB_WRITE_RETRIES     = 3
+# 재시도 후에도 저장하지 못한 메시지를 남기는 JSONL 파일 (python text_sql_9.py replay-dead-letters 로 다시 저장)
+DB_DEAD_LETTER_PATH  = os.getenv("DB_DEAD_LETTER_PATH", "failed_messages.jsonl")
+
 # SQLAlchemy 세팅
 Base = declarative_base()
 engine = create_engine(DATABASE_URL, echo=True, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# 비동기 엔진 (connect 는 첫 요청 시점에 일어남)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    **({} if ASYNC_DATABASE_URL.startswith("sqlite") else
+       {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}),
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 # 테이블 모델
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
-    id         = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    speaker    = Column(String(10), nullable=False)
-    content    = Column(Text,   nullable=False)
+    id              = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    speaker         = Column(String(10), nullable=False)
+    content         = Column(Text,   nullable=False)
+    created_at      = Column(DateTime, default=datetime.utcnow)
+    user_id         = Column(String(64), nullable=True)
+    conversation_id = Column(String(32), nullable=True)
+    # 의도 분류 결과 (사용자 메시지는 입력 의도, AI 메시지는 응답 의도. 분류하지 않았으면 NULL)
+    intent          = Column(String(16), nullable=True)
+    # 대화 스타일 (system prompt 의 id, 원문은 chat_styles)
+    style           = Column(String(16), nullable=True)
+
+    __table_args__ = (
+        # /history keyset 페이지네이션용 복합 인덱스
+        Index("ix_chat_messages_created_at_id", "created_at", "id"),
+        # 대화별 최근 메시지 조회용
+        Index("ix_chat_messages_conversation", "conversation_id", "created_at", "id"),
+        Index("ix_chat_messages_user_id", "user_id"),
+    )
+
+# 대화(세션) 테이블: 사용자 + 창 밖으로 밀려난 턴의 누적 요약
+class Conversation(Base):
+    __tablename__ = "conversations"
+    id         = Column(String(32), primary_key=True)
+    user_id    = Column(String(64), nullable=True, index=True)
+    summary    = Column(Text, nullable=False, default="")
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# 사용자 테이블: username 고유 인덱스로 한 번에 조회, 비밀번호는 솔트가 포함된 해시(bcrypt / argon2)만 저장
+class User(Base):
+    __tablename__ = "users"
+    id            = Column(Integer, primary_key=True, autoincrement=True)
+    username      = Column(String(64), nullable=False, unique=True)
+    password_hash = Column(String(255), nullable=False)
+    created_at    = Column(DateTime, default=datetime.utcnow)
 
-# 테이블 생성
-Base.metadata.create_all(bind=engine)
+# 스타일 id → system prompt 원문
+class ChatStyle(Base):
+    __tablename__ = "chat_styles"
+    id         = Column(String(16), primary_key=True)
+    prompt     = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# 시간/일 × 스타일 × 의도 × 화자 별 메시지 수 (메시지 저장과 같은 트랜잭션에서 더함, 없는 값은 "")
+class MessageRollup(Base):
+    __tablename__ = "message_rollups"
+    granularity  = Column(String(4), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    style        = Column(String(16), primary_key=True)
+    intent       = Column(String(16), primary_key=True)
+    speaker      = Column(String(10), primary_key=True)
+    messages     = Column(Integer, nullable=False, default=0)
+
+# 롤업 백필 진행 상황 (한 행). backfill_upto 까지는 롤업 도입 전에 저장된 메시지
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+    id            = Column(Integer, primary_key=True)
+    backfill_upto = Column(Integer, nullable=False)
+    backfilled_id = Column(Integer, nullable=False, default=0)
+
+
+def add_missing_columns(conn):
+    """기존 테이블에 모델에는 있고 DB 에는 없는 (nullable) 컬럼을 ALTER TABLE 로 추가."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def create_schema(conn):
+    Base.metadata.create_all(conn)
+    add_missing_columns(conn)
+    # 이미 있던 테이블에는 create_all 이 인덱스를 추가하지 않으므로 따로 생성
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    create_search_index(conn)
+    # 처음 롤업 테이블을 만들 때, 그 전에 있던 메시지는 백필 대상으로 기록 (이후 메시지는 저장할 때 집계)
+    #   여러 워커가 동시에 시작하면 다른 워커가 먼저 넣을 수 있으므로, 중복이면 savepoint 만 되돌리고 그쪽 값을 씀
+    if conn.execute(select(RollupState.id)).first() is None:
+        upto = conn.execute(select(func.max(ChatMessage.id))).scalar() or 0
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(RollupState).values(id=1, backfill_upto=upto, backfilled_id=0))
+        except IntegrityError:
+            pass
 
 # DB 조작 클래스
 class Text_SQL:
     def __init__(self):
         self.SessionLocal = SessionLocal
 
+    # 테이블 생성 (import 시점이 아니라 명시적으로 호출 → 느린 DB 가 서버 시작을 막지 않음)
+    def init(self):
+        with engine.begin() as conn:
+            create_schema(conn)
+
     def save_message(self, speaker: str, content: str):
         with self.SessionLocal() as session:
-            msg = ChatMessage(speaker=speaker, content=content)
+            msg = ChatMessage(speaker=speaker, content=content, created_at=datetime.utcnow())
             session.add(msg)
+            for stmt in rollup_upserts(
+                engine.dialect.name, MessageRollup, rollup_counts([{"speaker": speaker, "created_at": msg.created_at}]),
+            ):
+                session.execute(stmt)
             session.commit()
             session.refresh(msg)
             return msg
@@ -65,3 +194,448 @@ class Text_SQL:
                 }
                 for m in messages
             ]
+
+    def get_messages_page(self, limit: int, cursor: str | None = None, order: str = "asc"):
+        with self.SessionLocal() as session:
+            rows = session.execute(keyset_select(ChatMessage, limit, cursor, order)).all()
+            return build_page(rows, limit)
+
+    def iter_messages(self, batch_size: int = EXPORT_BATCH_SIZE):
+        """ORM 객체를 만들지 않고 서버 사이드 커서로 batch_size 행씩 읽어 dict 목록을 yield."""
+        with self.SessionLocal() as session:
+            result = session.execute(
+                select(*message_columns(ChatMessage))
+                .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+                .execution_options(stream_results=True, yield_per=batch_size)
+            )
+            for partition in result.partitions():
+                yield [message_to_dict(r) for r in partition]
+
+    def user_exists(self, username: str) -> bool:
+        with self.SessionLocal() as session:
+            return session.execute(select(User.id).where(User.username == username)).first() is not None
+
+    def get_password_hash(self, username: str) -> str | None:
+        with self.SessionLocal() as session:
+            return session.execute(
+                select(User.password_hash).where(User.username == username)
+            ).scalar_one_or_none()
+
+    def add_user(self, username: str, password_hash: str) -> bool:
+        """이미 있는 username 이면 False (고유 인덱스 위반)."""
+        with self.SessionLocal() as session:
+            session.add(User(username=username, password_hash=password_hash))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return False
+            return True
+
+
+# write-behind 큐: 요청 경로에서는 큐에 넣기만 하고, 백그라운드 태스크가
+# 배치 크기(DB_WRITE_BATCH_SIZE) 또는 주기(DB_WRITE_FLUSH_MS) 마다 한 번에 INSERT
+_STOP = object()
+
+
+def write_dead_letters(path: str, rows: list[dict]):
+    with open(path, "a", encoding="utf-8") as f:
+        for row in rows:
+            record = {**row, "created_at": row["created_at"].isoformat() if row.get("created_at") else None}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_dead_letters(path: str) -> list[dict]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if row.get("created_at"):
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                rows.append(row)
+    return rows
+
+
+class Message_Write_Behind:
+    def __init__(self, insert_rows, batch_size: int = DB_WRITE_BATCH_SIZE,
+                 flush_ms: float = DB_WRITE_FLUSH_MS, max_backlog: int = DB_WRITE_MAX_BACKLOG,
+                 dead_letter_path: str = DB_DEAD_LETTER_PATH):
+        self.insert_rows = insert_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.dead_letter_path = dead_letter_path
+        # 큐가 가득 차면 put() 이 기다림 → DB 가 느려지면 요청 쪽으로 역압이 걸림
+        self._queue = asyncio.Queue(maxsize=max_backlog)
+        self._task = None
+        self.flushed_rows = 0
+        self.dead_letter_rows = 0
+        self.dropped_rows = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, rows: list[dict]):
+        for row in rows:
+            await self._queue.put(row)
+
+    async def _collect(self) -> tuple[list[dict], bool]:
+        """(배치, 종료 신호를 받았는지)"""
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                # wait_for(get()) 는 Python 3.11 이하에서 시간 초과와 겹치면 꺼낸 행을 잃을 수 있어 직접 기다림
+                getter = asyncio.ensure_future(self._queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=remaining)
+                if not done:
+                    getter.cancel()
+                    try:
+                        # 취소가 닿기 전에 이미 꺼냈으면 그 행을 씀
+                        item = await getter
+                    except asyncio.CancelledError:
+                        break
+                else:
+                    item = getter.result()
+            else:
+                # 이미 쌓인 행은 기다리지 않고 바로 가져감
+                item = self._queue.get_nowait()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch: list[dict]):
+        for attempt in range(DB_WRITE_RETRIES):
+            try:
+                await self.insert_rows(batch)
+                self.flushed_rows += len(batch)
+                return
+            except Exception as e:
+                print(f"⚠️ 메시지 일괄 저장 실패 ({attempt + 1}/{DB_WRITE_RETRIES}): {e}")
+                if attempt + 1 < DB_WRITE_RETRIES:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        # DB 가 오래 내려가 있어도 기록은 잃지 않도록 파일에 남김 (파일에도 못 쓰면 그때 버림)
+        try:
+            await asyncio.to_thread(write_dead_letters, self.dead_letter_path, batch)
+            self.dead_letter_rows += len(batch)
+            print(f"❌ 메시지 {len(batch)}건 저장 실패 → {self.dead_letter_path} 에 보관")
+        except OSError as e:
+            self.dropped_rows += len(batch)
+            print(f"❌ 메시지 {len(batch)}건 저장 포기 (보관 파일 쓰기 실패: {e})")
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._collect()
+            if batch:
+                await self._flush(batch)
+            if stop:
+                return
+
+    async def close(self):
+        """큐에 남은 행을 모두 저장한 뒤 종료 (graceful flush)."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+
+# 비동기 DB 조작 클래스 (이벤트 루프를 막지 않음)
+class Async_Text_SQL:
+    def __init__(self, write_behind: bool = DB_WRITE_BEHIND):
+        self.engine = async_engine
+        self.SessionLocal = AsyncSessionLocal
+        self.writer = Message_Write_Behind(self.insert_rows) if write_behind else None
+        self._known_styles = set()
+
+    async def init(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(create_schema)
+        if self.writer is not None:
+            self.writer.start()
+
+    async def ping(self):
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def insert_rows(self, rows: list[dict]):
+        """행 목록을 multi-row INSERT 한 번 + 집계 upsert + 커밋 한 번으로 저장."""
+        async with self.SessionLocal() as session:
+            await session.execute(insert(ChatMessage), rows)
+            for stmt in rollup_upserts(self.engine.dialect.name, MessageRollup, rollup_counts(rows)):
+                await session.execute(stmt)
+            await session.commit()
+
+    async def replay_dead_letters(self, path: str = DB_DEAD_LETTER_PATH) -> int:
+        """
+        write-behind 가 보관한 메시지를 한 트랜잭션으로 다시 저장하고 보관 파일을 지움.
+        실행 중인 서버가 새로 덧붙이는 행과 섞이지 않도록 파일 이름을 먼저 바꾼 뒤 읽음 (실패하면 다음 실행에서 이어서).
+        """
+        replaying = path + ".replaying"
+        if os.path.exists(path) and not os.path.exists(replaying):
+            os.replace(path, replaying)
+        if not os.path.exists(replaying):
+            return 0
+        rows = await asyncio.to_thread(read_dead_letters, replaying)
+        if rows:
+            await self.insert_rows(rows)
+        os.remove(replaying)
+        return len(rows)
+
+    async def save_messages(self, rows: list[tuple], user_id: str | None = None,
+                            conversation_id: str | None = None, style: str | None = None):
+        """
+        (speaker, content) 또는 (speaker, content, intent) 목록 저장. write-behind 가 켜져 있으면 큐에 넣고 바로 반환,
+        아니면 한 트랜잭션, 한 번의 커밋으로 바로 저장.
+        """
+        if not rows:
+            return
+        # 저장이 늦어져도 메시지 시각은 요청 시점 기준
+        now = datetime.utcnow()
+        values = [
+            {"speaker": speaker, "content": content, "created_at": now,
+             "user_id": user_id, "conversation_id": conversation_id, "intent": intent[0] if intent else None,
+             "style": style}
+            for speaker, content, *intent in rows
+        ]
+        if self.writer is not None and self.writer.running:
+            await self.writer.put(values)
+        else:
+            await self.insert_rows(values)
+
+    async def save_message(self, speaker: str, content: str):
+        await self.save_messages([(speaker, content)])
+
+    async def get_all_messages(self):
+        async with self.SessionLocal() as session:
+            result = await session.execute(
+                select(ChatMessage).order_by(ChatMessage.created_at.asc())
+            )
+            return [
+                {
+                    "speaker":    m.speaker,
+                    "content":    m.content,
+                    "created_at": m.created_at.strftime("%Y-%m-%d %H:%M:%S")
+                }
+                for m in result.scalars()
+            ]
+
+    async def load_conversation(self, conversation_id: str, max_turns: int):
+        """(user_id, summary, 최근 턴 목록) 또는 없는 대화면 None."""
+        async with self.SessionLocal() as session:
+            conversation = await session.get(Conversation, conversation_id)
+            if conversation is None:
+                return None
+            result = await session.execute(
+                select(ChatMessage.speaker, ChatMessage.content)
+                .where(ChatMessage.conversation_id == conversation_id)
+                .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+                .limit(max_turns)
+            )
+            turns = [{"role": r.speaker, "content": r.content} for r in reversed(result.all())]
+            return conversation.user_id, conversation.summary, turns
+
+    async def create_conversation(self, conversation_id: str, user_id: str | None):
+        async with self.SessionLocal() as session:
+            session.add(Conversation(id=conversation_id, user_id=user_id, summary=""))
+            await session.commit()
+
+    async def save_summary(self, conversation_id: str, user_id: str | None, summary: str):
+        async with self.SessionLocal() as session:
+            await session.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(summary=summary, updated_at=datetime.utcnow())
+            )
+            await session.commit()
+
+    async def get_messages_page(self, limit: int, cursor: str | None = None, order: str = "asc"):
+        async with self.SessionLocal() as session:
+            result = await session.execute(keyset_select(ChatMessage, limit, cursor, order))
+            return build_page(result.all(), limit)
+
+    async def search_messages(self, query: str, limit: int, offset: int = 0, order: str = "rank", **filters):
+        """전문 검색 페이지. filters: speaker, intent, since, until. 검색어가 비어 있으면 ValueError."""
+        stmt = search_select(ChatMessage, self.engine.dialect.name, query, limit, offset, order, **filters)
+        async with self.SessionLocal() as session:
+            result = await session.execute(stmt)
+            return build_search_page(result.all(), limit, offset)
+
+    async def save_style(self, style: str, prompt: str):
+        """스타일 원문을 한 번만 저장 (이 프로세스에서 이미 저장한 id 는 DB 에 묻지 않음)."""
+        if style in self._known_styles:
+            return
+        async with self.SessionLocal() as session:
+            if await session.get(ChatStyle, style) is None:
+                session.add(ChatStyle(id=style, prompt=prompt))
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # 다른 워커가 먼저 저장
+                    await session.rollback()
+        self._known_styles.add(style)
+
+    async def get_stats(self, granularity: str, since: datetime, until: datetime,
+                        group_by: tuple = ("style", "intent", "speaker"), **filters) -> dict:
+        """
+        [since, until) 구간의 집계 행만 읽음 (기본 키 (granularity, bucket_start, ...) 범위 조회).
+        filters: style, intent, speaker. group_by 에 없는 차원은 합쳐서 돌려줌.
+        """
+        dims = [getattr(MessageRollup, dim) for dim in group_by]
+        stmt = (
+            select(MessageRollup.bucket_start, *dims, func.sum(MessageRollup.messages).label("messages"))
+            .where(
+                MessageRollup.granularity == granularity,
+                MessageRollup.bucket_start >= since,
+                MessageRollup.bucket_start < until,
+            )
+            .group_by(MessageRollup.bucket_start, *dims)
+            .order_by(MessageRollup.bucket_start, *dims)
+        )
+        for dim, value in filters.items():
+            if value is not None:
+                stmt = stmt.where(getattr(MessageRollup, dim) == value)
+        async with self.SessionLocal() as session:
+            rows = (await session.execute(stmt)).all()
+            style_ids = {r.style for r in rows if "style" in r._fields and r.style}
+            styles = {}
+            if style_ids:
+                result = await session.execute(select(ChatStyle.id, ChatStyle.prompt).where(ChatStyle.id.in_(style_ids)))
+                styles = {r.id: r.prompt for r in result}
+            state = await session.get(RollupState, 1)
+        pending = max(0, state.backfill_upto - state.backfilled_id) if state is not None else 0
+        return build_stats(rows, styles, granularity, since, until, pending)
+
+    async def backfill_rollups(self, chunk_size: int, classify=None) -> tuple[int, int]:
+        """
+        롤업 도입 전 메시지를 id 순서로 chunk_size 행 집계 → (이번에 처리한 행 수, 남은 id 범위).
+        classify: async (texts) → 의도 목록. 주면 의도가 비어 있는 메시지를 채워서 저장한 뒤 집계.
+        진행 위치는 집계와 같은 트랜잭션에 저장되므로 중간에 멈춰도 다시 실행하면 이어서 진행 (동시에 한 개만 실행).
+        """
+        async with self.SessionLocal() as session:
+            state = await session.get(RollupState, 1)
+            if state is None or state.backfilled_id >= state.backfill_upto:
+                return 0, 0
+            upto, after = state.backfill_upto, state.backfilled_id
+            result = await session.execute(
+                select(ChatMessage.id, ChatMessage.speaker, ChatMessage.content, ChatMessage.created_at,
+                       ChatMessage.intent, ChatMessage.style)
+                .where(ChatMessage.id > after, ChatMessage.id <= upto)
+                .order_by(ChatMessage.id)
+                .limit(chunk_size)
+            )
+            rows = [dict(r._mapping) for r in result]
+
+        # 분류는 트랜잭션 밖에서 (SQLite 는 읽기 트랜잭션이 열려 있으면 다른 쓰기가 막힘)
+        labeled = []
+        if classify is not None:
+            missing = [r for r in rows if r["intent"] is None]
+            if missing:
+                for row, intent in zip(missing, await classify([r["content"] for r in missing])):
+                    row["intent"] = intent
+                    labeled.append({"id": row["id"], "intent": intent})
+
+        async with self.SessionLocal() as session:
+            if labeled:
+                await session.execute(update(ChatMessage), labeled)
+            for stmt in rollup_upserts(self.engine.dialect.name, MessageRollup, rollup_counts(rows)):
+                await session.execute(stmt)
+            last_id = rows[-1]["id"] if rows else upto
+            await session.execute(update(RollupState).where(RollupState.id == 1).values(backfilled_id=last_id))
+            await session.commit()
+        return len(rows), upto - last_id
+
+    async def get_password_hash(self, username: str) -> str | None:
+        """없는 사용자면 None."""
+        async with self.SessionLocal() as session:
+            result = await session.execute(select(User.password_hash).where(User.username == username))
+            return result.scalar_one_or_none()
+
+    async def add_user(self, username: str, password_hash: str) -> bool:
+        """이미 있는 username 이면 False (고유 인덱스 위반)."""
+        async with self.SessionLocal() as session:
+            session.add(User(username=username, password_hash=password_hash))
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return False
+            return True
+
+    async def update_password_hash(self, username: str, password_hash: str):
+        async with self.SessionLocal() as session:
+            await session.execute(
+                update(User).where(User.username == username).values(password_hash=password_hash)
+            )
+            await session.commit()
+
+    async def stream_messages(self, batch_size: int = EXPORT_BATCH_SIZE):
+        """ORM 객체를 만들지 않고 서버 사이드 커서로 batch_size 행씩 읽어 dict 목록을 yield."""
+        async with self.SessionLocal() as session:
+            result = await session.stream(
+                select(*message_columns(ChatMessage))
+                .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+                .execution_options(yield_per=batch_size)
+            )
+            async for partition in result.partitions():
+                yield [message_to_dict(r) for r in partition]
+
+    def stats(self) -> dict:
+        """커넥션 풀 사용량 + write-behind 대기열 (풀 종류에 따라 없는 값은 생략)."""
+        pool = self.engine.pool
+        stats = {
+            name: getattr(pool, name)()
+            for name in ("size", "checkedout", "checkedin", "overflow")
+            if hasattr(pool, name)
+        }
+        if self.writer is not None:
+            stats.update(
+                write_backlog=self.writer.backlog,
+                write_flushed_rows=self.writer.flushed_rows,
+                write_dead_letter_rows=self.writer.dead_letter_rows,
+                write_dropped_rows=self.writer.dropped_rows,
+            )
+        return stats
+
+    async def close(self):
+        if self.writer is not None:
+            await self.writer.close()
+        await self.engine.dispose()
+
+
+# write-behind 가 보관한 메시지 다시 저장 (DB 가 복구된 뒤): python text_sql_9.py replay-dead-letters
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["replay-dead-letters"])
+    parser.add_argument("--path", default=DB_DEAD_LETTER_PATH)
+    args = parser.parse_args()
+
+    async def main():
+        adb = Async_Text_SQL(write_behind=False)
+        await adb.init()
+        try:
+            count = await adb.replay_dead_letters(args.path)
+        finally:
+            await adb.close()
+        print(f"✅ 메시지 {count}건 다시 저장")
+
+    asyncio.run(main())
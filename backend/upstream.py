@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+
+import openai
+
+from conversation import estimate_tokens
+
+# OpenAI 호출 관리 설정 (계정 한도에 맞게 조정)
+#   OPENAI_RPM / OPENAI_TPM       : 분당 요청 수 / 분당 토큰 수 (토큰 버킷, 0 이면 제한 없음)
+#   OPENAI_MAX_CONCURRENCY        : 워커 하나가 동시에 보내는 요청 수
+#   OPENAI_QUEUE_TIMEOUT          : 동시성 슬롯 + 토큰 버킷을 기다리는 최대 시간(초), 넘으면 거절
+OPENAI_RPM             = int(os.getenv("OPENAI_RPM", "3500"))
+OPENAI_TPM             = int(os.getenv("OPENAI_TPM", "90000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "64"))
+OPENAI_QUEUE_TIMEOUT   = float(os.getenv("OPENAI_QUEUE_TIMEOUT", "10"))
+# TPM 계산에 쓰는 응답 토큰 수 (max_tokens 가 없을 때)
+OPENAI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", "256"))
+
+# 재시도: 429 / 5xx / 타임아웃만, full jitter 지수 백오프
+#   OPENAI_RETRY_BUDGET : 전체 요청 대비 재시도 비율 상한 (장애 시 재시도가 부하를 키우지 않게)
+OPENAI_MAX_RETRIES     = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_RETRY_BASE_MS   = float(os.getenv("OPENAI_RETRY_BASE_MS", "250"))
+OPENAI_RETRY_MAX_MS    = float(os.getenv("OPENAI_RETRY_MAX_MS", "8000"))
+OPENAI_RETRY_BUDGET    = float(os.getenv("OPENAI_RETRY_BUDGET", "0.1"))
+OPENAI_RETRY_RESERVE   = int(os.getenv("OPENAI_RETRY_RESERVE", "10"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class Upstream_Rejected(Exception):
+    """대기 시간 안에 동시성 슬롯이나 속도 한도를 얻지 못해 보내지 않은 요청."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"OpenAI 요청 거절 ({reason})")
+        self.reason = reason
+
+
+async def acquire_within(primitive, timeout: float):
+    """
+    lock / semaphore 를 timeout 초 안에 얻음 (못 얻으면 asyncio.TimeoutError).
+    wait_for(primitive.acquire(), ...) 는 Python 3.11 이하에서 시간 초과와 획득이 겹치면 얻은 슬롯을 놓치므로,
+    획득 태스크를 직접 기다리고 포기한 뒤에 얻어진 슬롯은 반납함.
+    """
+    if not primitive.locked():
+        # 비어 있으면 기다리지 않고 바로 얻음
+        await primitive.acquire()
+        return
+    task = asyncio.ensure_future(primitive.acquire())
+    try:
+        done, _ = await asyncio.wait({task}, timeout=max(0.0, timeout))
+    except BaseException:
+        _abandon(primitive, task)
+        raise
+    if not done:
+        _abandon(primitive, task)
+        raise asyncio.TimeoutError
+
+
+def _abandon(primitive, task):
+    task.cancel()
+    # 취소가 닿기 전에 획득이 끝났으면 (결과 True) 반납
+    task.add_done_callback(lambda t: None if t.cancelled() or t.exception() else primitive.release())
+
+
+# 초당 rate 개씩 채워지는 토큰 버킷 (호출 순서대로 토큰을 예약하므로 대기자는 FIFO)
+class Token_Bucket:
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float, deadline: float):
+        """amount 만큼 꺼냄. deadline(monotonic) 까지 못 채우면 asyncio.TimeoutError."""
+        amount = min(amount, self.capacity)
+        # 대기 시간 계산과 예약은 await 없이 한 번에 (lock 없이도 원자적) → 잠은 각자 따로 자므로
+        # 느린 대기자 하나가 뒤의 대기자를 붙잡지 않음. 토큰은 음수까지 미리 빼 두어 뒤에 온 요청이 그만큼 더 기다림
+        self._refill()
+        wait = max(0.0, (amount - self.tokens) / self.rate)
+        if time.monotonic() + wait > deadline:
+            raise asyncio.TimeoutError
+        self.tokens -= amount
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 쓰지 않은 예약은 되돌림
+                self.refund(amount)
+                raise
+
+    def refund(self, amount: float):
+        """쓰지 않은 토큰을 되돌림 (뒤 단계에서 거절돼 실제로 호출하지 않은 경우)."""
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+# 재시도 예산: 요청마다 ratio 만큼 적립, 재시도마다 1 차감 (reserve 는 최소 보유량이자 상한 기준)
+class Retry_Budget:
+    def __init__(self, ratio: float = OPENAI_RETRY_BUDGET, reserve: int = OPENAI_RETRY_RESERVE):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = float(reserve)
+
+    def deposit(self):
+        self.balance = min(self.reserve * 2, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def retry_after(error: Exception) -> float | None:
+    """429 응답의 Retry-After(초) 헤더."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def request_key(kwargs: dict) -> str:
+    raw = json.dumps(kwargs, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# OpenAI 클라이언트 앞단의 호출 관리자
+#   - 동시성 세마포어 + 토큰 버킷(RPM/TPM) 을 OPENAI_QUEUE_TIMEOUT 안에 얻지 못하면 Upstream_Rejected
+#   - 429/5xx/타임아웃은 full jitter 백오프로 재시도 (Retry-After 우선, 전역 재시도 예산 안에서)
+#   - 같은 요청이 동시에 여러 개면 한 번만 보내고 결과를 공유 (single-flight, 스트리밍 제외)
+class Upstream_Manager:
+    def __init__(self, client, rpm: int = OPENAI_RPM, tpm: int = OPENAI_TPM,
+                 max_concurrency: int = OPENAI_MAX_CONCURRENCY, queue_timeout: float = OPENAI_QUEUE_TIMEOUT,
+                 max_retries: int = OPENAI_MAX_RETRIES):
+        # 재시도는 여기서 관리하므로 SDK 자체 재시도는 끔
+        self.client = client.with_options(max_retries=0)
+        self.requests_bucket = Token_Bucket(rpm) if rpm else None
+        self.tokens_bucket = Token_Bucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_budget = Retry_Budget()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight_requests = {}
+        self.waiting = 0
+        self.in_flight = 0
+        self.counters = {
+            "requests": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "retry_budget_exhausted": 0,
+            "rejected_queue_timeout": 0,
+            "rejected_rate_limit": 0,
+            "upstream_errors": 0,
+        }
+
+    def _cost(self, kwargs: dict) -> int:
+        prompt = sum(estimate_tokens(m["content"]) for m in kwargs["messages"])
+        return prompt + (kwargs.get("max_tokens") or OPENAI_EXPECTED_OUTPUT_TOKENS)
+
+    async def _admit(self, kwargs: dict):
+        """동시성 슬롯 + 속도 한도 획득. 실패하면 Upstream_Rejected (슬롯은 반납)."""
+        deadline = time.monotonic() + self.queue_timeout
+        self.waiting += 1
+        try:
+            await acquire_within(self._semaphore, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters["rejected_queue_timeout"] += 1
+            raise Upstream_Rejected("queue_timeout") from None
+        finally:
+            self.waiting -= 1
+        request_taken = False
+        try:
+            if self.requests_bucket is not None:
+                await self.requests_bucket.acquire(1, deadline)
+                request_taken = True
+            if self.tokens_bucket is not None:
+                await self.tokens_bucket.acquire(self._cost(kwargs), deadline)
+        except BaseException as e:
+            # 기다리다 거절·취소돼도 (클라이언트 연결 끊김 등) 슬롯과 이미 받은 요청 수 토큰은 반납
+            self._semaphore.release()
+            if request_taken:
+                self.requests_bucket.refund(1)
+            if isinstance(e, asyncio.TimeoutError):
+                self.counters["rejected_rate_limit"] += 1
+                raise Upstream_Rejected("rate_limit") from None
+            raise
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def _backoff(self, attempt: int, error: Exception) -> bool:
+        """재시도해도 되면 대기 후 True."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return False
+        if not self.retry_budget.withdraw():
+            self.counters["retry_budget_exhausted"] += 1
+            return False
+        self.counters["retries"] += 1
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(OPENAI_RETRY_MAX_MS, OPENAI_RETRY_BASE_MS * 2 ** attempt)) / 1000
+        await asyncio.sleep(min(delay, OPENAI_RETRY_MAX_MS / 1000))
+        return True
+
+    async def _call(self, kwargs: dict):
+        """허가를 받아 한 번 호출, 재시도 가능한 실패면 백오프 후 다시 허가부터."""
+        self.counters["requests"] += 1
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            await self._admit(kwargs)
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                self.counters["upstream_errors"] += 1
+                error = e
+            finally:
+                self._release()
+            if not await self._backoff(attempt, error):
+                raise error
+            attempt += 1
+
+    async def complete(self, **kwargs):
+        """client.chat.completions.create(**kwargs) 와 같은 결과. 동일한 진행 중 요청은 합침."""
+        key = request_key(kwargs)
+        task = self._inflight_requests.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._call(kwargs))
+            self._inflight_requests[key] = task
+            task.add_done_callback(lambda _: self._inflight_requests.pop(key, None))
+        # 기다리던 요청 하나가 취소돼도 공유 중인 호출은 계속 진행
+        return await asyncio.shield(task)
+
+    async def stream(self, **kwargs):
+        """스트리밍 호출. 첫 응답 전까지만 재시도하고, 스트림이 끝날 때까지 슬롯을 점유."""
+        self.counters["requests"] += 1
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            await self._admit(kwargs)
+            try:
+                stream = await self.client.chat.completions.create(stream=True, **kwargs)
+                break
+            except Exception as e:
+                self._release()
+                self.counters["upstream_errors"] += 1
+                if not await self._backoff(attempt, e):
+                    raise
+                attempt += 1
+            except BaseException:
+                # 첫 응답 전에 취소돼도 슬롯과 in_flight 는 반납
+                self._release()
+                raise
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "retry_budget": round(self.retry_budget.balance, 2),
+            **self.counters,
+        }
@@ -8,12 +8,14 @@ function Chat({ user, systemPrompt }) {
   const [loading, setLoading] = useState(false);
   const chatBoxRef = useRef(null);
   const [currentIntent, setCurrentIntent] = useState(null);
+  const [conversationId, setConversationId] = useState(null);
 
   useEffect(() => {
-    fetch("http://localhost:8000/history")
+    // 최근 100개만 불러와서 시간순으로 뒤집기
+    fetch("http://localhost:8000/history?order=desc&limit=100")
       .then((res) => res.json())
       .then((data) => {
-        const formatted = data.map((msg) => ({
+        const formatted = data.items.reverse().map((msg) => ({
           role: msg.speaker === "user" ? "user" : "bot",
           text: msg.content,
         }));
@@ -46,11 +48,17 @@ function Chat({ user, systemPrompt }) {
       const res = await fetch("http://127.0.0.1:8000/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ user_input: userInput, system_prompt: systemPrompt}),
+        body: JSON.stringify({
+          user_input: userInput,
+          system_prompt: systemPrompt,
+          user_id: user,
+          conversation_id: conversationId,
+        }),
       });
 
       const data = await res.json();
       setCurrentIntent(data.intent);
+      setConversationId(data.conversation_id);
 
       setChatHistory((prev) => [
         ...prev,
@@ -38,7 +38,7 @@ function Login({ onLoginSuccess }) {
       if (data.success) {
         onLoginSuccess(name);
       } else {
-        setLoginError(data.reason === "wrong_password" ? "❌ 비밀번호가 틀렸어요." : "❌ 사용자 없음");
+        setLoginError("❌ 아이디 또는 비밀번호가 틀렸어요.");
       }
     } catch (err) {
       setLoginError("❌ 서버 오류 발생");